@@ -1,27 +1,66 @@
-from .pyfaas import pyfaas_exec
-from .pyfaas import pyfaas_ping
-from .pyfaas import pyfaas_get_stats
-from .pyfaas import pyfaas_config
-from .pyfaas import pyfaas_register
-from .pyfaas import pyfaas_unregister
-from .pyfaas import pyfaas_list
-from .pyfaas import pyfaas_get_stats
-from .pyfaas import pyfaas_get_worker_info
-from .pyfaas import pyfaas_get_cache_dump
-from .pyfaas import pyfaas_load_workflow
-from .pyfaas import pyfaas_chain_exec
+import importlib
+
+# Same as typing.TYPE_CHECKING, without importing typing: the imports below are seen by type checkers and IDEs only
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from .pyfaas import pyfaas_exec
+    from .pyfaas import pyfaas_exec_async
+    from .pyfaas import pyfaas_exec_stream
+    from .pyfaas import pyfaas_broadcast
+    from .pyfaas import pyfaas_map
+    from .pyfaas import pyfaas_ping
+    from .pyfaas import pyfaas_get_stats
+    from .pyfaas import pyfaas_config
+    from .pyfaas import pyfaas_register
+    from .pyfaas import pyfaas_register_many
+    from .pyfaas import pyfaas_unregister
+    from .pyfaas import pyfaas_list
+    from .pyfaas import pyfaas_get_worker_info
+    from .pyfaas import pyfaas_get_client_cache_stats
+    from .pyfaas import pyfaas_get_cache_dump
+    from .pyfaas import pyfaas_load_workflow
+    from .pyfaas import pyfaas_chain_exec
+    from .pyfaas import pyfaas_chain_exec_async
+    from .pyfaas_client.async_pyfaas_client import AsyncPyfaasClient
+    from .local_cluster import LocalCluster
 
 __all__ = [
     'pyfaas_exec',
+    'pyfaas_exec_async',
+    'pyfaas_exec_stream',
+    'pyfaas_broadcast',
+    'pyfaas_map',
     'pyfaas_config',
     'pyfaas_ping',
     'pyfaas_get_stats',
     'pyfaas_register',
+    'pyfaas_register_many',
     'pyfaas_unregister',
     'pyfaas_list',
-    'pyfaas_get_stats',
     'pyfaas_get_worker_info',
+    'pyfaas_get_client_cache_stats',
     'pyfaas_get_cache_dump',
     'pyfaas_load_workflow',
-    'pyfaas_chain_exec'
+    'pyfaas_chain_exec',
+    'pyfaas_chain_exec_async',
+    'AsyncPyfaasClient',
+    'LocalCluster'
 ]
+
+# Submodule defining each public name. Submodules are imported on first access to one of their names,
+# so that 'import pyfaas' does not pay for zmq, asyncio and the clients until they are actually used
+_LAZY_ATTRIBUTES = {name: '.pyfaas' for name in __all__}
+_LAZY_ATTRIBUTES['AsyncPyfaasClient'] = '.pyfaas_client.async_pyfaas_client'
+_LAZY_ATTRIBUTES['LocalCluster'] = '.local_cluster'
+
+
+def __getattr__(name: str) -> object:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value         # Later accesses do not go through __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,96 @@
+import json
+import time
+import copy
+import threading
+
+from collections import OrderedDict
+
+
+class ClientResultCache():
+    '''
+    Client-side LRU cache of remote executions' results, with optional TTL-based expiration.
+
+    Entries are keyed by (func_id, positional args, default args), the args being canonicalized to their
+    JSON representation (with sorted keys). Only calls whose arguments are JSON-serializable can be cached.
+    '''
+    def __init__(self, max_size: int, ttl_s: float = 0):
+        self._max_size = max_size
+        self._ttl_s = ttl_s                     # 0: entries never expire
+        self._cache_entries = OrderedDict()     # key -> (func_result, expiration timestamp), most recently used last
+        self._lock = threading.Lock()           # The cache is shared by every thread using the PyFaaS client
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _build_key_tuple(self, func_id: str, func_positional_args: list[object], func_default_args: dict[str, object]) -> tuple | None:
+        try:
+            return (
+                func_id,
+                json.dumps(func_positional_args, sort_keys=True, separators=(',', ':')),
+                json.dumps(func_default_args, sort_keys=True, separators=(',', ':'))
+            )
+        except (TypeError, ValueError):
+            return None     # Not canonicalizable, the call cannot be cached
+
+    def add(self, func_id: str, func_positional_args: list[object], func_default_args: dict[str, object], func_result: object) -> None:
+        if self._max_size == 0:
+            # Caching is disabled
+            return
+
+        key_tuple = self._build_key_tuple(func_id, func_positional_args, func_default_args)
+        if key_tuple is None:
+            return
+
+        expires_at = time.monotonic() + self._ttl_s if self._ttl_s > 0 else None
+        with self._lock:
+            self._cache_entries[key_tuple] = (copy.deepcopy(func_result), expires_at)
+            self._cache_entries.move_to_end(key_tuple)
+            if len(self._cache_entries) > self._max_size:
+                self._cache_entries.popitem(last=False)     # Evicting the least recently used entry
+                self._evictions += 1
+
+    def get_cached_result(self, func_id: str, func_positional_args: list[object], func_default_args: dict[str, object]) -> tuple[bool, object]:
+        '''
+        Looks up the result of a call.
+
+        Returns:
+            tuple[bool, object]: (True, result) on a hit, (False, None) on a miss.
+        '''
+        if self._max_size == 0:
+            # Caching is disabled
+            return False, None
+
+        key_tuple = self._build_key_tuple(func_id, func_positional_args, func_default_args)
+        with self._lock:
+            cached_entry = self._cache_entries.get(key_tuple) if key_tuple is not None else None
+            if cached_entry is not None and cached_entry[1] is not None and cached_entry[1] <= time.monotonic():
+                del self._cache_entries[key_tuple]
+                self._expirations += 1
+                cached_entry = None
+
+            if cached_entry is None:
+                self._misses += 1
+                return False, None
+
+            self._cache_entries.move_to_end(key_tuple)
+            self._hits += 1
+
+        return True, copy.deepcopy(cached_entry[0])     # Callers must not be able to alter the cached result
+
+    def reset_cache(self) -> None:
+        with self._lock:
+            self._cache_entries.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_size': self._max_size,
+                'ttl_s': self._ttl_s,
+                'size': len(self._cache_entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
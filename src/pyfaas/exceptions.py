@@ -54,3 +54,6 @@ class PyFaaSWorkerIDsRetrievalError(PyFaaSError):
 
 class PyFaaSChainedExecutionError(PyFaaSError):
     pass
+
+class PyFaaSOverloadedError(PyFaaSError):
+    pass
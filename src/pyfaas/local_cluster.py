@@ -0,0 +1,235 @@
+import os
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import zmq
+
+from pyfaas.pyfaas_client.pyfaas_client import PyfaasClient
+from pyfaas.pyfaas_client.async_pyfaas_client import AsyncPyfaasClient
+from pyfaas.util.codec import DEFAULT_CODEC
+from pyfaas.exceptions import PyFaaSNetworkError
+
+# How long start() waits for every Worker to register to the Director
+_STARTUP_TIMEOUT_S = 10
+
+TRANSPORTS = ('inproc', 'ipc', 'tcp')
+
+
+class LocalCluster:
+    '''
+    A whole PyFaaS cluster in the current process: a Director and n_workers Workers, each one running in its own threads,
+    plus a client connected to the Director. Meant for tests and benchmarks: no TOML files, no separate processes and,
+    with the default 'inproc' transport, no TCP stack in the path of the messages (the framework overhead alone is measured).
+
+    Transports:
+        - 'inproc': in-memory ZeroMQ transport, shared by every socket of the cluster through a single ZeroMQ context.
+        - 'ipc': Unix domain socket in a temporary directory. Clients of other processes can connect to cluster.endpoint.
+        - 'tcp': loopback TCP on a free port, as a real deployment.
+
+    Example:
+        with LocalCluster(n_workers=4) as cluster:
+            func_id = cluster.client.pyfaas_register(my_function)['result']
+            response = cluster.client.pyfaas_exec(func_id, [1, 2], {})
+    '''
+    def __init__(self, n_workers: int = 2, transport: str = 'inproc', receive_timeout_s: int = 10, codec: str = DEFAULT_CODEC,
+                 director_config: dict = None, worker_config: dict = None, n_shards: int = 1):
+        '''
+        Args:
+            n_workers (int): The number of Workers.
+            transport (str): The ZeroMQ transport connecting the cluster, one of TRANSPORTS.
+            receive_timeout_s (int): The receive timeout of the clients of the cluster.
+            codec (str): The payload codec of the clients of the cluster.
+            director_config (dict): Sections of the Director configuration overriding the defaults (e.g.: {'hedging': {...}}).
+            worker_config (dict): Sections of the Worker configuration overriding the defaults (e.g.: {'behavior': {...}}).
+            n_shards (int): The number of shards of the Director, each one running in its own thread (see the 'shards' field
+                of the Director configuration). Shard threads share the interpreter: use separate processes to scale routing.
+
+        Raises:
+            ValueError: Raised if n_workers or n_shards is not positive, or the transport is not supported.
+        '''
+        if n_workers < 1:
+            raise ValueError(f'A LocalCluster needs at least one Worker, {n_workers} requested')
+        if n_shards < 1:
+            raise ValueError(f'A LocalCluster needs at least one Director shard, {n_shards} requested')
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unsupported transport '{transport}'. Available transports: {TRANSPORTS}")
+
+        self._logger = logging.getLogger('pyfaas.local_cluster')
+        self._n_workers = n_workers
+        self._n_shards = n_shards
+        self._transport = transport
+        self._receive_timeout_s = receive_timeout_s
+        self._codec = codec
+        self._director_config_overrides = director_config or {}
+        self._worker_config_overrides = worker_config or {}
+
+        self._temp_dir = None           # Log files (and the IPC socket)
+        self._zmq_context = None        # Shared by every socket of the cluster
+        self._director = None           # Shard 0 of the Director
+        self._directors = []            # Every shard of the Director
+        self._workers = []
+        self._threads = []
+        self._clients = []
+        self.endpoint = None            # ZeroMQ endpoint of the Director
+        self.client = None              # PyfaasClient connected to the Director, created by start()
+
+    def __enter__(self) -> 'LocalCluster':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def start(self) -> 'LocalCluster':
+        '''
+        Starts the Director and the Workers, and waits for every Worker to be registered.
+
+        Raises:
+            PyFaaSNetworkError: Raised if the Workers are not all registered within _STARTUP_TIMEOUT_S seconds.
+        '''
+        # Imported here: the Director and Worker packages are only needed by the processes running them
+        from pyfaas_director.app.pyfaas_director import PyfaasDirector
+        from pyfaas_worker.app.pyfaas_worker import PyfaasWorker
+
+        self._temp_dir = tempfile.TemporaryDirectory(prefix='pyfaas-')
+        self._zmq_context = zmq.Context()
+        # ROUTER sockets silently drop the messages exceeding the high-water mark of a peer's pipe: with in-memory transports
+        # a burst of requests fills it at once. The messages in flight are bounded by the requests of the clients anyway
+        self._zmq_context.setsockopt(zmq.SNDHWM, 0)
+        self._zmq_context.setsockopt(zmq.RCVHWM, 0)
+        self.endpoint = self._build_endpoint()
+
+        for shard in range(self._n_shards):
+            director = PyfaasDirector(self._build_director_config(), zmq_context=self._zmq_context, shard=shard)
+            self._directors.append(director)
+            self._start_thread(director.run, f'director-{shard}')
+        self._director = self._directors[0]
+        for i in range(self._n_workers):
+            worker = PyfaasWorker(self._build_worker_config(), zmq_context=self._zmq_context)
+            self._workers.append(worker)
+            self._start_thread(worker.run, f'worker-{i}')
+
+        startup_deadline = time.monotonic() + _STARTUP_TIMEOUT_S
+        while any(len(director._workers) < self._n_workers for director in self._directors):
+            if time.monotonic() > startup_deadline:
+                registered_workers = min(len(director._workers) for director in self._directors)
+                self.close()
+                raise PyFaaSNetworkError(f'Only {registered_workers}/{self._n_workers} Workers registered to the local Director within {_STARTUP_TIMEOUT_S} s')
+            time.sleep(0.01)
+
+        self.client = self.new_client()
+        self._logger.info(f'Local PyFaaS cluster up: 1 Director and {self._n_workers} Worker(s) on {self.endpoint}')
+        return self
+
+    def new_client(self, **kwargs) -> PyfaasClient:
+        '''
+        Returns a new PyfaasClient connected to the Director of the cluster, closed along with the cluster.
+        kwargs are passed to PyfaasClient (e.g.: max_retries, compression_config).
+        '''
+        kwargs.setdefault('codec', self._codec)
+        kwargs.setdefault('director_shards', self._n_shards)
+        client = PyfaasClient(None, None, self._receive_timeout_s, director_endpoint=self.endpoint, zmq_context=self._zmq_context, **kwargs)
+        self._clients.append(client)
+        return client
+
+    def new_async_client(self, **kwargs) -> AsyncPyfaasClient:
+        '''
+        Returns a new AsyncPyfaasClient connected to the Director of the cluster, closed along with the cluster.
+        kwargs are passed to AsyncPyfaasClient.
+        '''
+        kwargs.setdefault('codec', self._codec)
+        kwargs.setdefault('director_shards', self._n_shards)
+        client = AsyncPyfaasClient(None, None, self._receive_timeout_s, director_endpoint=self.endpoint, zmq_context=self._zmq_context, **kwargs)
+        self._clients.append(client)
+        return client
+
+    def close(self) -> None:
+        '''
+        Closes the clients, then stops the Workers and the Director.
+        '''
+        for client in self._clients:
+            if isinstance(client, AsyncPyfaasClient):
+                client.close()
+            else:
+                client.zmq_close()
+        self._clients.clear()
+        self.client = None
+
+        for worker in self._workers:
+            worker.stop()
+        for director in self._directors:
+            director.stop()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._workers.clear()
+        self._threads.clear()
+        self._directors.clear()
+        self._director = None
+
+        if self._zmq_context is not None:
+            self._zmq_context.destroy(linger=0)      # Also closes the sockets of any thread that did not exit in time
+            self._zmq_context = None
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def _start_thread(self, target, name: str) -> None:
+        thread = threading.Thread(target=target, name=f'pyfaas-local-{name}', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _build_endpoint(self) -> str:
+        match self._transport:
+            case 'inproc':
+                return f'inproc://pyfaas-director-{uuid.uuid4().hex}'
+            case 'ipc':
+                return f"ipc://{os.path.join(self._temp_dir.name, 'director.sock')}"
+            case 'tcp':
+                # A free port, picked by binding a throwaway socket to an ephemeral one
+                probe_socket = self._zmq_context.socket(zmq.ROUTER)
+                port = probe_socket.bind_to_random_port('tcp://127.0.0.1')
+                probe_socket.close(linger=0)
+                return f'tcp://127.0.0.1:{port}'
+
+    def _build_director_config(self) -> dict:
+        config = {
+            'network': {'director_ip_addr': '127.0.0.1', 'director_port': None, 'endpoint': self.endpoint, 'shards': self._n_shards},
+            'logging': {'log_level': 'warning', 'log_directory': self._temp_dir.name, 'log_filename': 'director.log'},
+            'statistics': {'enabled': True},
+            'workers': {
+                'heartbeat_check_interval_ms': 1000,
+                'expected_heartbeat_interval_ms': 1000,
+                'worker_selection_strategy': 'Round-Robin',
+                'synchronization_interval_ms': 500
+            },
+            'misc': {'greeting_msg': 'Local PyFaaS Director'}
+        }
+        return _merge_config(config, self._director_config_overrides)
+
+    def _build_worker_config(self) -> dict:
+        config = {
+            'network': {'director_ip_addr': '127.0.0.1', 'director_port': None, 'director_endpoint': self.endpoint, 'director_shards': self._n_shards,
+                        'heartbeat_interval_ms': 500},
+            'logging': {'log_level': 'warning', 'log_directory': self._temp_dir.name, 'log_filename': 'worker.log'},
+            'statistics': {'enabled': True},
+            'behavior': {
+                'dump_file': os.path.join(self._temp_dir.name, 'worker_state.bin'),
+                'shutdown_persistence': False,
+                'caching': {'policy': 'LRU', 'max_size': 0},
+                'dedup_table_size': 1024,
+                'tags': []
+            },
+            'misc': {'greeting_msg': 'Local PyFaaS Worker', 'log_level': 'warning'}
+        }
+        return _merge_config(config, self._worker_config_overrides)
+
+
+def _merge_config(config: dict, overrides: dict) -> dict:
+    # Sections are merged key by key, so that overriding a single field keeps the defaults of the others
+    for section, fields in overrides.items():
+        if isinstance(fields, dict) and isinstance(config.get(section), dict):
+            _merge_config(config[section], fields)
+        else:
+            config[section] = fields
+    return config
@@ -1,13 +1,16 @@
 import logging
-import dill
 import json
-import base64
 import atexit
 import zmq
 
-from typing import Callable
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
 from pyfaas.pyfaas_client import pyfaas_client
+from pyfaas.client_caching.result_cache import ClientResultCache
 from pyfaas.util.general import *
+from pyfaas.util.serialization import decode_func_result, decode_broadcast_result
+from pyfaas.util.codec import DEFAULT_CODEC
+from pyfaas.util.retry import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF_S
 from pyfaas.util.client_side_workflow_validation import *
 from pyfaas.exceptions import *
 
@@ -18,6 +21,7 @@ class _ClientManager:
         self.client = None
         self.configured = False
         self.config = None
+        self.result_cache = None        # Client-side result cache, see the [caching] section of the configuration file
 
 _CLIENT_MANAGER = _ClientManager()               # Initialized by a call to pyfaas_config()
 
@@ -61,7 +65,18 @@ def pyfaas_config(file_path: str = None) -> None:
         _CLIENT_MANAGER.client = pyfaas_client.PyfaasClient(
             _CLIENT_MANAGER.config['network']['director_ip_addr'],
             _CLIENT_MANAGER.config['network']['director_port'],
-            _CLIENT_MANAGER.config['network']['receive_timeout_s']
+            _CLIENT_MANAGER.config['network']['receive_timeout_s'],
+            codec=_CLIENT_MANAGER.config['network'].get('codec', DEFAULT_CODEC),
+            compression_config=_CLIENT_MANAGER.config.get('compression'),
+            max_retries=_CLIENT_MANAGER.config['network'].get('max_retries', DEFAULT_MAX_RETRIES),
+            retry_backoff_s=_CLIENT_MANAGER.config['network'].get('retry_backoff_s', DEFAULT_RETRY_BACKOFF_S),
+            director_shards=_CLIENT_MANAGER.config['network'].get('director_shards', 1)
+        )
+
+        caching_config = _CLIENT_MANAGER.config.get('caching', {})
+        _CLIENT_MANAGER.result_cache = ClientResultCache(
+            caching_config.get('max_size', 0),
+            caching_config.get('ttl_s', 0)
         )
         
         logger.info(f'PyFaaS has been configured using {_CONFIG_FILE_PATH}')
@@ -126,6 +141,45 @@ def pyfaas_register(func_code: Callable) -> str:
         logger.warning(f'Error while registering a function: {message}')
         raise PyFaaSFunctionRegistrationError(message)
 
+def pyfaas_register_many(funcs: list[Callable]) -> dict[str, str]:
+    '''
+    Registers many functions to the PyFaaS cluster at once (e.g.: at the startup of an application).
+
+    The functions are sent in a single 'register_batch' request, and registered by a single Worker: one round trip
+    instead of two per function (see pyfaas_register()). Functions already registered keep their ID.
+    Every function must have specified all the type annotations (for parameters and return type).
+
+    Args:
+        funcs (list[Callable]): The functions to be registered.
+
+    Returns:
+        dict[str, str]: The ID of each function, by function name.
+
+    Raises:
+        PyFaaSTimeoutError: Raised if a timeout is reached while waiting from the Director's response.
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSParameterMismatchError: Raised if no functions are given, or two different functions share the same name.
+        PyFaaSFunctionRegistrationError: Raised if one/more functions could not be registered (e.g.: missing type annotations).
+            The other functions of the batch are registered anyway.
+    '''
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    try:
+        director_resp_json = _CLIENT_MANAGER.client.pyfaas_register_many(funcs)
+    except zmq.Again:
+        raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_register_many()')
+
+    status = director_resp_json.get('status')
+    message = director_resp_json.get('message')
+    if status == 'ok':
+        function_ids = director_resp_json.get('result')
+        logger.info(f'Successfully registered {len(function_ids)} function(s)')
+        return function_ids
+    else:
+        logger.warning(f'Error while registering a batch of functions: {message}')
+        raise PyFaaSFunctionRegistrationError(message)
+
 def pyfaas_unregister(func_id: str) -> int:
     '''
     Unregisters the function identified by the ID passed as a parameter from the PyFaaS cluster.
@@ -228,7 +282,7 @@ def pyfaas_list() -> dict:
         raise PyFaaSFunctionListingError(message)
 
 # TODO: is it possible not to pass positional args?
-def pyfaas_exec(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False) -> object:
+def pyfaas_exec(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, use_client_cache: bool = False, hedge: bool = False, deadline_s: float = None, coalesce: bool = False, use_director_cache: bool = False) -> object:
     '''
     Remotely executes the function identified by 'dunc_id' in a Worker of the PyFaaS cluster and returns the result.
 
@@ -237,15 +291,31 @@ def pyfaas_exec(func_id: str, func_positional_args_list: list[object], func_defa
         func_positional_args_list (list[object]): The list of the positional arguments accepted by the specified function.
         func_default_args_list (dict[str, object]): The list of default arguments accepted by the specified function.
         save_in_cache (bool): Whether to save or not the result of the function's execution the executing Worker's cache.
+        use_client_cache (bool): Whether to serve the call from (and store its result in) the client-side result cache. 
+            Only meant for deterministic functions. The cache is configured in the [caching] section of the configuration file.
+        hedge (bool): Whether the Director may send a duplicate of the request to a second Worker holding the function if the response
+            is late (see the [hedging] section of the Director configuration). The first response is returned. Only meant for functions
+            that can safely run twice.
+        deadline_s (float): If specified, the number of seconds after which the result is no longer wanted. The deadline travels with
+            the request: the Director drops it if it expires before being forwarded, and the Worker skips its execution if it expires
+            before the execution starts. The wait for the response ends at the deadline too, whatever the receive timeout.
+        coalesce (bool): Whether the Director may answer the request with the response to an identical request (same function
+            and arguments, also sent with coalesce=True) already in flight, instead of running the function once more. Only meant for
+            deterministic functions: avoids running an expensive function many times in parallel when many clients ask for it at once.
+        use_director_cache (bool): Whether the Director may answer the request with its cached response to an identical call (same function
+            and arguments, also sent with use_director_cache=True), and cache the response otherwise. Whatever Worker executed the call, no Worker
+            is involved on a hit. Only meant for deterministic functions. The cache is configured in the [caching] section of the Director configuration.
 
     Returns:
         object: The return value of the remotely executed function.
     
     Raises:
         PyFaaSParameterMismatchError: Raised if the provided arguments type are not compliant with the function's signature.
-        PyFaaSTimeoutError: Raised if a timeout is reached while waiting from the Director's response. 
+        PyFaaSTimeoutError: Raised if a timeout is reached while waiting from the Director's response, or if the deadline expires. 
         PyFaaSDeserializationError: Raised if any error occures while deserializing the remotely executed function's result.
         PyFaaSFunctionExecutionError: Raised if the specified function is not registered at any Worker or if an exception is raised during the function's execution.
+        PyFaaSOverloadedError: Raised if the Director rejected the request because too many requests are already waiting for a Worker
+            (see 'max_in_flight_per_worker' in the Director configuration).
     '''
     if not _CLIENT_MANAGER.configured:
         raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
@@ -257,12 +327,78 @@ def pyfaas_exec(func_id: str, func_positional_args_list: list[object], func_defa
     if func_default_args_list is None:
         func_default_args_list = {}
 
+    if use_client_cache and _CLIENT_MANAGER.result_cache is not None:
+        cache_hit, cached_result = _CLIENT_MANAGER.result_cache.get_cached_result(func_id, func_positional_args_list, func_default_args_list)
+        if cache_hit:
+            logger.debug(f"Client cache hit for '{func_id}'")
+            return cached_result
+
     # Calling actual pyfaas_exec() function from global object
     try:
-        director_resp_json = _CLIENT_MANAGER.client.pyfaas_exec(func_id, func_positional_args_list, func_default_args_list, save_in_cache)
+        director_resp_json = _CLIENT_MANAGER.client.pyfaas_exec(func_id, func_positional_args_list, func_default_args_list, save_in_cache, hedge=hedge, deadline_s=deadline_s, coalesce=coalesce, use_director_cache=use_director_cache)
     except zmq.Again:
         raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_exec()')
 
+    func_res = _process_exec_response(director_resp_json, func_id)
+    if use_client_cache and _CLIENT_MANAGER.result_cache is not None:
+        _CLIENT_MANAGER.result_cache.add(func_id, func_positional_args_list, func_default_args_list, func_res)
+    return func_res
+
+def pyfaas_exec_async(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, use_client_cache: bool = False, hedge: bool = False, deadline_s: float = None, coalesce: bool = False, use_director_cache: bool = False) -> Future:
+    '''
+    Non-blocking version of pyfaas_exec(): sends the execution request and immediately returns a Future.
+
+    The PyFaaS client's I/O thread completes the Future when the response arrives, so that any number of calls
+    can be in flight at the same time, also from different threads.
+
+    Args:
+        func_id (str): The ID of the function to be executed. The ID is returned at registration time by a call to pyfaas_register().
+        func_positional_args_list (list[object]): The list of the positional arguments accepted by the specified function.
+        func_default_args_list (dict[str, object]): The list of default arguments accepted by the specified function.
+        save_in_cache (bool): Whether to save or not the result of the function's execution the executing Worker's cache.
+        use_client_cache (bool): Whether to serve the call from (and store its result in) the client-side result cache.
+        hedge (bool): Whether the Director may send a duplicate of the request to a second Worker if the response is late (see pyfaas_exec()).
+        deadline_s (float): If specified, the number of seconds after which the result is no longer wanted (see pyfaas_exec()).
+        coalesce (bool): Whether the Director may answer the request with the response to an identical request in flight (see pyfaas_exec()).
+        use_director_cache (bool): Whether the Director may answer the request with its cached response to an identical call (see pyfaas_exec()).
+
+    Returns:
+        Future: A concurrent.futures.Future holding the return value of the remotely executed function, or the 
+        exception pyfaas_exec() would have raised (PyFaaSTimeoutError, PyFaaSDeserializationError, PyFaaSFunctionExecutionError, PyFaaSOverloadedError).
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSParameterMismatchError: Raised if the provided arguments type are not compliant with the function's signature.
+    '''
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+    
+    if type(func_positional_args_list) != list:
+        logger.error(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+        raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+    if func_default_args_list is None:
+        func_default_args_list = {}
+
+    result_cache = _CLIENT_MANAGER.result_cache if use_client_cache else None
+    if result_cache is not None:
+        cache_hit, cached_result = result_cache.get_cached_result(func_id, func_positional_args_list, func_default_args_list)
+        if cache_hit:
+            logger.debug(f"Client cache hit for '{func_id}'")
+            result_future = Future()
+            result_future.set_result(cached_result)
+            return result_future
+
+    response_future = _CLIENT_MANAGER.client.pyfaas_exec_async(func_id, func_positional_args_list, func_default_args_list, save_in_cache, hedge=hedge, deadline_s=deadline_s, coalesce=coalesce, use_director_cache=use_director_cache)
+    result_future = _chain_future(response_future, 'pyfaas_exec_async', _process_exec_response, func_id)
+    if result_cache is not None:
+        def cache_result(done_future: Future) -> None:
+            if done_future.exception() is None:
+                result_cache.add(func_id, func_positional_args_list, func_default_args_list, done_future.result())
+        result_future.add_done_callback(cache_result)
+    return result_future
+
+def _process_exec_response(director_resp_json: dict, func_id: str) -> object:
     status = director_resp_json.get('status')
     action = director_resp_json.get('action')
     result_type = director_resp_json.get('result_type')
@@ -272,17 +408,200 @@ def pyfaas_exec(func_id: str, func_positional_args_list: list[object], func_defa
     if status == 'ok':
         if action == 'executed':
             logger.info(f"Executed '{func_id}'")
-            if result_type == 'pickle_base64':
-                try:
-                    result_bytes = base64.b64decode(result)
-                    result = dill.loads(result_bytes)
-                except Exception as e:
-                    raise PyFaaSDeserializationError(f'Failed to deserialize worker result: {e}')
-            return result      # it's the JSON result that was included in the worker msg, or the deserialized Base64 result
+            return decode_func_result(result, result_type)      # The JSON result that was included in the worker msg, or the deserialized Base64 result
+    elif action == 'deadline_exceeded':
+        logger.error(f"Deadline exceeded while executing '{func_id}': {message}")
+        raise PyFaaSTimeoutError(message)
+    elif action == 'overloaded':
+        logger.error(f"The cluster is overloaded, '{func_id}' has not been executed: {message}")
+        raise PyFaaSOverloadedError(message)
     else:
         logger.error(f"Error while executing '{func_id}' on the worker: {message}")
         raise PyFaaSFunctionExecutionError(message)
 
+def pyfaas_broadcast(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, tags: list[str] = None) -> dict[str, object]:
+    '''
+    Remotely executes the function identified by 'func_id' on every Worker holding it, e.g. to warm the Workers' caches
+    or to refresh some per-Worker state. The Director sends the request to all the Workers at once and gathers their results.
+
+    Args:
+        func_id (str): The ID of the function to be executed. The ID is returned at registration time by a call to pyfaas_register().
+        func_positional_args_list (list[object]): The list of the positional arguments accepted by the specified function.
+        func_default_args_list (dict[str, object]): The list of default arguments accepted by the specified function.
+        save_in_cache (bool): Whether to save or not the result of the function's execution in each Worker's cache.
+        tags (list[str]): If specified, only the Workers having all of these tags (see the 'tags' field of the Worker configuration) execute the function.
+
+    Returns:
+        dict[str, object]: The return value of the function on each Worker, by Worker ID. Workers whose execution failed
+            are mapped to the exception describing the failure (PyFaaSFunctionExecutionError or PyFaaSDeserializationError).
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSParameterMismatchError: Raised if the provided arguments type are not compliant with the function's signature.
+        PyFaaSTimeoutError: Raised if a timeout is reached while waiting from the Director's response.
+        PyFaaSFunctionExecutionError: Raised if the specified function is not registered at any (suitably tagged) Worker.
+    '''
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    if type(func_positional_args_list) != list:
+        logger.error(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+        raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+    if func_default_args_list is None:
+        func_default_args_list = {}
+
+    try:
+        director_resp_json = _CLIENT_MANAGER.client.pyfaas_broadcast(func_id, func_positional_args_list, func_default_args_list, save_in_cache, tags)
+    except zmq.Again:
+        raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_broadcast()')
+
+    if director_resp_json.get('status') != 'ok':
+        logger.error(f"Error while broadcasting '{func_id}': {director_resp_json.get('message')}")
+        raise PyFaaSFunctionExecutionError(director_resp_json.get('message'))
+
+    logger.info(f"Broadcasted '{func_id}' to {len(director_resp_json.get('result'))} worker(s)")
+    return decode_broadcast_result(director_resp_json.get('result'))
+
+def pyfaas_exec_stream(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None) -> Iterator[object]:
+    '''
+    Remotely executes the function identified by 'func_id' and yields its results as soon as they are produced.
+
+    Meant for generator functions: the executing Worker sends back each yielded item as soon as it is available, so
+    that neither the Worker nor the client ever hold the whole result in memory. Functions returning anything other than
+    an iterator produce a single item. Results are never cached.
+
+    Args:
+        func_id (str): The ID of the function to be executed. The ID is returned at registration time by a call to pyfaas_register().
+        func_positional_args_list (list[object]): The list of the positional arguments accepted by the specified function.
+        func_default_args_list (dict[str, object]): The list of default arguments accepted by the specified function.
+
+    Returns:
+        Iterator[object]: An iterator over the items produced by the remotely executed function.
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSParameterMismatchError: Raised if the provided arguments type are not compliant with the function's signature.
+        PyFaaSTimeoutError: Raised (while iterating) if the receive timeout elapses while waiting for the next item.
+        PyFaaSNetworkError: Raised (while iterating) if some items of the stream have been lost.
+        PyFaaSDeserializationError: Raised (while iterating) if any error occures while deserializing an item.
+        PyFaaSFunctionExecutionError: Raised (while iterating) if the function is not registered at any Worker or if an exception is raised during the function's execution.
+    '''
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    if type(func_positional_args_list) != list:
+        logger.error(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+        raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+    if func_default_args_list is None:
+        func_default_args_list = {}
+
+    return _pyfaas_exec_stream_results(func_id, func_positional_args_list, func_default_args_list)
+
+def _pyfaas_exec_stream_results(func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object]) -> Iterator[object]:
+    stream_responses = _CLIENT_MANAGER.client.pyfaas_exec_stream(func_id, func_positional_args_list, func_default_args_list)
+    expected_stream_seq = 0
+    try:
+        while True:
+            try:
+                director_resp_json = next(stream_responses)
+            except StopIteration:
+                return
+            except zmq.Again:
+                raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_exec_stream()')
+
+            # Every response carries the number of items sent before it: a gap means that some items have been dropped on the way
+            stream_seq = director_resp_json.get('stream_seq', expected_stream_seq)
+            if stream_seq != expected_stream_seq:
+                raise PyFaaSNetworkError(f"Lost {stream_seq - expected_stream_seq} item(s) of the stream of '{func_id}'")
+
+            if director_resp_json.get('status') != 'ok':
+                logger.error(f"Error while streaming '{func_id}' on the worker: {director_resp_json.get('message')}")
+                raise PyFaaSFunctionExecutionError(director_resp_json.get('message'))
+
+            if not director_resp_json.get('partial'):
+                logger.info(f"Streamed {expected_stream_seq} item(s) of '{func_id}'")
+                return
+
+            expected_stream_seq += 1
+            yield decode_func_result(director_resp_json.get('result'), director_resp_json.get('result_type'))
+    finally:
+        stream_responses.close()
+
+def pyfaas_map(func_id: str, iterable_of_args: Iterable, func_default_args_list: dict[str, object] = None, chunk_size: int = 64, save_in_cache: bool = False) -> Iterator[object]:
+    '''
+    Remotely executes the function identified by 'func_id' once for every element of 'iterable_of_args'.
+
+    The calls are sent in chunks of 'chunk_size' elements, each chunk as a single request that the Director
+    hands to one of the Workers holding the function, so that chunks are executed in parallel across the cluster.
+    Results are yielded in the same order as the provided arguments, as soon as they are available.
+
+    Args:
+        func_id (str): The ID of the function to be executed. The ID is returned at registration time by a call to pyfaas_register().
+        iterable_of_args (Iterable): The positional arguments of each call: a list/tuple of arguments, or a single value for single-parameter functions.
+        func_default_args_list (dict[str, object]): The default arguments shared by every call.
+        chunk_size (int): How many calls are sent in a single request.
+        save_in_cache (bool): Whether to save or not the results of the calls in the executing Workers' cache.
+
+    Returns:
+        Iterator[object]: An iterator over the return values of the remotely executed calls.
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSParameterMismatchError: Raised if 'chunk_size' is not a positive integer.
+        PyFaaSTimeoutError: Raised (while iterating) if a timeout is reached while waiting from the Director's response.
+        PyFaaSDeserializationError: Raised (while iterating) if any error occures while deserializing a result.
+        PyFaaSFunctionExecutionError: Raised (while iterating) if the function is not registered at any Worker or if one of the calls raises an exception.
+    '''
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    if type(chunk_size) != int or chunk_size <= 0:
+        raise PyFaaSParameterMismatchError(f"Parameters mismatch: chunk_size must be a positive integer, while {chunk_size} was provided")
+
+    if func_default_args_list is None:
+        func_default_args_list = {}
+
+    return _pyfaas_map_results(func_id, iterable_of_args, func_default_args_list, chunk_size, save_in_cache)
+
+def _pyfaas_map_results(func_id: str, iterable_of_args: Iterable, func_default_args_list: dict[str, object], chunk_size: int, save_in_cache: bool) -> Iterator[object]:
+    chunk_responses = _CLIENT_MANAGER.client.pyfaas_map(func_id, iterable_of_args, func_default_args_list, chunk_size, save_in_cache)
+    while True:
+        try:
+            director_resp_json = next(chunk_responses)
+        except StopIteration:
+            return
+        except zmq.Again:
+            raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_map()')
+
+        status = director_resp_json.get('status')
+        message = director_resp_json.get('message')
+
+        if status != 'ok':
+            logger.error(f"Error while mapping '{func_id}' on the workers: {message}")
+            raise PyFaaSFunctionExecutionError(message)
+
+        # The results of a chunk travel together: as plain JSON, or pickled in a single binary frame
+        results = decode_func_result(director_resp_json.get('result'), director_resp_json.get('result_type'))
+        logger.debug(f"Executed a chunk of {len(results)} '{func_id}' calls")
+        yield from results
+
+def pyfaas_get_client_cache_stats() -> dict:
+    '''
+    Obtains the statistics of the client-side result cache used by pyfaas_exec(..., use_client_cache=True).
+
+    Returns:
+        dict: A dict containing the cache configuration ('max_size', 'ttl_s'), its current 'size' and the 'hits', 'misses', 'evictions' and 'expirations' counters.
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+    '''
+    if not _CLIENT_MANAGER.configured or _CLIENT_MANAGER.result_cache is None:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    return _CLIENT_MANAGER.result_cache.get_stats()
+
 def pyfaas_get_worker_info(worker_id: str) -> dict:
     '''
     Obtains a dict containing information about the specified Worker.
@@ -385,13 +704,53 @@ def pyfaas_load_workflow(workflow_file_path: str) -> dict[str, dict[str, object]
         raise PyFaaSWorkflowLoadingError(f'Error while loading the workflow: {e}')
 
 # TODO: problematic if functions are scattered across multiple workers. Trivial if all workers are synchronized.
-def pyfaas_chain_exec(json_workflow: dict[str, dict[str, object]]):
+def pyfaas_chain_exec(json_workflow: dict[str, dict[str, object]], deadline_s: float = None):
+    if not _CLIENT_MANAGER.configured:
+        raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
+
+    if not json_workflow:
+        raise PyFaaSChainedExecutionError("Missing required argument 'json_workflow'")
+
+    _validate_workflow(json_workflow)
+    
+    # Calling actual pyfaas_chain_exec() function from global object
+    try:
+        director_resp_json = _CLIENT_MANAGER.client.pyfaas_chain_exec(json_workflow, deadline_s=deadline_s)
+    except zmq.Again:
+        raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_chain_exec()')
+
+    return _process_chain_exec_response(director_resp_json, json_workflow.get('id'))
+
+def pyfaas_chain_exec_async(json_workflow: dict[str, dict[str, object]], deadline_s: float = None) -> Future:
+    '''
+    Non-blocking version of pyfaas_chain_exec(): sends the workflow and immediately returns a Future.
+
+    Args:
+        json_workflow (dict[str, dict[str, object]]): The workflow to be executed.
+        deadline_s (float): If specified, the number of seconds after which the result is no longer wanted. The Worker stops
+            the workflow before the first function that would start past the deadline.
+
+    Returns:
+        Future: A concurrent.futures.Future holding the result of the last function of the workflow, or the 
+        exception pyfaas_chain_exec() would have raised (PyFaaSTimeoutError, PyFaaSChainedExecutionError).
+
+    Raises:
+        RuntimeError: Raised if PyFaaS has not been configured with a call to pyfaas_config().
+        PyFaaSChainedExecutionError: Raised if the workflow is missing.
+        PyFaaSWorkflowValidationError: Raised if the workflow is not structurally valid.
+    '''
     if not _CLIENT_MANAGER.configured:
         raise RuntimeError('Unable to execute PyFaaS operations: PyFaaS has not been configured with a call to pyfaas_config()')
 
     if not json_workflow:
         raise PyFaaSChainedExecutionError("Missing required argument 'json_workflow'")
 
+    _validate_workflow(json_workflow)
+
+    response_future = _CLIENT_MANAGER.client.pyfaas_chain_exec_async(json_workflow, deadline_s=deadline_s)
+    return _chain_future(response_future, 'pyfaas_chain_exec_async', _process_chain_exec_response, json_workflow.get('id'))
+
+def _validate_workflow(json_workflow: dict[str, dict[str, object]]) -> None:
     try:
         logger.debug('Validating workflow...')
         validate_json_workflow_structure(json_workflow)
@@ -401,25 +760,40 @@ def pyfaas_chain_exec(json_workflow: dict[str, dict[str, object]]):
     
     # If here, workflow is STRUCTURALLY valid, and can be passed to the worker
     logger.info(f'Provided workwlow is structurally valid')
-    
-    # Calling actual pyfaas_chain_exec() function from global object
-    try:
-        director_resp_json = _CLIENT_MANAGER.client.pyfaas_chain_exec(json_workflow)
-    except zmq.Again:
-        raise PyFaaSTimeoutError('Timeout while waiting for Director\'s response during a call to pyfaas_chain_exec()')
 
-    workflow_id = json_workflow.get('id')
+def _process_chain_exec_response(director_resp_json: dict, workflow_id: str) -> object:
     status = director_resp_json.get('status')
     result = director_resp_json.get('result')
     message = director_resp_json.get('message')
 
     if status == 'ok':
         logger.info(f"Chain execution completed. Yielded: '{result}'")
-        return result
+        return decode_func_result(result, director_resp_json.get('result_type'))
+    elif director_resp_json.get('action') == 'deadline_exceeded':
+        logger.error(f"Deadline exceeded while chain-executing workflow '{workflow_id}': {message}")
+        raise PyFaaSTimeoutError(message)
     else:
         logger.error(f"Error while chain-executing workflow '{workflow_id}': {message}")
         raise PyFaaSChainedExecutionError(message)
 
+def _chain_future(response_future: Future, operation: str, process_response: Callable, *args) -> Future:
+    '''
+    Returns a Future completed with process_response(<response>, *args) once 'response_future' (completed by the 
+    client's I/O thread with the raw Director response) is done.
+    '''
+    result_future = Future()
+
+    def on_response(done_future: Future) -> None:
+        try:
+            result_future.set_result(process_response(done_future.result(), *args))
+        except zmq.Again:
+            result_future.set_exception(PyFaaSTimeoutError(f'Timeout while waiting for Director\'s response during a call to {operation}()'))
+        except Exception as e:
+            result_future.set_exception(e)
+
+    response_future.add_done_callback(on_response)
+    return result_future
+
 def pyfaas_ping() -> None:
     '''
     Tests the PyFaaS cluster connectivity by sending a 'PING' message to an active Worker, and expecting a 'PONG' resonse message.
@@ -0,0 +1,373 @@
+import time
+import asyncio
+import zmq
+import zmq.asyncio
+import uuid
+import logging
+
+from typing import Callable, AsyncIterator
+from pyfaas.util.general import read_config_toml
+from pyfaas.util.serialization import decode_func_result, decode_broadcast_result, compute_function_id, build_register_batch
+from pyfaas.util.wire import encode_message, decode_message
+from pyfaas.util.codec import get_codec, DEFAULT_CODEC
+from pyfaas.util.compression import FrameCompressor
+from pyfaas.util.upload import encode_upload_fields, strip_upload_fields, build_upload_chunks, UPLOAD_WINDOW_CHUNKS
+from pyfaas.util.retry import compute_retry_backoff_s, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF_S
+from pyfaas.util.deadline import compute_deadline, deadline_to_monotonic
+from pyfaas.util.sharding import shard_endpoint, client_shard
+from pyfaas.util.client_side_workflow_validation import validate_json_workflow_structure
+from pyfaas.exceptions import *
+
+
+# Maximum number of items of a stream sent by the Worker and not consumed yet. Credits are granted back in batches of half the window
+_STREAM_WINDOW_ITEMS = 64
+
+
+class AsyncPyfaasClient:
+    '''
+    asyncio PyFaaS client.
+
+    Every request is tagged with a correlation ID ('message_id') that the Director and the Workers echo back
+    in their response. A single receiver task reads every reply from the DEALER socket and completes the
+    future of the matching pending request, so that any number of requests can be in flight at the same
+    time on a single connection.
+
+    Example:
+        client = AsyncPyfaasClient.from_config('client_config.toml')
+        results = await asyncio.gather(*(client.pyfaas_exec(func_id, [i]) for i in range(1000)))
+        client.close()
+    '''
+    def __init__(self, director_ip_addr: str, director_port: int, receive_timeout_s: int, codec: str = DEFAULT_CODEC, compression_config: dict = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_backoff_s: float = DEFAULT_RETRY_BACKOFF_S, director_endpoint: str = None, zmq_context: zmq.Context = None,
+                 director_shards: int = 1):
+        self._logger = logging.getLogger('pyfaas.async_client')
+
+        self._client_id = f'client-{uuid.uuid4()}'
+        self._director_ip_addr = director_ip_addr
+        self._director_port = director_port
+
+        self._receive_timeout_s = receive_timeout_s
+        # Requests timing out are sent again, unchanged (same message_id), after an exponential backoff
+        self._max_retries = max_retries
+        self._retry_backoff_s = retry_backoff_s
+
+        self._codec = get_codec(codec).name         # Payload codec advertised in every request, the response uses the same one
+        self._compressor = FrameCompressor(**compression_config) if compression_config else None    # Compresses large request frames
+
+        # Requests waiting for a response
+        #   - Key: message_id of the request
+        #   - Value: the asyncio.Future completed by the receiver task (an asyncio.Queue receiving every response, for streams)
+        self._pending_requests = {}
+        self._receiver_task = None
+
+        # ZeroMQ
+        # A shared context (needed by 'inproc://' endpoints, see pyfaas.local_cluster) is terminated by its owner
+        self._owns_zmq_context = zmq_context is None
+        self._zmq_context = zmq.asyncio.Context() if zmq_context is None else zmq.asyncio.Context.shadow(zmq_context)
+        self._zmq_socket = self._zmq_context.socket(zmq.DEALER)
+        self._zmq_socket.setsockopt(zmq.IDENTITY, self._client_id.encode())
+        self._zmq_socket.setsockopt(zmq.LINGER, 0)
+
+        director_connection_string = director_endpoint or f'tcp://{self._director_ip_addr}:{self._director_port}'
+        # A sharded Director routes the requests of each client on one of its shards, chosen by the identity of the client
+        director_connection_string = shard_endpoint(director_connection_string, client_shard(self._client_id, director_shards))
+        self._logger.info(f'Connecting to PyFaaS Director at {director_connection_string}...')
+        self._zmq_socket.connect(director_connection_string)
+
+    @classmethod
+    def from_config(cls, file_path: str) -> 'AsyncPyfaasClient':
+        '''
+        Builds an AsyncPyfaasClient from a client TOML configuration file (same format used by pyfaas_config()).
+
+        Raises:
+            PyFaaSConfigError: Raised if the parsing of the TOML configuration file does not go as expected / there are errors in the file.
+        '''
+        try:
+            config = read_config_toml(file_path)
+        except Exception as e:
+            raise PyFaaSConfigError(e)
+
+        return cls(
+            config['network']['director_ip_addr'],
+            config['network']['director_port'],
+            config['network']['receive_timeout_s'],
+            codec=config['network']['codec'],
+            compression_config=config['compression'],
+            max_retries=config['network']['max_retries'],
+            retry_backoff_s=config['network']['retry_backoff_s'],
+            director_shards=config['network']['director_shards']
+        )
+
+    def _build_payload(self, operation: str, extra_payload: dict = None) -> tuple[str, dict]:
+        message_id = uuid.uuid4().hex
+        payload = {
+            'requester': self._client_id,
+            'operation': operation,
+            'message_id': message_id,
+            'codec': self._codec
+        }
+
+        if extra_payload:
+            payload.update(extra_payload)
+
+        if self._receiver_task is None or self._receiver_task.done():
+            self._receiver_task = asyncio.ensure_future(self._receive_loop())
+
+        return message_id, payload
+
+    async def _send_request(self, operation: str, extra_payload: dict = None) -> dict:
+        # Large fields (see pyfaas.util.upload.UPLOADABLE_FIELDS) are first uploaded in chunks
+        upload_frames = encode_upload_fields(self._codec, operation, extra_payload)
+        if upload_frames is not None:
+            upload_id = uuid.uuid4().hex
+            upload_response = await self._upload(operation, upload_id, extra_payload.get('func_id'), upload_frames)
+            if upload_response.get('status') != 'ok':
+                return upload_response          # The failure of the upload is the outcome of the request
+            extra_payload = strip_upload_fields(operation, extra_payload, upload_id)
+
+        message_id, payload = self._build_payload(operation, extra_payload)
+        deadline_at = deadline_to_monotonic(payload.get('deadline'))       # Nobody waits for the response past the deadline, if any
+
+        response_future = asyncio.get_running_loop().create_future()
+        self._pending_requests[message_id] = response_future
+        try:
+            msg = [b'', *encode_message(payload, compressor=self._compressor)]
+            for retries in range(self._max_retries + 1):
+                if retries > 0:
+                    backoff_s = compute_retry_backoff_s(self._retry_backoff_s, retries - 1)
+                    if deadline_at is not None and time.monotonic() + backoff_s >= deadline_at:
+                        break
+                    self._logger.warning(f"Timeout on '{operation}', retry {retries}/{self._max_retries} in {backoff_s:.2f}s")
+                    await asyncio.sleep(backoff_s)
+                    if response_future.done():
+                        break           # Answered during the backoff
+                await self._zmq_socket.send_multipart(msg)      # Retries keep the message_id: the request is never executed twice
+                timeout_s = self._receive_timeout_s
+                if deadline_at is not None:
+                    timeout_s = min(timeout_s, deadline_at - time.monotonic())
+                try:
+                    return await asyncio.wait_for(asyncio.shield(response_future), timeout=timeout_s)
+                except asyncio.TimeoutError:
+                    pass
+            if response_future.done():
+                return response_future.result()
+            raise PyFaaSTimeoutError(f"Timeout while waiting for Director's response during a call to '{operation}'")
+        finally:
+            self._pending_requests.pop(message_id, None)
+
+    async def _upload(self, operation: str, upload_id: str, func_id: str | None, upload_frames: list) -> dict:
+        # Keeps up to UPLOAD_WINDOW_CHUNKS chunks unacknowledged by the Worker. Returns the final response of the Worker to the upload
+        if self._receiver_task is None or self._receiver_task.done():
+            self._receiver_task = asyncio.ensure_future(self._receive_loop())
+
+        upload_responses = asyncio.Queue()
+        self._pending_requests[upload_id] = upload_responses
+        unacknowledged_chunks = 0
+        try:
+            for chunk_payload in build_upload_chunks(self._client_id, self._codec, upload_id, func_id, upload_frames):
+                if unacknowledged_chunks == UPLOAD_WINDOW_CHUNKS:
+                    upload_response = await asyncio.wait_for(upload_responses.get(), timeout=self._receive_timeout_s)
+                    if not upload_response.get('partial'):
+                        return upload_response          # The upload failed before its end
+                    unacknowledged_chunks -= 1
+                await self._zmq_socket.send_multipart([b'', *encode_message(chunk_payload, compressor=self._compressor)])
+                unacknowledged_chunks += 1
+
+            while True:
+                upload_response = await asyncio.wait_for(upload_responses.get(), timeout=self._receive_timeout_s)
+                if not upload_response.get('partial'):
+                    return upload_response
+        except asyncio.TimeoutError:
+            raise PyFaaSTimeoutError(f"Timeout while waiting for Director's response while uploading the arguments of '{operation}'")
+        finally:
+            self._pending_requests.pop(upload_id, None)
+
+    async def _receive_loop(self) -> None:
+        while True:
+            try:
+                _, *response_frames = await self._zmq_socket.recv_multipart()
+            except (asyncio.CancelledError, zmq.ContextTerminated):
+                return
+
+            json_response = decode_message(response_frames)
+            message_id = json_response.get('message_id')
+            if json_response.get('partial'):
+                response_future = self._pending_requests.get(message_id)      # More responses will follow
+            else:
+                response_future = self._pending_requests.pop(message_id, None)
+            if isinstance(response_future, asyncio.Queue):
+                response_future.put_nowait(json_response)
+                continue
+            if response_future is None or response_future.done():
+                # The request has already timed out (or this is a duplicate reply): nobody is waiting for it
+                self._logger.debug(f"Discarding response for unknown request '{json_response.get('message_id')}'")
+                continue
+            response_future.set_result(json_response)
+
+    async def pyfaas_register(self, func_code: Callable) -> str:
+        if not func_code:
+            raise PyFaaSFunctionRegistrationError("Missing required argument 'func_code'")
+
+        import dill         # Deferred: only registration needs it, and it is slow to import
+        serialized_func = dill.dumps(func_code)
+
+        # Uploading the function code only if no Worker holds it yet
+        func_id = compute_function_id(func_code.__name__, serialized_func)
+        has_function_resp_json = await self._send_request('has_function', {'func_id': func_id})
+        if has_function_resp_json.get('status') == 'ok' and has_function_resp_json.get('result') is True:
+            return func_id
+
+        director_resp_json = await self._send_request('register', {'func_name': func_code.__name__, 'func_id': func_id, 'func_code': serialized_func})
+
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSFunctionRegistrationError(director_resp_json.get('message'))
+        return director_resp_json.get('result')
+
+    async def pyfaas_register_many(self, funcs: list[Callable]) -> dict[str, str]:
+        director_resp_json = await self._send_request('register_batch', build_register_batch(funcs))
+
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSFunctionRegistrationError(director_resp_json.get('message'))
+        return director_resp_json.get('result')
+
+    async def pyfaas_unregister(self, func_id: str) -> int:
+        if not func_id:
+            raise PyFaaSFunctionUnregistrationError("Missing required argument 'func_id'")
+
+        director_resp_json = await self._send_request('unregister', {'func_id': func_id})
+
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSFunctionUnregistrationError(director_resp_json.get('message'))
+        return 1
+
+    async def pyfaas_exec(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, hedge: bool = False, deadline_s: float = None, coalesce: bool = False, use_director_cache: bool = False) -> object:
+        if type(func_positional_args_list) != list:
+            raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list if func_default_args_list is not None else {},
+            'save_in_cache': save_in_cache,
+            'hedge': hedge,         # The Director may send a duplicate to a second Worker if the response is late
+            'coalesce': coalesce,   # The Director may answer with the response to an identical request in flight
+            'use_director_cache': use_director_cache,   # The Director may answer with a cached response to an identical request
+            'deadline': compute_deadline(deadline_s),       # Past it, the Director and the Worker drop the request
+            'additional_data': None
+        }
+        director_resp_json = await self._send_request('exec', extra_payload)
+
+        if director_resp_json.get('action') == 'deadline_exceeded':
+            raise PyFaaSTimeoutError(director_resp_json.get('message'))
+        if director_resp_json.get('action') == 'overloaded':
+            raise PyFaaSOverloadedError(director_resp_json.get('message'))
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSFunctionExecutionError(director_resp_json.get('message'))
+        return decode_func_result(director_resp_json.get('result'), director_resp_json.get('result_type'))
+
+    async def pyfaas_broadcast(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, tags: list[str] = None) -> dict[str, object]:
+        if type(func_positional_args_list) != list:
+            raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list if func_default_args_list is not None else {},
+            'save_in_cache': save_in_cache,
+            'tags': tags,
+            'additional_data': None
+        }
+        director_resp_json = await self._send_request('broadcast', extra_payload)
+
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSFunctionExecutionError(director_resp_json.get('message'))
+        return decode_broadcast_result(director_resp_json.get('result'))
+
+    async def pyfaas_exec_stream(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None) -> AsyncIterator[object]:
+        '''
+        Yields the items produced by the remotely executed function as soon as they arrive (see pyfaas_exec_stream()).
+        The receive timeout applies to the wait for each item. The Worker sends up to _STREAM_WINDOW_ITEMS items ahead of the caller.
+        '''
+        if type(func_positional_args_list) != list:
+            raise PyFaaSParameterMismatchError(f"Parameters mismatch: func_arglist must be of type 'list[object]', while {type(func_positional_args_list)} was provided")
+
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list if func_default_args_list is not None else {},
+            'stream_window': _STREAM_WINDOW_ITEMS
+        }
+        message_id, payload = self._build_payload('exec_stream', extra_payload)
+
+        stream_responses = asyncio.Queue()
+        self._pending_requests[message_id] = stream_responses
+        stream_ended = False
+        try:
+            await self._zmq_socket.send_multipart([b'', *encode_message(payload, compressor=self._compressor)])
+            expected_stream_seq = 0
+            while True:
+                try:
+                    director_resp_json = await asyncio.wait_for(stream_responses.get(), timeout=self._receive_timeout_s)
+                except asyncio.TimeoutError:
+                    raise PyFaaSTimeoutError("Timeout while waiting for Director's response during a call to 'exec_stream'")
+                stream_ended = not director_resp_json.get('partial')
+
+                stream_seq = director_resp_json.get('stream_seq', expected_stream_seq)
+                if stream_seq != expected_stream_seq:
+                    raise PyFaaSNetworkError(f"Lost {stream_seq - expected_stream_seq} item(s) of the stream of '{func_id}'")
+                if director_resp_json.get('status') != 'ok':
+                    raise PyFaaSFunctionExecutionError(director_resp_json.get('message'))
+                if stream_ended:
+                    return
+
+                expected_stream_seq += 1
+                yield decode_func_result(director_resp_json.get('result'), director_resp_json.get('result_type'))
+                if expected_stream_seq % (_STREAM_WINDOW_ITEMS // 2) == 0:
+                    await self._send_stream_credit(message_id, _STREAM_WINDOW_ITEMS // 2)
+        finally:
+            self._pending_requests.pop(message_id, None)
+            if not stream_ended:
+                await self._send_stream_credit(message_id, 0, cancel=True)      # The Worker stops producing the stream
+
+    async def _send_stream_credit(self, message_id: str, credits: int, cancel: bool = False) -> None:
+        # Flow control message of the stream started by the request identified by message_id: no response is expected
+        payload = {
+            'requester': self._client_id,
+            'operation': 'stream_credit',
+            'message_id': message_id,
+            'codec': self._codec,
+            'credits': credits,
+            'cancel': cancel
+        }
+        await self._zmq_socket.send_multipart([b'', *encode_message(payload)])
+
+    async def pyfaas_chain_exec(self, json_workflow: dict[str, dict[str, object]], deadline_s: float = None) -> object:
+        if not json_workflow:
+            raise PyFaaSChainedExecutionError("Missing required argument 'json_workflow'")
+
+        validate_json_workflow_structure(json_workflow)
+        director_resp_json = await self._send_request('chain_exec', {'json_workflow': json_workflow, 'deadline': compute_deadline(deadline_s)})
+
+        if director_resp_json.get('action') == 'deadline_exceeded':
+            raise PyFaaSTimeoutError(director_resp_json.get('message'))
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSChainedExecutionError(director_resp_json.get('message'))
+        return decode_func_result(director_resp_json.get('result'), director_resp_json.get('result_type'))
+
+    async def pyfaas_ping(self) -> str:
+        director_resp_json = await self._send_request('PING')
+
+        if director_resp_json.get('status') != 'ok':
+            raise PyFaaSPingingError(director_resp_json.get('message'))
+        return director_resp_json.get('result')
+
+    def close(self) -> None:
+        try:
+            if self._receiver_task is not None:
+                self._receiver_task.cancel()
+            self._zmq_socket.close()
+            if self._owns_zmq_context:
+                self._zmq_context.term()
+            self._logger.info('Closed PyFaaS asyncio ZeroMQ context and socket')
+        except Exception as e:
+            self._logger.warning(f'Error during PyFaaS asyncio client cleanup: {e}')
@@ -2,94 +2,314 @@ import zmq
 import uuid
 import logging
 import time
-import dill
-import base64
-import json
+import queue
+import socket
+import threading
+import collections
 
-from typing import Callable
+from concurrent.futures import Future
+from typing import Callable, Iterable, Iterator
+from pyfaas.util.serialization import compute_function_id, build_register_batch
+from pyfaas.util.wire import encode_message, decode_message
+from pyfaas.util.codec import get_codec, DEFAULT_CODEC
+from pyfaas.util.compression import FrameCompressor
+from pyfaas.util.upload import encode_upload_fields, strip_upload_fields, build_upload_chunks, UPLOAD_WINDOW_CHUNKS
+from pyfaas.util.retry import compute_retry_backoff_s, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF_S
+from pyfaas.util.deadline import compute_deadline, deadline_to_monotonic
+from pyfaas.util.sharding import shard_endpoint, client_shard
+
+# Maximum number of 'map' chunks waiting for a response at any given time
+_MAP_MAX_IN_FLIGHT_CHUNKS = 16
+
+# Maximum number of items of a stream sent by the Worker and not consumed yet. Credits are granted back in batches of half the window
+_STREAM_WINDOW_ITEMS = 64
 
 
 class PyfaasClient:
-    def __init__(self, director_ip_addr: str, director_port: int, receive_timeout_s: int):
+    def __init__(self, director_ip_addr: str, director_port: int, receive_timeout_s: int, codec: str = DEFAULT_CODEC, compression_config: dict = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, retry_backoff_s: float = DEFAULT_RETRY_BACKOFF_S, director_endpoint: str = None, zmq_context: zmq.Context = None,
+                 director_shards: int = 1):
         self._logger = logging.getLogger('pyfaas.client')
 
         self._client_id = f'client-{uuid.uuid4()}'
         self._director_ip_addr = director_ip_addr
         self._director_port = director_port
 
-        self._receive_timeout_ms = receive_timeout_s * 1000
+        self._receive_timeout_s = receive_timeout_s
+        # Requests timing out are sent again, unchanged (same message_id), after an exponential backoff
+        self._max_retries = max_retries
+        self._retry_backoff_s = retry_backoff_s
+
+        self._codec = get_codec(codec).name         # Payload codec advertised in every request, the response uses the same one
+        self._compressor = FrameCompressor(**compression_config) if compression_config else None    # Compresses large request frames
+
+        # Requests waiting for a response, completed by the I/O thread
+        #   - Key: message_id of the request
+        #   - Value: [Future (or queue.Queue, for streams), expiration timestamp, message to send again on timeout (None: no retries), retries done,
+        #             deadline of the request on the monotonic clock (None: no deadline)]
+        self._pending_requests = {}
+        self._pending_requests_lock = threading.Lock()
+        # Retries waiting for their backoff to elapse, as (send timestamp, message_id). Used by the I/O thread only
+        self._scheduled_retries = []
 
         # ZeroMQ
-        self._zmq_context = zmq.Context()
+        # The socket is owned by the I/O thread only: ZeroMQ sockets are not thread-safe
+        # A shared context (needed by 'inproc://' endpoints, see pyfaas.local_cluster) is terminated by its owner
+        self._owns_zmq_context = zmq_context is None
+        self._zmq_context = zmq_context if zmq_context is not None else zmq.Context()
         self._zmq_socket = self._zmq_context.socket(zmq.DEALER)
         self._zmq_socket.setsockopt(zmq.IDENTITY, self._client_id.encode())
-        self._zmq_socket.setsockopt(zmq.RCVTIMEO, self._receive_timeout_ms)
         self._zmq_socket.setsockopt(zmq.LINGER, 0)
 
-        director_connection_string = f'tcp://{self._director_ip_addr}:{self._director_port}'
+        director_connection_string = director_endpoint or f'tcp://{self._director_ip_addr}:{self._director_port}'
+        # A sharded Director routes the requests of each client on one of its shards, chosen by the identity of the client
+        director_connection_string = shard_endpoint(director_connection_string, client_shard(self._client_id, director_shards))
         self._logger.info(f'Connecting to PyFaaS Director at {director_connection_string}...')
         self._zmq_socket.connect(director_connection_string)
 
-    def _send_request(self, operation: str, extra_payload: dict = None) -> dict:
+        self._outgoing_tx_queue = queue.Queue()         # Queue of messages to send to the Director
+        # Writing a byte to the wakeup socket pair wakes the I/O thread up as soon as a message is queued
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._threading_stop_event = threading.Event()
+        self._io_thread = threading.Thread(             # Dedicated ZMQ I/O thread
+            target=self._socket_loop,
+            daemon=True
+        )
+        self._io_thread.start()
+
+    # ZMQ socket loop (single thread)
+    def _socket_loop(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self._zmq_socket, zmq.POLLIN)
+        poller.register(self._wakeup_receiver, zmq.POLLIN)
+
+        while not self._threading_stop_event.is_set():
+            sockets = dict(poller.poll(timeout=100))
+
+            # --- Outgoing messages handler ---
+            if self._wakeup_receiver.fileno() in sockets:
+                try:
+                    self._wakeup_receiver.recv(4096)
+                except BlockingIOError:
+                    pass
+            while True:
+                try:
+                    outgoing_msg = self._outgoing_tx_queue.get_nowait()
+                    self._zmq_socket.send_multipart(outgoing_msg)
+                except queue.Empty:
+                    break           # Send until empty queue
+
+            # --- Incoming messages handler ---
+            while self._zmq_socket.poll(0, zmq.POLLIN):
+                _, *response_frames = self._zmq_socket.recv_multipart()      # Receiving [empty][header][payload][binary frames]
+                json_response = decode_message(response_frames)
+                message_id = json_response.get('message_id')
+                with self._pending_requests_lock:
+                    if json_response.get('partial'):
+                        # More responses will follow: the request stays pending and its timeout restarts
+                        pending_request = self._pending_requests.get(message_id)
+                        if pending_request is not None:
+                            pending_request[1] = self._expiration(time.monotonic() + self._receive_timeout_s, pending_request[4])
+                    else:
+                        pending_request = self._pending_requests.pop(message_id, None)
+                if pending_request is None:
+                    # The request has already timed out (or this is a duplicate reply): nobody is waiting for it
+                    self._logger.debug(f"Discarding response for unknown request '{message_id}'")
+                    continue
+                self._complete_request(pending_request[0], json_response)
+
+            # --- Expired requests handler ---
+            now = time.monotonic()
+            expired_requests = []
+            with self._pending_requests_lock:
+                for message_id, pending_request in list(self._pending_requests.items()):
+                    if pending_request[1] > now:
+                        continue
+                    _, _, msg, retries, deadline_at = pending_request
+                    backoff_s = compute_retry_backoff_s(self._retry_backoff_s, retries)
+                    if msg is None or retries >= self._max_retries or (deadline_at is not None and now + backoff_s >= deadline_at):
+                        expired_requests.append(self._pending_requests.pop(message_id))
+                        continue
+                    # The request is sent again once the backoff elapses, and waits for a whole receive timeout from then on
+                    pending_request[1] = self._expiration(now + backoff_s + self._receive_timeout_s, deadline_at)
+                    pending_request[3] = retries + 1
+                    self._scheduled_retries.append((now + backoff_s, message_id))
+                    self._logger.warning(f"Timeout on request '{message_id}', retry {retries + 1}/{self._max_retries} in {backoff_s:.2f}s")
+            for response_handler, *_ in expired_requests:
+                self._complete_request(response_handler, zmq.Again())
+
+            # --- Retries handler ---
+            due_retries = [message_id for send_at, message_id in self._scheduled_retries if send_at <= now]
+            if due_retries:
+                self._scheduled_retries = [(send_at, message_id) for send_at, message_id in self._scheduled_retries if send_at > now]
+                for message_id in due_retries:
+                    with self._pending_requests_lock:
+                        pending_request = self._pending_requests.get(message_id)
+                    if pending_request is not None:         # Not answered in the meantime
+                        self._zmq_socket.send_multipart(pending_request[2])
+
+    def _expiration(self, expires_at: float, deadline_at: float | None) -> float:
+        # Nobody waits for the response of a request past its deadline, whatever the receive timeout
+        return expires_at if deadline_at is None else min(expires_at, deadline_at)
+
+    def _complete_request(self, response_handler: Future | queue.Queue, outcome: dict | Exception) -> None:
+        # Futures receive the single response of a request, queues receive every response of a stream
+        if isinstance(response_handler, queue.Queue):
+            response_handler.put(outcome)
+        elif isinstance(outcome, Exception):
+            response_handler.set_exception(outcome)
+        else:
+            response_handler.set_result(outcome)
+
+    def _submit_request(self, operation: str, extra_payload: dict = None) -> Future:
+        '''
+        Hands a request to the I/O thread without waiting for its response.
+        Large fields (see pyfaas.util.upload.UPLOADABLE_FIELDS) are first uploaded in chunks, by a helper thread.
+
+        Returns:
+            Future: Completed with the response dict, or with a zmq.Again exception if no response arrives within the receive timeout, retries included
+                (or before the deadline of the request, if any).
+
+        Raises:
+            TypeError: Raised if the fields to upload cannot be serialized by the codec of the client.
+        '''
+        upload_frames = encode_upload_fields(self._codec, operation, extra_payload)
+        if upload_frames is not None:
+            response_future = Future()
+            threading.Thread(
+                target=self._upload_and_submit_request,
+                args=(operation, extra_payload, upload_frames, response_future),
+                daemon=True
+            ).start()
+            return response_future
+
+        message_id, msg = self._build_request(operation, extra_payload)
+        response_future = Future()
+        self._enqueue_request(message_id, msg, response_future, (extra_payload or {}).get('deadline'))
+        return response_future
+
+    def _upload_and_submit_request(self, operation: str, extra_payload: dict, upload_frames: list, response_future: Future) -> None:
+        try:
+            upload_id = uuid.uuid4().hex
+            upload_response = self._upload(upload_id, extra_payload.get('func_id'), upload_frames)
+            if upload_response.get('status') != 'ok':
+                response_future.set_result(upload_response)     # The failure of the upload is the outcome of the request
+                return
+
+            request_payload = strip_upload_fields(operation, extra_payload, upload_id)
+            response_future.set_result(self._submit_request(operation, request_payload).result())
+        except Exception as e:
+            response_future.set_exception(e)
+
+    def _upload(self, upload_id: str, func_id: str | None, upload_frames: list) -> dict:
+        '''
+        Uploads the frames in chunks of UPLOAD_CHUNK_BYTES bytes, keeping up to UPLOAD_WINDOW_CHUNKS chunks unacknowledged,
+        so that a large upload neither floods the Director nor holds its socket for a long time.
+
+        Returns:
+            dict: The final response of the Worker to the upload.
+
+        Raises:
+            zmq.Again: Raised if the receive timeout elapses between two responses of the Worker.
+        '''
+        upload_responses = queue.Queue()
+        unacknowledged_chunks = 0
+        try:
+            for chunk_index, chunk_payload in enumerate(build_upload_chunks(self._client_id, self._codec, upload_id, func_id, upload_frames)):
+                if unacknowledged_chunks == UPLOAD_WINDOW_CHUNKS:
+                    upload_response = self._next_upload_response(upload_responses)
+                    if not upload_response.get('partial'):
+                        return upload_response          # The upload failed before its end
+                    unacknowledged_chunks -= 1
+
+                msg = [b'', *encode_message(chunk_payload, compressor=self._compressor)]
+                if chunk_index == 0:
+                    self._enqueue_request(upload_id, msg, upload_responses)
+                else:
+                    self._enqueue_message(msg)
+                unacknowledged_chunks += 1
+
+            while True:
+                upload_response = self._next_upload_response(upload_responses)
+                if not upload_response.get('partial'):
+                    return upload_response
+        finally:
+            with self._pending_requests_lock:
+                self._pending_requests.pop(upload_id, None)
+
+    def _next_upload_response(self, upload_responses: queue.Queue) -> dict:
+        upload_response = upload_responses.get()
+        if isinstance(upload_response, Exception):
+            raise upload_response
+        return upload_response
+
+    def _build_request(self, operation: str, extra_payload: dict = None) -> tuple[str, list[bytes]]:
+        message_id = uuid.uuid4().hex
         payload = {
             'requester': self._client_id,
-            'operation': operation
+            'operation': operation,
+            'message_id': message_id,       # Correlation ID, echoed back by the Director/Workers in the response
+            'codec': self._codec
         }
 
         if extra_payload:
             payload.update(extra_payload)
 
-        msg = [b'', json.dumps(payload).encode()]
-        self._zmq_socket.send_multipart(msg)
+        msg = [b'', *encode_message(payload, compressor=self._compressor)]
+        return message_id, msg
 
-        try:
-            _, response = self._zmq_socket.recv_multipart()
-        except zmq.Again:               
-            # TODO: here it retries automatically after 
-            # timeout without backoff or safety -> may double send, potential double execution on worker 
-            self._recreate_socket()
-            self._logger.warning(f"Timeout on '{operation}', retrying once...")
-            self._zmq_socket.send_multipart(msg)
-            _, response = self._zmq_socket.recv_multipart()
-        
-        return json.loads(response.decode())
-    
-    def _recreate_socket(self) -> None:
-        try:
-            self._logger.warning('Recreating ZeroMQ socket due to timeout or connection issue...')
-
-            if self._zmq_socket and not self._zmq_socket.closed:
-                self._zmq_socket.close(linger=0)        # Closing existing socket immediately
-            
-            # Creating a new DEALER socket
-            self._zmq_socket = self._zmq_context.socket(zmq.DEALER)
-            self._zmq_socket.setsockopt(zmq.IDENTITY, self._client_id.encode())
-            self._zmq_socket.setsockopt(zmq.RCVTIMEO, self._receive_timeout_ms)
-            self._zmq_socket.setsockopt(zmq.LINGER, 0)
+    def _enqueue_request(self, message_id: str, msg: list[bytes], response_handler: Future | queue.Queue, deadline: float = None) -> None:
+        # Requests expecting a single response are retried on timeout. Streams and uploads, made of many messages, are not
+        retry_msg = msg if isinstance(response_handler, Future) else None
+        deadline_at = deadline_to_monotonic(deadline)
+        with self._pending_requests_lock:
+            self._pending_requests[message_id] = [response_handler, self._expiration(time.monotonic() + self._receive_timeout_s, deadline_at), retry_msg, 0, deadline_at]
+        self._enqueue_message(msg)
 
-            connection_str = f"tcp://{self._director_ip_addr}:{self._director_port}"
-            self._zmq_socket.connect(connection_str)
+    def _enqueue_message(self, msg: list[bytes]) -> None:
+        self._outgoing_tx_queue.put(msg)
+        self._wakeup_sender.send(b'\x00')
 
-            self._logger.info(f'Successfully recreated DEALER socket and reconnected to Director at {connection_str}')
-        except Exception as e:
-            self._logger.error(f'Failed to recreate ZeroMQ socket: {e}')
-            raise
+    def _send_request(self, operation: str, extra_payload: dict = None) -> dict:
+        # Raises zmq.Again once every retry has timed out
+        return self._submit_request(operation, extra_payload).result()
 
     def pyfaas_register(self, func_code: Callable) -> dict:
+        import dill         # Deferred: only registration needs it, and it is slow to import
+
         # Function serialization
         encoding_start = time.time()
         serialized_func = dill.dumps(func_code)
-        serialized_func_base64 = base64.b64encode(serialized_func).decode('utf-8')
-        self._logger.debug(f'Base64-encoded function: {serialized_func_base64}')
         encoding_end = time.time()
         self._logger.debug(f'Function encoding took {encoding_end - encoding_start} s')
 
+        # Probing the cluster first: the (possibly large) function code is uploaded only if no Worker holds it yet
+        func_name = func_code.__name__
+        func_id = compute_function_id(func_name, serialized_func)
+        has_function_resp_json = self._send_request('has_function', {'func_id': func_id})
+        if has_function_resp_json.get('status') == 'ok' and has_function_resp_json.get('result') is True:
+            self._logger.debug(f"Function '{func_name}' ({func_id}) is already held by the cluster, skipping its upload")
+            return {
+                'status': 'ok',
+                'action': 'no_action',
+                'result': func_id,
+                'message': f"Function '{func_name}' is already registered"
+            }
+
         extra_payload = {    # To be sent to director, will be forwarded by it to an active worker
-            'serialized_func_base64': serialized_func_base64,
+            'func_name': func_name,
+            'func_id': func_id,                 # Read by the Director from the header: the function code is never decoded to route the request
+            'func_code': serialized_func,       # Travels as a raw binary frame
         }
 
         return self._send_request('register', extra_payload)
 
+    def pyfaas_register_many(self, funcs: list[Callable]) -> dict:
+        # A single 'register_batch' round trip, instead of a probe and a registration per function
+        extra_payload = build_register_batch(funcs)     # To be sent to director, will be forwarded by it to a single worker
+        return self._send_request('register_batch', extra_payload)
+
     def pyfaas_unregister(self, func_id: str) -> dict:
         extra_payload = {    # To be sent to director, will be forwarded by it to an active worker
             'func_id': func_id
@@ -105,18 +325,135 @@ class PyfaasClient:
     def pyfaas_list(self) -> dict:
         return self._send_request('list')
 
-    def pyfaas_exec(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False) -> dict:
+    def pyfaas_exec(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, hedge: bool = False, deadline_s: float = None, coalesce: bool = False, use_director_cache: bool = False) -> dict:
         # self._logger.debug(f'Called pyfaas_exec. Args: {func_id, func_positional_args_list, func_default_args_list}, save_in_cache={save_in_cache}')
         extra_payload = {
             'func_id': func_id,
             'positional_args': func_positional_args_list,
             'default_args': func_default_args_list,
             'save_in_cache': save_in_cache,
+            'hedge': hedge,         # The Director may send a duplicate to a second Worker if the response is late
+            'coalesce': coalesce,   # The Director may answer with the response to an identical request in flight
+            'use_director_cache': use_director_cache,   # The Director may answer with a cached response to an identical request
+            'deadline': compute_deadline(deadline_s),       # Past it, the Director and the Worker drop the request
             'additional_data': None
         }
 
         return self._send_request('exec', extra_payload)
 
+    def pyfaas_exec_async(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, hedge: bool = False, deadline_s: float = None, coalesce: bool = False, use_director_cache: bool = False) -> Future:
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list,
+            'save_in_cache': save_in_cache,
+            'hedge': hedge,
+            'coalesce': coalesce,
+            'use_director_cache': use_director_cache,
+            'deadline': compute_deadline(deadline_s),
+            'additional_data': None
+        }
+
+        return self._submit_request('exec', extra_payload)
+
+    def pyfaas_broadcast(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None, save_in_cache: bool = False, tags: list[str] = None) -> dict:
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list,
+            'save_in_cache': save_in_cache,
+            'tags': tags,           # Only the Workers having all of these tags execute the function
+            'additional_data': None
+        }
+
+        return self._send_request('broadcast', extra_payload)
+
+    def pyfaas_exec_stream(self, func_id: str, func_positional_args_list: list[object], func_default_args_list: dict[str, object] = None) -> Iterator[dict]:
+        '''
+        Sends an 'exec_stream' request and yields the responses to it as they arrive: a partial response for each item
+        produced by the function, then a last response closing the stream (or reporting an error).
+        Raises zmq.Again if the receive timeout elapses between two responses.
+
+        The Worker sends up to _STREAM_WINDOW_ITEMS items ahead of the caller, new credits being granted as the caller consumes them.
+        '''
+        extra_payload = {
+            'func_id': func_id,
+            'positional_args': func_positional_args_list,
+            'default_args': func_default_args_list,
+            'stream_window': _STREAM_WINDOW_ITEMS
+        }
+        message_id, msg = self._build_request('exec_stream', extra_payload)
+        stream_responses = queue.Queue()
+        self._enqueue_request(message_id, msg, stream_responses)
+        stream_ended = False
+        consumed_items = 0
+        try:
+            while True:
+                response = stream_responses.get()
+                if isinstance(response, Exception):
+                    stream_ended = True
+                    raise response
+                stream_ended = not response.get('partial')
+                yield response
+                if stream_ended:
+                    return
+
+                consumed_items += 1
+                if consumed_items == _STREAM_WINDOW_ITEMS // 2:
+                    self._send_stream_credit(message_id, consumed_items)
+                    consumed_items = 0
+        finally:
+            # The caller may stop iterating early: the responses still to come are discarded by the I/O thread
+            with self._pending_requests_lock:
+                self._pending_requests.pop(message_id, None)
+            if not stream_ended:
+                self._send_stream_credit(message_id, 0, cancel=True)      # The Worker stops producing the stream
+
+    def _send_stream_credit(self, message_id: str, credits: int, cancel: bool = False) -> None:
+        # Flow control message of the stream started by the request identified by message_id: no response is expected
+        payload = {
+            'requester': self._client_id,
+            'operation': 'stream_credit',
+            'message_id': message_id,
+            'codec': self._codec,
+            'credits': credits,
+            'cancel': cancel
+        }
+        self._enqueue_message([b'', *encode_message(payload)])
+
+    def pyfaas_map(self, func_id: str, iterable_of_args: Iterable, func_default_args_list: dict[str, object] = None, chunk_size: int = 64, save_in_cache: bool = False) -> Iterator[dict]:
+        '''
+        Sends the argument tuples in 'iterable_of_args' in chunks of 'chunk_size' elements, as 'map' requests,
+        keeping up to _MAP_MAX_IN_FLIGHT_CHUNKS chunks in flight. Yields the response to each chunk, in chunk order.
+        '''
+        args_chunks = self._chunk_args(iterable_of_args, chunk_size)
+        in_flight_chunks = collections.deque()        # Response futures, in chunk order
+
+        for args_chunk in args_chunks:
+            extra_payload = {
+                'func_id': func_id,
+                'args_chunk': args_chunk,
+                'default_args': func_default_args_list,
+                'save_in_cache': save_in_cache
+            }
+            in_flight_chunks.append(self._submit_request('map', extra_payload))
+            if len(in_flight_chunks) == _MAP_MAX_IN_FLIGHT_CHUNKS:
+                yield in_flight_chunks.popleft().result()       # Raises zmq.Again on timeout
+
+        while in_flight_chunks:
+            yield in_flight_chunks.popleft().result()
+
+    def _chunk_args(self, iterable_of_args: Iterable, chunk_size: int) -> Iterator[list[list[object]]]:
+        args_chunk = []
+        for args in iterable_of_args:
+            # Each element is the tuple of positional arguments of one call. Single values are wrapped
+            args_chunk.append(list(args) if isinstance(args, (list, tuple)) else [args])
+            if len(args_chunk) == chunk_size:
+                yield args_chunk
+                args_chunk = []
+        if args_chunk:
+            yield args_chunk
+
     def pyfaas_get_worker_info(self, worker_id: str) -> dict:
         extra_payload = {
             'worker_id': worker_id
@@ -129,11 +466,19 @@ class PyfaasClient:
         }
         return self._send_request('get_cache_dump', extra_payload)
 
-    def pyfaas_chain_exec(self, json_workflow: dict[str, dict[str, object]]) -> dict:
+    def pyfaas_chain_exec(self, json_workflow: dict[str, dict[str, object]], deadline_s: float = None) -> dict:
         extra_payload = {
-            'json_workflow': json_workflow
+            'json_workflow': json_workflow,
+            'deadline': compute_deadline(deadline_s)
         }
         return self._send_request('chain_exec', extra_payload)
+
+    def pyfaas_chain_exec_async(self, json_workflow: dict[str, dict[str, object]], deadline_s: float = None) -> Future:
+        extra_payload = {
+            'json_workflow': json_workflow,
+            'deadline': compute_deadline(deadline_s)
+        }
+        return self._submit_request('chain_exec', extra_payload)
     
     def pyfaas_get_worker_ids(self) -> dict:
         return self._send_request('get_worker_ids')
@@ -143,8 +488,22 @@ class PyfaasClient:
 
     def zmq_close(self) -> None:
         try:
+            self._threading_stop_event.set()        # Signaling I/O thread to stop
+            self._wakeup_sender.send(b'\x00')
+            self._io_thread.join(timeout=2)
+            self._wakeup_sender.close()
+            self._wakeup_receiver.close()
+
+            # Nobody will ever complete the requests still waiting for a response
+            with self._pending_requests_lock:
+                pending_requests = list(self._pending_requests.values())
+                self._pending_requests.clear()
+            for response_handler, *_ in pending_requests:
+                self._complete_request(response_handler, zmq.ContextTerminated())
+
             self._zmq_socket.close()
-            self._zmq_context.term()
+            if self._owns_zmq_context:
+                self._zmq_context.term()
             self._logger.info('Closed PyFaaS ZeroMQ context and socket')
         except Exception as e:
             self._logger.warning(f'Error during PyFaaS client cleanup: {e}')
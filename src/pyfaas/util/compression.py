@@ -0,0 +1,60 @@
+import zlib
+import lzma
+
+
+COMPRESSION_ALGORITHMS = ['none', 'zlib', 'lzma']
+
+
+class FrameCompressor:
+    '''
+    Threshold-based compression of the frames of a message (wire format version 2).
+
+    Only frames of at least threshold_bytes bytes are compressed, and only if compression actually shrinks them.
+    The header of the message lists the compressed frames, so that receivers decompress only those.
+    '''
+    def __init__(self, algorithm: str = 'none', level: int = 6, threshold_bytes: int = 65536):
+        if algorithm not in COMPRESSION_ALGORITHMS:
+            raise ValueError(f"Unsupported compression algorithm '{algorithm}'. Available algorithms: {COMPRESSION_ALGORITHMS}")
+        self.algorithm = algorithm
+        self.level = level                      # 0-9, both for zlib (compression level) and lzma (preset)
+        self.threshold_bytes = threshold_bytes
+
+    def compress_frames(self, frames: list) -> tuple[list, list[int]]:
+        '''
+        Returns:
+            tuple[list, list[int]]: The frames, some of them compressed, and the indexes of the compressed ones.
+        '''
+        if self.algorithm == 'none':
+            return frames, []
+
+        compressed_frames = []
+        compressed_indexes = []
+        for i, frame in enumerate(frames):
+            frame_size = memoryview(frame).nbytes
+            if frame_size >= self.threshold_bytes:
+                compressed_frame = _compress(self.algorithm, self.level, frame)
+                if len(compressed_frame) < frame_size:
+                    compressed_frames.append(compressed_frame)
+                    compressed_indexes.append(i)
+                    continue
+            compressed_frames.append(frame)         # Small or incompressible (e.g.: already compressed data): sent as it is
+        return compressed_frames, compressed_indexes
+
+
+def decompress_frames(algorithm: str, frames: list, compressed_indexes: list[int]) -> list:
+    frames = list(frames)
+    for i in compressed_indexes:
+        frames[i] = _decompress(algorithm, frames[i])
+    return frames
+
+
+def _compress(algorithm: str, level: int, frame) -> bytes:
+    if algorithm == 'zlib':
+        return zlib.compress(frame, level)
+    return lzma.compress(frame, preset=level)
+
+
+def _decompress(algorithm: str, frame) -> bytes:
+    if algorithm == 'zlib':
+        return zlib.decompress(frame)
+    return lzma.decompress(frame)
@@ -0,0 +1,28 @@
+import time
+
+from pyfaas.exceptions import PyFaaSParameterMismatchError
+
+
+# Requests may carry a deadline: the wall-clock timestamp (seconds since the epoch) after which their response is useless.
+# It travels in the header of the request, so that the Director drops the requests that expired before being forwarded
+# and the Workers skip (or stop, between the steps of a workflow) the work that nobody is waiting for any more.
+# Being a wall-clock timestamp, it assumes the clocks of the hosts of the cluster to be synchronized (e.g.: NTP).
+
+
+def compute_deadline(deadline_s: float | None) -> float | None:
+    '''
+    Raises:
+        PyFaaSParameterMismatchError: Raised if deadline_s is not a positive number of seconds.
+    '''
+    if deadline_s is None:
+        return None
+    if deadline_s <= 0:
+        raise PyFaaSParameterMismatchError(f"'deadline_s' must be a positive number of seconds, while {deadline_s} was provided")
+    return time.time() + deadline_s
+
+
+def deadline_to_monotonic(deadline: float | None) -> float | None:
+    # The same instant on the monotonic clock, used to time out the wait for the response
+    if deadline is None:
+        return None
+    return time.monotonic() + (deadline - time.time())
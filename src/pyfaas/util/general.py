@@ -2,6 +2,10 @@ import logging
 import tomli
 import socket
 
+from pyfaas.util.codec import available_codecs, DEFAULT_CODEC
+from pyfaas.util.compression import COMPRESSION_ALGORITHMS
+from pyfaas.util.retry import DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF_S
+
 
 def read_config_toml(path: str) -> dict:
     with open(path, mode='rb') as fp:
@@ -23,6 +27,45 @@ def read_config_toml(path: str) -> dict:
     if config['network']['receive_timeout_s'] < 0:
         raise Exception(f"Config error: invalid value {config['network']['receive_timeout_s']} for field 'receive_timeout_s'")
 
+    # Checking payload codec field (optional, JSON if missing)
+    config['network'].setdefault('codec', DEFAULT_CODEC)
+    if config['network']['codec'] not in available_codecs():
+        raise Exception(f"Config error: unsupported codec '{config['network']['codec']}'. Available codecs: {available_codecs()}")
+
+    # Checking retry fields (optional, DEFAULT_MAX_RETRIES retries starting from a DEFAULT_RETRY_BACKOFF_S seconds wait if missing)
+    config['network'].setdefault('max_retries', DEFAULT_MAX_RETRIES)
+    config['network'].setdefault('retry_backoff_s', DEFAULT_RETRY_BACKOFF_S)
+    if type(config['network']['max_retries']) != int or config['network']['max_retries'] < 0:
+        raise Exception(f"Config error: invalid value {config['network']['max_retries']} for field 'max_retries'")
+    if type(config['network']['retry_backoff_s']) not in (int, float) or config['network']['retry_backoff_s'] < 0:
+        raise Exception(f"Config error: invalid value {config['network']['retry_backoff_s']} for field 'retry_backoff_s'")
+
+    # Checking number of Director shards (optional, a single Director process if missing)
+    config['network'].setdefault('director_shards', 1)
+    if type(config['network']['director_shards']) != int or config['network']['director_shards'] < 1:
+        raise Exception(f"Config error: invalid value {config['network']['director_shards']} for field 'director_shards'")
+
+    # Checking compression fields (optional section, compression is disabled if missing)
+    compression_config = config.setdefault('compression', {})
+    compression_config.setdefault('algorithm', 'none')
+    compression_config.setdefault('level', 6)
+    compression_config.setdefault('threshold_bytes', 65536)
+    if compression_config['algorithm'] not in COMPRESSION_ALGORITHMS:
+        raise Exception(f"Config error: unsupported compression algorithm '{compression_config['algorithm']}'. Available algorithms: {COMPRESSION_ALGORITHMS}")
+    if type(compression_config['level']) != int or not 0 <= compression_config['level'] <= 9:
+        raise Exception(f"Config error: invalid value {compression_config['level']} for field 'level'. An integer between 0 and 9 is needed")
+    if type(compression_config['threshold_bytes']) != int or compression_config['threshold_bytes'] < 0:
+        raise Exception(f"Config error: invalid value {compression_config['threshold_bytes']} for field 'threshold_bytes'")
+
+    # Checking client-side result caching fields (optional section, caching is disabled if missing)
+    caching_config = config.setdefault('caching', {})
+    caching_config.setdefault('max_size', 0)
+    caching_config.setdefault('ttl_s', 0)
+    if type(caching_config['max_size']) != int or caching_config['max_size'] < 0:
+        raise Exception(f"Config error: invalid value {caching_config['max_size']} for field 'max_size'")
+    if type(caching_config['ttl_s']) not in (int, float) or caching_config['ttl_s'] < 0:
+        raise Exception(f"Config error: invalid value {caching_config['ttl_s']} for field 'ttl_s'")
+
     return config
 
 def setup_logging(log_level: str) -> None:
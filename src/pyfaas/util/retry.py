@@ -0,0 +1,18 @@
+import random
+
+
+# Requests that got no response within the receive timeout are sent again, with the same message_id, up to this many times.
+# Workers (and the Director) recognize a repeated message_id: a retry never executes a function twice
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF_S = 0.5
+# Upper bound of the wait before a retry, whatever the attempt
+MAX_RETRY_BACKOFF_S = 10
+
+
+def compute_retry_backoff_s(retry_backoff_s: float, attempt: int) -> float:
+    '''
+    Exponential backoff with jitter: the wait before the attempt-th retry (0-based) doubles at every attempt,
+    and is randomly shortened by up to a half so that the clients timed out together do not retry together.
+    '''
+    backoff_s = min(retry_backoff_s * 2 ** attempt, MAX_RETRY_BACKOFF_S)
+    return backoff_s * random.uniform(0.5, 1)
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+
+from typing import Callable
+from pyfaas.exceptions import PyFaaSDeserializationError, PyFaaSFunctionExecutionError, PyFaaSParameterMismatchError
+from pyfaas.util.wire import decode_message
+
+
+def decode_func_result(result: object, result_type: str) -> object:
+    '''
+    Decodes the result of a remotely executed function, as sent back by the executing Worker.
+
+    Args:
+        result (object): The 'result' field of the Worker's response (raw bytes if the result has been pickled).
+        result_type (str): The 'result_type' field of the Worker's response.
+
+    Returns:
+        object: The plain JSON result, or the deserialized object if the Worker had to pickle it.
+
+    Raises:
+        PyFaaSDeserializationError: Raised if the pickled result cannot be deserialized.
+    '''
+    if result_type in ('pickle', 'pickle_base64'):
+        import dill         # Deferred: only pickled results need it, and it is slow to import
+        try:
+            result_bytes = result if result_type == 'pickle' else base64.b64decode(result)
+            return dill.loads(result_bytes)
+        except Exception as e:
+            raise PyFaaSDeserializationError(f'Failed to deserialize worker result: {e}')
+    return result
+
+
+def decode_broadcast_result(result: dict[str, dict]) -> dict[str, object]:
+    '''
+    Decodes the result of a 'broadcast' request, as gathered by the Director from the executing Workers.
+
+    Args:
+        result (dict[str, dict]): The 'result' field of the Director's response: the outcome on each Worker, by Worker ID.
+            Either the Worker's response, forwarded undecoded by the Director as {'frames': its base64-encoded frames},
+            or an error detected by the Director ({'status': 'err', 'message': ...}).
+
+    Returns:
+        dict[str, object]: The return value of the function on each Worker, by Worker ID. Workers that failed are mapped
+            to the exception describing the failure (PyFaaSFunctionExecutionError or PyFaaSDeserializationError).
+    '''
+    worker_results = {}
+    for worker_id, worker_response in result.items():
+        if 'frames' in worker_response:
+            try:
+                worker_response = decode_message([base64.b64decode(frame) for frame in worker_response['frames']])
+            except Exception as e:
+                worker_results[worker_id] = PyFaaSDeserializationError(f'Failed to decode the response of the worker: {e}')
+                continue
+        if worker_response.get('status') != 'ok':
+            worker_results[worker_id] = PyFaaSFunctionExecutionError(worker_response.get('message'))
+            continue
+        try:
+            worker_results[worker_id] = decode_func_result(worker_response.get('result'), worker_response.get('result_type'))
+        except PyFaaSDeserializationError as e:
+            worker_results[worker_id] = e
+    return worker_results
+
+
+def compute_function_id(func_name: str, serialized_func: bytes) -> str:
+    '''
+    Computes the ID of a function as the Director does upon its registration, i.e. SHA256(func_name:func_code),
+    func_code being the base64 representation of the dill-serialized function.
+
+    Args:
+        func_name (str): The name of the function.
+        serialized_func (bytes): The dill-serialized function code.
+
+    Returns:
+        str: The ID of the function.
+    '''
+    serialized_func_base64 = base64.b64encode(serialized_func).decode('utf-8')
+    return hashlib.sha256(f"{func_name}:{serialized_func_base64}".encode()).hexdigest()
+
+
+def build_register_batch(funcs: list[Callable]) -> dict:
+    '''
+    Serializes the functions of a 'register_batch' request.
+    The dill-serialized functions are concatenated into a single binary field ('func_codes'), each one being described,
+    in order, by its name and size ('functions'), so that the batch travels as one message of three frames at most.
+
+    Args:
+        funcs (list[Callable]): The functions to register. The same function may appear more than once.
+
+    Returns:
+        dict: The 'functions' and 'func_codes' fields of the request.
+
+    Raises:
+        PyFaaSParameterMismatchError: Raised if no functions are given, or two different functions share the same name.
+    '''
+    import dill         # Deferred: only registration needs it, and it is slow to import
+
+    if not funcs:
+        raise PyFaaSParameterMismatchError("Parameters mismatch: 'funcs' must be a non-empty list of functions")
+
+    functions = []
+    func_codes = []
+    func_ids_by_name = {}
+    for func in funcs:
+        serialized_func = dill.dumps(func)
+        func_name = func.__name__
+        func_id = compute_function_id(func_name, serialized_func)
+        if func_name in func_ids_by_name:
+            if func_ids_by_name[func_name] != func_id:
+                raise PyFaaSParameterMismatchError(f"Parameters mismatch: different functions named '{func_name}' cannot be registered in the same batch")
+            continue        # Registered once
+        func_ids_by_name[func_name] = func_id
+        functions.append({'func_name': func_name, 'code_size': len(serialized_func)})
+        func_codes.append(serialized_func)
+
+    return {
+        'functions': functions,
+        'func_codes': b''.join(func_codes)       # Travels as a raw binary frame
+    }
+
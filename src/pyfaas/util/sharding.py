@@ -0,0 +1,25 @@
+import zlib
+
+
+# A sharded Director runs several routing processes (shards), each one bound to its own endpoint and owning a part of the
+# clients, chosen by hashing their identity. Clients connect to the shard owning them only, Workers connect to every shard:
+# they send the response to a client request to the shard owning that client, and every other message to shard 0.
+
+
+def shard_endpoint(endpoint: str, shard: int) -> str:
+    '''
+    Returns the endpoint of a shard of a Director bound to endpoint: shard 0 binds endpoint itself, the following
+    shards bind the following TCP ports (e.g.: 'tcp://10.0.0.1:5556' for shard 1 of 'tcp://10.0.0.1:5555') or,
+    with the other transports, endpoint suffixed by the shard index (e.g.: 'ipc:///tmp/pyfaas.sock-1').
+    '''
+    if shard == 0:
+        return endpoint
+    if endpoint.startswith('tcp://'):
+        address, port = endpoint.rsplit(':', 1)
+        return f'{address}:{int(port) + shard}'
+    return f'{endpoint}-{shard}'
+
+
+def client_shard(client_id: str, shards: int) -> int:
+    # Must give the same result in clients and Workers: the built-in hash() of strings is salted per process
+    return zlib.crc32(client_id.encode()) % shards
@@ -0,0 +1,63 @@
+from typing import Iterator
+
+from pyfaas.util.codec import get_codec
+
+
+# Request fields uploaded in chunks, before the request itself, when their encoded size exceeds a single chunk
+UPLOADABLE_FIELDS = {
+    'exec': ('positional_args', 'default_args'),
+    'chain_exec': ('json_workflow',)
+}
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Maximum number of uploaded chunks not acknowledged by the Worker yet
+UPLOAD_WINDOW_CHUNKS = 8
+
+
+def encode_upload_fields(codec_name: str, operation: str, extra_payload: dict | None) -> list | None:
+    '''
+    Encodes the fields of a request that have to be uploaded beforehand.
+
+    Returns:
+        list | None: The frames of the encoded fields, None if they are small enough to travel in the request itself.
+
+    Raises:
+        TypeError: Raised if the fields cannot be serialized by the codec.
+    '''
+    if not extra_payload or operation not in UPLOADABLE_FIELDS:
+        return None
+    upload_fields = {field: extra_payload.get(field) for field in UPLOADABLE_FIELDS[operation]}
+    upload_frames = get_codec(codec_name).encode(upload_fields)
+    if sum(memoryview(frame).nbytes for frame in upload_frames) <= UPLOAD_CHUNK_BYTES:
+        return None
+    return upload_frames
+
+
+def strip_upload_fields(operation: str, extra_payload: dict, upload_id: str) -> dict:
+    # The request following the upload: its uploaded fields are replaced by the ID of the upload
+    request_payload = {field: value for field, value in extra_payload.items() if field not in UPLOADABLE_FIELDS[operation]}
+    request_payload['upload_id'] = upload_id
+    return request_payload
+
+
+def build_upload_chunks(requester: str, codec_name: str, upload_id: str, func_id: str | None, upload_frames: list) -> Iterator[dict]:
+    '''
+    Splits the frames of an upload into 'upload_chunk' messages of up to UPLOAD_CHUNK_BYTES bytes.
+    The frames are laid out one after the other, every chunk being placed by its offset, so that the Worker can
+    handle the chunks in any order.
+    '''
+    frame_sizes = [memoryview(frame).nbytes for frame in upload_frames]
+    upload_offset = 0
+    for frame in upload_frames:
+        frame = memoryview(frame).cast('B')
+        for frame_offset in range(0, len(frame), UPLOAD_CHUNK_BYTES):
+            yield {
+                'requester': requester,
+                'operation': 'upload_chunk',
+                'message_id': upload_id,            # Every chunk, and every response to the upload, is correlated by the upload ID
+                'codec': codec_name,                # Codec of the uploaded fields
+                'func_id': func_id,                 # Lets the Director pick a Worker holding the function
+                'upload_frame_sizes': frame_sizes,
+                'chunk_offset': upload_offset + frame_offset,
+                'chunk': bytes(frame[frame_offset:frame_offset + UPLOAD_CHUNK_BYTES])      # Travels as a raw binary frame
+            }
+        upload_offset += len(frame)
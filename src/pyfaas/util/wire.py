@@ -0,0 +1,156 @@
+import json
+import base64
+
+from pyfaas.util.codec import get_codec, DEFAULT_CODEC
+from pyfaas.util.compression import FrameCompressor, decompress_frames
+
+
+# Wire format versions
+#   - 1: a single JSON frame holding the whole message. Binary data (function code, pickled results) is base64-encoded inside it
+#   - 2: a JSON header frame holding the fields needed to route the message, a payload frame holding the remaining
+#        fields (serialized by the codec named in the header, possibly followed by the codec's out-of-band buffers)
+#        and one raw frame for each binary field (bytes value) of the message. Large frames may be compressed,
+#        the header names the compression algorithm and lists the compressed frames
+WIRE_VERSION = 2
+SUPPORTED_WIRE_VERSIONS = [1, 2]
+
+# Fields travelling in the header frame: the Director routes a message by reading these only
+_HEADER_FIELDS = (
+    'operation',
+    'director_operation',
+    'original_client_operation',
+    'requester',
+    'destination_client',
+    'message_id',
+    'request_id',
+    'func_id',
+    'func_name',
+    'func_ids',         # Functions registered by a 'register_batch' request, recorded by the Director on the Worker's response
+    'worker_id',
+    'codec',
+    'upload_id',        # Requests whose large fields have been uploaded beforehand go to the Worker holding them
+    'tags',             # 'broadcast' requests go to the Workers having all of these tags
+    'hedge',            # 'exec' requests that the Director may duplicate to a second Worker when they are late
+    'coalesce',         # 'exec' requests that the Director may answer with the response to an identical request in flight
+    'use_director_cache',   # 'exec' requests that the Director may answer with a cached response to an identical request
+    'deadline',         # Wall-clock timestamp past which nobody waits for the response: the Director drops the request
+    'status',           # Outcome of a response: the Director caches the successful ones without decoding their payload
+    'partial'           # Set on the responses of a stream that are followed by more responses
+)
+
+
+def encode_message(message: dict, wire_version: int = WIRE_VERSION, compressor: FrameCompressor = None) -> list[bytes]:
+    '''
+    Encodes a message into the frames to be sent after the empty delimiter frame.
+
+    Args:
+        message (dict): The message. Binary fields must be bytes values (e.g.: 'func_code', 'result'). 
+            Its 'codec' field, if any, selects the codec used for the payload (ignored with wire version 1, which is JSON only).
+        wire_version (int): The wire format version spoken by the receiver.
+        compressor (FrameCompressor): Compresses the large frames of the message (wire version 2 only). None: no compression.
+
+    Returns:
+        list[bytes]: The frames of the encoded message.
+
+    Raises:
+        TypeError: Raised if the payload cannot be serialized by the selected codec.
+    '''
+    if wire_version == 1:
+        return [json.dumps(_to_legacy_message(message)).encode()]
+
+    codec_name = message.get('codec') or DEFAULT_CODEC
+    header = {'wire_version': WIRE_VERSION}
+    payload = {}
+    binary_fields = {}
+    for field, value in message.items():
+        if isinstance(value, bytes):
+            binary_fields[field] = value
+        elif field in _HEADER_FIELDS:
+            header[field] = value
+        else:
+            payload[field] = value
+    header['codec'] = codec_name
+    payload_frames = get_codec(codec_name).encode(payload)
+    if len(payload_frames) > 1:
+        header['buffers'] = len(payload_frames) - 1     # Out-of-band buffers following the payload frame
+    header['frames'] = list(binary_fields.keys())       # Names of the binary frames following the payload (and its buffers)
+
+    frames = [*payload_frames, *binary_fields.values()]
+    if compressor is not None:
+        frames, compressed_indexes = compressor.compress_frames(frames)
+        if compressed_indexes:
+            header['compression'] = compressor.algorithm
+            header['compressed'] = compressed_indexes   # Indexes of the compressed frames, the header being excluded
+
+    return [json.dumps(header).encode(), *frames]
+
+
+def decode_header(frames: list[bytes]) -> dict:
+    '''
+    Decodes only the header of a message: enough to route it, without reading its payload.
+    With wire version 1 the header is the whole message.
+    '''
+    return json.loads(frames[0])
+
+
+def decode_message(frames: list[bytes]) -> dict:
+    '''
+    Decodes a whole message, whatever its wire format version.
+
+    Returns:
+        dict: The message. Binary fields are bytes values, as they were passed to encode_message().
+    '''
+    return _join_message(decode_header(frames), frames)
+
+
+def reencode_message(header: dict, frames: list[bytes], wire_version: int, codec_name: str = None, compressor: FrameCompressor = None) -> list[bytes]:
+    '''
+    Re-encodes a received message, whose header may have been modified, for a receiver speaking wire_version
+    and using the codec named codec_name (None: keep the codec of the message).
+    When both sides speak version 2 with the same codec the payload and binary frames are forwarded untouched (still compressed, if they were).
+    Otherwise, the message is encoded again using compressor.
+
+    Raises:
+        TypeError: Raised if the payload cannot be serialized by the selected codec.
+    '''
+    if header.get('wire_version', 1) == 2 and wire_version == 2 and codec_name in (None, header.get('codec', DEFAULT_CODEC)):
+        return [json.dumps(header).encode(), *frames[1:]]
+
+    message = _join_message(header, frames)
+    if codec_name is not None:
+        message['codec'] = codec_name
+    return encode_message(message, wire_version, compressor)
+
+
+def _join_message(header: dict, frames: list[bytes]) -> dict:
+    if header.get('wire_version', 1) == 1:
+        return _from_legacy_message(header)
+
+    if header.get('compressed'):
+        frames = [frames[0], *decompress_frames(header['compression'], frames[1:], header['compressed'])]
+
+    payload_end = 2 + header.get('buffers', 0)
+    message = {field: value for field, value in header.items() if field not in ('wire_version', 'frames', 'buffers', 'compression', 'compressed')}
+    message.update(get_codec(header.get('codec', DEFAULT_CODEC)).decode(frames[1:payload_end]))
+    message.update(zip(header['frames'], frames[payload_end:]))
+    return message
+
+
+def _to_legacy_message(message: dict) -> dict:
+    legacy_message = {field: value for field, value in message.items() if field not in ('func_code', 'codec')}
+    if isinstance(message.get('func_code'), bytes):
+        legacy_message['serialized_func_base64'] = base64.b64encode(message['func_code']).decode('utf-8')
+    if isinstance(message.get('result'), bytes):
+        legacy_message['result'] = base64.b64encode(message['result']).decode('utf-8')
+        legacy_message['result_type'] = 'pickle_base64'
+    return legacy_message
+
+
+def _from_legacy_message(legacy_message: dict) -> dict:
+    message = {field: value for field, value in legacy_message.items() if field != 'serialized_func_base64'}
+    if 'serialized_func_base64' in legacy_message:
+        message['func_code'] = base64.b64decode(legacy_message['serialized_func_base64'])
+    if legacy_message.get('result_type') == 'pickle_base64':
+        message['result'] = base64.b64decode(legacy_message['result'])
+        message['result_type'] = 'pickle'
+    return message
@@ -0,0 +1,82 @@
+import time
+
+from collections import OrderedDict
+
+
+class DirectorResponseCache():
+    '''
+    Director-side LRU cache of the Workers' responses to execution requests, with optional TTL-based expiration.
+
+    Entries are keyed by the function and the arguments of a call, as encoded by the client (see PyfaasDirector._affinity_key()),
+    and hold the response as received from the Worker: its header and its frames, forwarded again untouched on a hit.
+    The cache is only used by the Director's routing thread, so it needs no lock.
+    '''
+    def __init__(self, max_size: int, ttl_s: float = 0):
+        self._max_size = max_size
+        self._ttl_s = ttl_s                     # 0: entries never expire
+        self._cache_entries = OrderedDict()     # key -> (func_id, header, frames, expiration timestamp), most recently used last
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def add(self, key: bytes, func_id: str, header: dict, frames: list[bytes]) -> None:
+        if self._max_size == 0:
+            # Caching is disabled
+            return
+
+        expires_at = time.monotonic() + self._ttl_s if self._ttl_s > 0 else None
+        self._cache_entries[key] = (func_id, dict(header), list(frames), expires_at)
+        self._cache_entries.move_to_end(key)
+        if len(self._cache_entries) > self._max_size:
+            self._cache_entries.popitem(last=False)     # Evicting the least recently used entry
+            self._evictions += 1
+
+    def get_cached_response(self, key: bytes) -> tuple[dict, list[bytes]] | None:
+        '''
+        Looks up the response to a call.
+
+        Returns:
+            tuple[dict, list[bytes]] | None: (header, frames) of the cached response on a hit, None on a miss.
+        '''
+        if self._max_size == 0:
+            # Caching is disabled
+            return None
+
+        cached_entry = self._cache_entries.get(key)
+        if cached_entry is not None and cached_entry[3] is not None and cached_entry[3] <= time.monotonic():
+            del self._cache_entries[key]
+            self._expirations += 1
+            cached_entry = None
+
+        if cached_entry is None:
+            self._misses += 1
+            return None
+
+        self._cache_entries.move_to_end(key)
+        self._hits += 1
+        return dict(cached_entry[1]), cached_entry[2]      # The header is modified by the forwarding (e.g.: 'message_id')
+
+    def invalidate_function(self, func_id: str) -> None:
+        # The function has been unregistered: its results must not outlive it
+        for key in [key for key, cached_entry in self._cache_entries.items() if cached_entry[0] == func_id]:
+            del self._cache_entries[key]
+
+    def reset_cache(self) -> None:
+        self._cache_entries.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            'max_size': self._max_size,
+            'ttl_s': self._ttl_s,
+            'size': len(self._cache_entries),
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'expirations': self._expirations
+        }
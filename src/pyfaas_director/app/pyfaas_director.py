@@ -6,26 +6,66 @@ import time
 import zmq
 import random
 import hashlib
-import dill
 import uuid
 import base64
 import queue
 import argparse
+import collections
+import heapq
+import bisect
+import math
+import multiprocessing
 
 from pathlib import Path
 from pyfaas_director.app.util import general
 from pyfaas_director.app.util.file_logger import FileLogger
+from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message, reencode_message, SUPPORTED_WIRE_VERSIONS
+from pyfaas_director.app.util.compression import FrameCompressor
+from pyfaas_director.app.util.codec import DEFAULT_CODEC
+from pyfaas_director.app.util.sharding import shard_endpoint
+from pyfaas_director.app.director_caching.response_cache import DirectorResponseCache
 from pyfaas_director.app.exceptions import *
 
 
 _DEFAULT_TOML_CONFIG_FILE = 'pyfaas_director/director_config.toml'
 
+# Maximum number of client requests remembered to route the retries of clients (see self._forwarded_requests)
+_FORWARDED_REQUESTS_MAX_SIZE = 4096
+
+# Number of the latest 'exec' latencies kept for each function (see self._exec_latencies)
+_LATENCY_SAMPLES = 100
+
+# Weight of the latest response time in the moving averages of the response times of the Workers (see self._response_time_ewmas)
+_RESPONSE_TIME_EWMA_ALPHA = 0.3
+
+# Requests counted in the in-flight window of a Worker (see 'max_in_flight_per_worker' in the configuration)
+_WINDOWED_OPERATIONS = ('exec', 'exec_stream', 'map', 'chain_exec')
+
+# Seconds after which an upload receiving no chunk is abandoned (see self._active_uploads), as on the Workers
+_UPLOAD_EXPIRATION_S = 60
+
+# Points of each Worker on the consistent-hash ring of the 'Affinity' selection strategy (see self._hash_ring_points)
+_HASH_RING_POINTS_PER_WORKER = 64
+
 class PyfaasDirector:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, zmq_context: zmq.Context = None, shard: int = 0):
+        '''
+        Args:
+            config (dict): The Director configuration, as read by read_config_toml().
+            zmq_context (zmq.Context): A ZeroMQ context shared with the Workers and clients running in the same process,
+                needed to use an 'inproc://' endpoint (see pyfaas.local_cluster). None: the Director creates its own.
+            shard (int): The index of the shard run by this instance, when the Director is sharded (see 'shards' in the configuration).
+                Every shard routes the requests of its own clients, shard 0 also synchronizes the Workers.
+        '''
         self._logger = logging.getLogger('pyfaas.director')
 
         self._host = config['network']['director_ip_addr']
         self._port = config['network']['director_port']
+        # Optional ZeroMQ endpoint to bind instead of tcp://<director_ip_addr>:<director_port> (e.g.: 'ipc:///tmp/pyfaas.sock')
+        self._endpoint = config['network'].get('endpoint') or f'tcp://{self._host}:{self._port}'
+        self._shards = config['network'].get('shards', 1)
+        self._shard = shard
+        self._endpoint = shard_endpoint(self._endpoint, shard)
         self._config = config
 
         self._logger.debug(self._config['misc']['greeting_msg'])
@@ -37,8 +77,13 @@ class PyfaasDirector:
             self._port
         )
 
+        # Compresses the large frames of the messages the Director has to encode (re-encoded ones included).
+        # Messages forwarded untouched keep the compression applied by their sender
+        self._compressor = FrameCompressor(**self._config.get('compression', {}))
+
         # ZeroMQ vars
-        self._zmq_context = zmq.Context()
+        self._owns_zmq_context = zmq_context is None       # A shared context is terminated by its owner
+        self._zmq_context = zmq_context if zmq_context is not None else zmq.Context()
         self._zmq_socket = self._zmq_context.socket(zmq.ROUTER)
 
         # --- Workers management ---
@@ -61,12 +106,104 @@ class PyfaasDirector:
         # Workers selection
         self._round_robin_index = 0
         self._worker_selection_strategy = self._config['workers']['worker_selection_strategy']
+        # 'Affinity' strategy: a Worker takes no more than affinity_load_factor times its share of the requests in flight
+        self._affinity_load_factor = self._config['workers'].get('affinity_load_factor', 1.25)
+
+        # Backpressure: no Worker has more than max_in_flight_per_worker execution requests in flight (0: unbounded). The excess
+        # requests wait in self._queued_requests, up to max_queued_requests of them: past that, clients get an 'overloaded' error
+        self._max_in_flight_per_worker = self._config['workers'].get('max_in_flight_per_worker', 0)
+        self._max_queued_requests = self._config['workers'].get('max_queued_requests', 1024)
+        # (client_id, header, frames) of the requests waiting for a Worker, oldest first
+        self._queued_requests = collections.deque()
+        # (client_id, message_id) of the requests in self._queued_requests
+        self._queued_request_ids = set()
+        # Number of requests in self._queued_requests for each function (None for the requests not tied to a function)
+        self._queued_func_ids = collections.Counter()
 
         self._start_time = datetime.datetime.now()
         self._last_worker_connection_ts = None
 
         # Keep track of clients that are currently waiting for a response from a worker
         self._currently_connected_clients = []
+        # Wire format (wire version, codec) spoken by each of the clients above (the one of their latest request)
+        self._clients_wire_formats = {}
+        # Streams being produced ('exec_stream' requests): the flow control messages of a client are routed to the Worker producing its stream
+        #   - Key: (client_id, message_id of the request)
+        #   - Value: worker_id
+        self._active_streams = {}
+        # Uploads of large request fields ('upload_chunk' requests): every chunk, and then the request naming the upload, go to the same Worker
+        #   - Key: (client_id, upload ID)
+        #   - Value: {
+        #       'worker_id': the Worker holding the upload,
+        #       'updated_at': time.monotonic() timestamp of the latest chunk or chunk acknowledgement (see _UPLOAD_EXPIRATION_S),
+        #       'uploaded': True once the Worker holds every chunk: the client is no longer waiting, the request naming the upload will come
+        #     }
+        self._active_uploads = {}
+        # Latest client requests forwarded to a Worker. Clients retry a late request with the same message_id:
+        # the retry of a request still being handled is dropped, the retry of an answered one goes to the Worker that
+        # answered it, which sends its stored response again instead of executing the request twice
+        #   - Key: (client_id, message_id of the request)
+        #   - Value: {
+        #       'worker_ids': Workers the request has been sent to (two if hedged),
+        #       'answered_by': Worker whose response has been forwarded to the client, None while the request is in flight,
+        #       'func_id': ID of the executed function ('exec' requests only, None otherwise),
+        #       'forwarded_at': time.monotonic() timestamp of the forwarding,
+        #       'hedge': (header, frames) of an 'exec' request to send to a second Worker if it is late, None otherwise,
+        #       'in_flight': time.monotonic() timestamp of the sending to each Worker that did not respond yet, by worker_id,
+        #       'windowed': whether the request counts in self._in_flight_requests (execution requests, see _WINDOWED_OPERATIONS),
+        #       'coalesce_key': key of the execution in self._coalesced_executions ('exec' requests sent with coalesce=True only, None otherwise),
+        #       'cache_key': key of the response in self._response_cache ('exec' requests sent with use_director_cache=True only, None otherwise)
+        #     }
+        self._forwarded_requests = collections.OrderedDict()
+
+        # Single-flight executions ('exec' requests sent with coalesce=True): identical calls arriving while one is in flight
+        # are not forwarded, the response to the first call answers all of them
+        #   - Key: the function and arguments of the call (see _affinity_key())
+        #   - Value: {
+        #       'leader': (client_id, message_id) of the forwarded request,
+        #       'deadline': deadline of the forwarded request (None: no deadline),
+        #       'followers': (client_id, message_id) of the identical requests waiting for its response
+        #     }
+        self._coalesced_executions = {}
+        # Key in self._coalesced_executions of every waiting identical request, by (client_id, message_id)
+        self._coalesced_followers = {}
+
+        # Responses to the 'exec' requests sent with use_director_cache=True, served by the Director itself to identical requests
+        caching_config = self._config.get('caching', {})
+        self._response_cache = DirectorResponseCache(caching_config.get('max_size', 0), caching_config.get('ttl_s', 0))
+
+        # Number of forwarded execution requests (see _WINDOWED_OPERATIONS) each Worker did not respond to yet, used by the load-aware
+        # selection strategies and the in-flight window. Control requests (e.g.: 'PING', 'list') are not counted: they cost a Worker little
+        #   - Key: worker_id
+        #   - Value: number of requests in flight
+        self._in_flight_requests = {}
+
+        # Exponentially weighted moving averages of the response times (seconds) of the Workers, used by the 'Fastest' selection strategy
+        #   - Key: (worker_id, func_id) for the 'exec' requests of a function, (worker_id, None) for every request handled by the Worker
+        #   - Value: the moving average
+        self._response_time_ewmas = {}
+
+        # Consistent-hash ring of the registered Workers, used by the 'Affinity' selection strategy. Rebuilt when the Workers change
+        #   - self._hash_ring_points: sorted hashes of the points of the ring
+        #   - self._hash_ring_worker_ids: worker_id owning each point
+        #   - self._hash_ring_members: the Workers the ring has been built for
+        self._hash_ring_points = []
+        self._hash_ring_worker_ids = []
+        self._hash_ring_members = frozenset()
+
+        # Latest latencies (seconds) of the 'exec' requests of each function, from their forwarding to their response
+        #   - Key: func_id
+        #   - Value: collections.deque of up to _LATENCY_SAMPLES latencies
+        self._exec_latencies = {}
+
+        # Hedging ('exec' requests sent with hedge=True): if no response arrives within a percentile of the latest latencies
+        # of the function, a duplicate of the request goes to a second Worker holding the function. The first response wins
+        hedging_config = self._config.get('hedging', {})
+        self._hedge_percentile = hedging_config.get('percentile', 95)
+        self._hedge_min_samples = hedging_config.get('min_samples', 20)     # Requests are not hedged until the latency of their function is known
+        self._hedge_min_delay_s = hedging_config.get('min_delay_ms', 10) / 1000
+        # Heap of the hedges to send, as (send timestamp, client_id, message_id)
+        self._scheduled_hedges = []
         
         self._worker_synchronizer_thread = None   # Thread to synchronize worker state (functions list)
         self._workers_are_synchronized = False
@@ -92,9 +229,8 @@ class PyfaasDirector:
 
     def run(self) -> None:
         # Setting up ZeroMQ stuff
-        tcp_connection_str = f'tcp://{self._host}:{self._port}'
-        self._zmq_socket.bind(tcp_connection_str)
-        self._logger.info(f'Listening on {tcp_connection_str}')
+        self._zmq_socket.bind(self._endpoint)
+        self._logger.info(f'Listening on {self._endpoint}')
         
         # Setting up polling to catch Ctrl+C
         poller = zmq.Poller()
@@ -110,106 +246,216 @@ class PyfaasDirector:
         )
         self._heartbeat_thread.start()
 
-        # Starting workers synchronization thread
-        self._worker_synchronizer_thread = threading.Thread(
-            target=self._synchronize_workers,
-            args=(),
-            daemon=True
-        )
-        self._worker_synchronizer_thread.start()
+        # Starting workers synchronization thread. With a sharded Director, Workers are synchronized by shard 0 only:
+        # the other shards learn the functions held by the Workers from their responses to the registration requests
+        if self._shard == 0:
+            self._worker_synchronizer_thread = threading.Thread(
+                target=self._synchronize_workers,
+                args=(),
+                daemon=True
+            )
+            self._worker_synchronizer_thread.start()
         
-        # Main loop
-        while True:
+        # Main loop, until Ctrl+C or a call to stop()
+        while not self._threading_stop_event.is_set():
             try:
-                sockets = dict(poller.poll(1000))           # 1s timeout
+                poll_timeout_ms = 1000                      # 1s timeout, shorter if a hedge has to be sent before
+                if self._scheduled_hedges:
+                    poll_timeout_ms = min(poll_timeout_ms, max(0, (self._scheduled_hedges[0][0] - time.monotonic()) * 1000))
+                sockets = dict(poller.poll(poll_timeout_ms))
                 if self._zmq_socket in sockets:
                     # Receive a ZeroMQ multipart msg from a client 
                     # (either a pyfaas client or a pyfaas worker, which is also a client at this stage)
-                    # Msg: [identity][empty][JSON_payload]
+                    # Msg: [identity][empty][header][payload][binary frames] (wire version 2) or [identity][empty][JSON_payload] (wire version 1)
                     msg_parts = self._zmq_socket.recv_multipart()
 
                     if len(msg_parts) < 3:
                         self._logger.warning(f'Malformed message received: {msg_parts}')
                         continue
                     
-                    # Parsing
-                    source_id, _, payload = msg_parts
+                    # Parsing: only the header is decoded, payload and binary frames are forwarded as they are
+                    source_id, _, *frames = msg_parts
                     source_id = source_id.decode()                  # Requester identity
-                    json_payload = json.loads(payload.decode())     # msg JSON body
+                    header = decode_header(frames)                  # Routing fields (the whole message with wire version 1)
                     
                     # Dispatching
                     if source_id.startswith('worker-'):
                         # self._logger.debug(f'Handling worker request (source = {source_id})')
-                        self._handle_worker_request(source_id, json_payload)
+                        self._handle_worker_request(source_id, header, frames)
                     elif source_id.startswith('client-'):
                         # self._logger.debug(f'Handling client request (source = {source_id})')
-                        self._handle_client_request(source_id, json_payload)
+                        self._handle_client_request(source_id, header, frames)
                     else:
                         self._logger.warning(f'Unknown message source: {source_id}')
                         continue
+                if self._queued_requests:
+                    self._dispatch_queued_requests()
+                self._send_due_hedges()
             except KeyboardInterrupt:
                 self._logger.info('Ctrl+C pressed, exiting...')
                 self._logger.info('Goodbye')
-                self._cleanup()
                 break
+        self._cleanup()
+
+    def stop(self) -> None:
+        '''
+        Makes run() return, from another thread, within its poll timeout (1s).
+        '''
+        self._threading_stop_event.set()
 
     # Handle a request from a client identified by client_id
     # The request is an operation that the client is asking to be executed on a worker
     # The director must proxy such a request to one of the registered workers
-    def _handle_client_request(self, client_id: str, json_payload: dict) -> None:
-        operation = json_payload.get('operation')
+    def _handle_client_request(self, client_id: str, header: dict, frames: list[bytes], dequeued: bool = False) -> None:
+        operation = header.get('operation')
+        message_id = header.get('message_id')     # Correlation ID chosen by the client, echoed back in every response
         self._logger.debug(f'Operation "{operation}" requested by client "{client_id}"')
 
+        if operation == 'stream_credit':
+            # Flow control message of a stream: no response is expected
+            worker_id = self._active_streams.get((client_id, message_id))
+            if worker_id in self._workers:
+                self._forward_to_worker(worker_id, header, frames)
+            return
+
+        if operation == 'upload_chunk' and (client_id, message_id) in self._active_uploads:
+            # Following chunks of an upload: the client is already waiting for the upload's response
+            active_upload = self._active_uploads[(client_id, message_id)]
+            active_upload['updated_at'] = time.monotonic()
+            if active_upload['worker_id'] in self._workers:
+                try:
+                    self._forward_to_worker(active_upload['worker_id'], header, frames)
+                except TypeError as e:
+                    self._logger.warning(f"Unable to forward upload chunk from client '{client_id}': {e}")
+                    del self._active_uploads[(client_id, message_id)]
+                    err_response = {
+                        'message_id': message_id,
+                        'status': 'err',
+                        'message': f'Unable to forward the upload chunk to the Worker: {e}'
+                    }
+                    self._send_to_client(client_id, err_response)
+            return
+
+        retried_request = self._forwarded_requests.get((client_id, message_id))
+        if retried_request is not None and retried_request['answered_by'] is None and any(worker_id in self._workers for worker_id in retried_request['worker_ids']):
+            # The Worker is still handling the request: its response will answer the client
+            self._logger.debug(f"Dropping retry of request '{message_id}' from client '{client_id}', still being handled by {retried_request['worker_ids']}")
+            return
+
+        if self._coalesced_followers.get((client_id, message_id)) in self._coalesced_executions:
+            # Retry of a request waiting for the response to an identical one
+            self._logger.debug(f"Dropping retry of request '{message_id}' from client '{client_id}', coalesced with an identical request in flight")
+            return
+
+        if (client_id, message_id) in self._queued_request_ids:
+            # Retry of a request waiting for a Worker
+            self._logger.debug(f"Dropping retry of request '{message_id}' from client '{client_id}', still waiting for a Worker")
+            return
+
+        if operation == 'broadcast' and self._broadcast_request_id(client_id, message_id) in self._pending_multiple_responses:
+            # Retry of a broadcast whose responses are being gathered: the Workers that died meanwhile will never answer
+            request_id = self._broadcast_request_id(client_id, message_id)
+            for worker_id in [worker_id for worker_id in self._pending_multiple_responses[request_id]['waiting'] if worker_id not in self._workers]:
+                self._gather_broadcast_response(request_id, worker_id, {'status': 'err', 'message': f"Worker '{worker_id}' is no longer registered"})
+            return
+
         # Record that client is waiting for a response
         with self._lock:
             self._currently_connected_clients.append(client_id)
+            self._clients_wire_formats[client_id] = (header.get('wire_version', 1), header.get('codec', DEFAULT_CODEC))
+
+        deadline = header.get('deadline')
+        if deadline is not None and deadline <= time.time():
+            # The request expired before being forwarded (e.g.: queued behind a burst): no Worker spends time on it
+            self._logger.debug(f"Dropping request '{message_id}' from client '{client_id}': its deadline has expired")
+            err_response = {
+                'message_id': message_id,
+                'status': 'err',
+                'action': 'deadline_exceeded',
+                'message': f"The deadline of the '{operation}' request expired before it was forwarded to a Worker"
+            }
+            self._send_to_client(client_id, err_response)
+            return
 
         # Proxy msg to the selected worker
+        coalesce_key = None
+        cache_key = None
         try:
             # Function registration, handle data structures for synchronization
             match operation:
+                case 'has_function':
+                    # Cheap probe sent by clients before registering a function: the code is uploaded only if the cluster does not hold it yet
+                    requested_func_id = header.get('func_id')
+                    has_function_response = {
+                        'message_id': message_id,
+                        'status': 'ok',
+                        'result': self._is_function_available(requested_func_id),
+                    }
+
+                    # Director self-responds to requester client without contacting any worker
+                    self._send_to_client(client_id, has_function_response)
+                    return
+
                 case 'register':
-                    func_code_base64 = json_payload.get('serialized_func_base64')
-                    func_code_bytes = base64.b64decode(func_code_base64)
-                    func_code = dill.loads(func_code_bytes)
-                    func_name = func_code.__name__
-                    func_id = self._compute_function_id(func_name, func_code_base64)
-
-                    # Appending the computed ID to the json payload to send to the worker
-                    json_payload['func_id'] = func_id
+                    # Routed by its header only: the function code is forwarded untouched, and never decoded nor unpickled by the Director.
+                    # The Worker computes the function ID from the code, and the Director records it on the Worker's response
+                    func_id = header.get('func_id')        # Computed by the client as well, not sent by wire version 1 clients
+                    if func_id is not None and self._is_function_available(func_id):
+                        # Already held by a registered Worker: answer directly, without overwriting the function's holders
+                        func_name = header.get('func_name')
+                        self._logger.debug(f"Function '{func_name}' ({func_id}) is already registered")
+                        register_response = {
+                            'message_id': message_id,
+                            'status': 'ok',
+                            'action': 'no_action',
+                            'result': func_id,
+                            'message': f"Function '{func_name}' is already registered"
+                        }
+                        self._send_to_client(client_id, register_response)
+                        return
+
                     # TODO: fix with sets
                     selected_worker_id = list(self._workers.keys())[0]              # Choose first worker to save the function
-                    self._functions_workers_map[func_id] = [selected_worker_id]     # Until synchronized, the function can be found only on that Worker
-                    with self._lock:
-                        self._workers_are_synchronized = False
-                    
-                    self._logger.debug(f'Workers-Functions state: {self._functions_workers_map}')
+
+                case 'register_batch':
+                    # Many functions at once: the whole batch is handed to a single Worker, in a single message
+                    selected_worker_id = self._select_worker()
+                    self._logger.debug(f"Batch of functions from client '{client_id}' handed to worker '{selected_worker_id}'")
 
                 case 'unregister':
-                    request_id = uuid.uuid4()
+                    request_id = str(uuid.uuid4())
 
-                    func_id = json_payload['func_id']       # Needed to know to which Worker(s) (one/more) to send the unregistration request
-                    if self._functions_workers_map[func_id] != 'ANY':
-                        selected_worker_ids = self._functions_workers_map[func_id]   # Get single or multiple worker ID, but not all of them
-                    else:
-                        selected_worker_ids = list(self._workers.values())
+                    func_id = header['func_id']       # Needed to know to which Worker(s) (one/more) to send the unregistration request
+                    self._response_cache.invalidate_function(func_id)
+                    if func_id not in self._functions_workers_map:
+                        unregister_response = {
+                            'message_id': message_id,
+                            'status': 'err',
+                            'action': 'no_func',
+                            'message': f"No function with ID '{func_id}' is registered right now"
+                        }
+                        self._send_to_client(client_id, unregister_response)
+                        return
+
+                    # Get single or multiple worker ID, among the ones still registered
+                    selected_worker_ids = [worker_id for worker_id in self._functions_workers_map[func_id] if worker_id in self._workers]
                     
                     if not selected_worker_ids:         # No Worker available
                         raise DirectorNoAvailableWorkersError
                     
                     self._pending_multiple_responses[request_id] = {
                         'client_id': client_id,
+                        'message_id': message_id,
                         'remaining': len(selected_worker_ids)
                     }
 
                     # Needed by the Director once the worker(s) will respond to such a request
-                    json_payload['request_id'] = request_id
+                    header['request_id'] = request_id
                 
                     # Send unregister message to every Worker holding the function
                     self._logger.debug(f"Sending 'unregister' request to {len(selected_worker_ids)} worker(s)")
                     for worker_id in selected_worker_ids:
-                        msg = [worker_id.encode(), b'', json.dumps(json_payload).encode()]
-                        self._zmq_socket.send_multipart(msg)
+                        self._forward_to_worker(worker_id, header, frames)
                         self._logger.debug(f"Request from client '{client_id}' formwarded to worker '{worker_id}'")
 
                     # Update function-worker mapping data structure
@@ -217,70 +463,486 @@ class PyfaasDirector:
 
                     return      # End here, message(s) has already been forwarded
                 
+                case 'broadcast':
+                    # Executed by every Worker holding the function (and having all the requested tags): one response per Worker is gathered
+                    func_id = header['func_id']
+                    requested_tags = set(header.get('tags') or [])
+                    selected_worker_ids = [
+                        worker_id for worker_id in set(self._functions_workers_map.get(func_id, []))
+                        if worker_id in self._workers and requested_tags <= set(self._workers[worker_id].get('tags', []))
+                    ]
+                    if not selected_worker_ids:
+                        broadcast_response = {
+                            'message_id': message_id,
+                            'status': 'err',
+                            'action': 'no_func',
+                            'message': f"No registered Worker holds the function with ID '{func_id}'" + (f" and has tags {sorted(requested_tags)}" if requested_tags else '')
+                        }
+                        self._send_to_client(client_id, broadcast_response)
+                        return
+
+                    # Derived from the client's message_id: the Workers recognize the retries of the broadcast as such
+                    request_id = self._broadcast_request_id(client_id, message_id)
+                    self._pending_multiple_responses[request_id] = {
+                        'client_id': client_id,
+                        'message_id': message_id,
+                        'waiting': set(selected_worker_ids),
+                        'results': {}
+                    }
+
+                    # Workers answer with the request ID as correlation ID
+                    header['message_id'] = request_id
+                    self._logger.debug(f"Sending 'broadcast' request to {len(selected_worker_ids)} worker(s)")
+                    for worker_id in selected_worker_ids:
+                        try:
+                            self._forward_to_worker(worker_id, header, frames)
+                        except TypeError as e:
+                            self._gather_broadcast_response(request_id, worker_id, {'status': 'err', 'message': f'Unable to forward the request to the Worker: {e}'})
+
+                    return      # End here, message(s) has already been forwarded
+
                 case 'get_worker_ids':
                     active_worker_ids = self._workers.keys()
                     self._logger.debug(f'Currently active workers: {active_worker_ids}')
                     get_worker_ids_response = {
+                        'message_id': message_id,
                         'status': 'ok',
-                        'result': active_worker_ids,
+                        'result': list(active_worker_ids),
                     }
 
                     # Director self-responds to requester client without contacting any worker
-                    msg = [client_id.encode(), b'', json.dumps(get_worker_ids_response).encode()]
-                    self._zmq_socket.send_multipart(msg)
-                    with self._lock:
-                        self._currently_connected_clients.remove(client_id)
+                    self._send_to_client(client_id, get_worker_ids_response)
                     return
                 
                 case 'get_worker_info' | 'get_cache_dump':
-                    requested_worker_id = json_payload.get('worker_id')
+                    requested_worker_id = header.get('worker_id')
                     if requested_worker_id not in self._workers:
                         err_msg = f"No currently registered Worker is identified by ID '{requested_worker_id}'"
                         self._logger.debug(err_msg)
                         err_response = {
+                            'message_id': message_id,
                             'status': 'err',
                             'message': err_msg
                         }
-                        msg = [client_id.encode(), b'', json.dumps(err_response).encode()]
-                        self._zmq_socket.send_multipart(msg)
-                        with self._lock:
-                            self._currently_connected_clients.remove(client_id)
+                        self._send_to_client(client_id, err_response)
                         return
                     else:
                         selected_worker_id = requested_worker_id
                 
-                case 'exec':
-                    requested_func_id = json_payload.get('func_id')      # The ID (hash) of the function the user has requested the execution 
+                case 'exec' | 'exec_stream' | 'map':
+                    # 'map' chunks are routed independently: consecutive chunks are spread across the Workers holding the function
+                    requested_func_id = header.get('func_id')      # The ID (hash) of the function the user has requested the execution 
                     self._logger.debug(f'Client {client_id} requested execution of function identified by {requested_func_id}')
+
+                    if operation == 'exec' and header.get('use_director_cache') and self._response_cache.enabled and header.get('upload_id') is None:
+                        cache_key = self._affinity_key(header, frames)
+                        cached_response = self._response_cache.get_cached_response(cache_key)
+                        if cached_response is not None:
+                            # Answered by the Director itself, as for 'get_worker_ids'
+                            cached_header, cached_frames = cached_response
+                            cached_header['message_id'] = message_id
+                            self._logger.debug(f"Director cache hit for request '{message_id}' from client '{client_id}'")
+                            self._forward_to_client(client_id, cached_header, cached_frames)
+                            return
+
+                    if operation == 'exec' and header.get('coalesce') and header.get('upload_id') is None:
+                        coalesce_key = self._affinity_key(header, frames)
+                        if self._coalesce_request(client_id, message_id, coalesce_key, deadline):
+                            return
                     
-                    selected_worker_id = self._select_worker(requested_func_id)
+                    affinity_key = self._affinity_key(header, frames) if self._worker_selection_strategy == 'Affinity' else None
+                    selected_worker_id = self._select_worker(requested_func_id, affinity_key)
                     self._logger.debug(f'Chosen worker {selected_worker_id} for {requested_func_id} execution')
+
+                case 'upload_chunk':
+                    # First chunk of an upload: the Worker is chosen as for the request the upload belongs to
+                    selected_worker_id = self._select_worker(header.get('func_id'))
+                    self._active_uploads[(client_id, message_id)] = {'worker_id': selected_worker_id, 'updated_at': time.monotonic(), 'uploaded': False}
                 
                 case _:         # Any other case: any connected worker can handle the request
                     selected_worker_id = self._select_worker()
 
+            upload_id = header.get('upload_id')
+            if upload_id is not None:
+                # The large fields of the request have been uploaded beforehand: the Worker holding them must handle it
+                active_upload = self._active_uploads.pop((client_id, upload_id), None)
+                if active_upload is not None:
+                    selected_worker_id = active_upload['worker_id']
+            if retried_request is not None and retried_request['answered_by'] in self._workers:
+                selected_worker_id = retried_request['answered_by']     # The response has been lost: the Worker holding it sends it again
+            elif operation in _WINDOWED_OPERATIONS and upload_id is None and not dequeued and self._queued_func_ids[header.get('func_id')] > 0:
+                # Older requests for the function are waiting for a Worker: they are served first
+                self._queue_request(client_id, header, frames)
+                return
+            elif operation in _WINDOWED_OPERATIONS and upload_id is None and not self._has_free_slot(selected_worker_id):
+                # The selected Worker is at the end of its in-flight window: another Worker holding the function, or the queue
+                selected_worker_id = self._free_worker(header.get('func_id'))
+                if selected_worker_id is None:
+                    self._queue_request(client_id, header, frames)
+                    return
+            if operation == 'exec_stream':
+                self._active_streams[(client_id, message_id)] = selected_worker_id
+
+            self._forward_to_worker(selected_worker_id, header, frames)
+            if operation != 'upload_chunk':
+                forwarded_request = {
+                    'worker_ids': [selected_worker_id],
+                    'answered_by': None,
+                    'func_id': header.get('func_id') if operation == 'exec' else None,
+                    'forwarded_at': time.monotonic(),
+                    'hedge': None,
+                    'in_flight': {},
+                    'windowed': operation in _WINDOWED_OPERATIONS,
+                    'coalesce_key': coalesce_key,
+                    'cache_key': cache_key
+                }
+                if coalesce_key is not None:
+                    self._coalesced_executions.setdefault(coalesce_key, {'leader': (client_id, message_id), 'deadline': deadline, 'followers': []})
+                if retried_request is not None:
+                    self._release_in_flight(retried_request)
+                self._add_in_flight(forwarded_request, selected_worker_id)
+                self._forwarded_requests[(client_id, message_id)] = forwarded_request
+                self._forwarded_requests.move_to_end((client_id, message_id))
+                while len(self._forwarded_requests) > _FORWARDED_REQUESTS_MAX_SIZE:
+                    evicted_request_key, evicted_request = self._forwarded_requests.popitem(last=False)
+                    self._release_in_flight(evicted_request)      # Its response is not expected any more
+                    self._fail_coalesced_followers(evicted_request_key, evicted_request, 'The Director stopped tracking the identical request this one was coalesced with, retry it')
+                if operation == 'exec' and header.get('hedge') and upload_id is None:       # Uploaded fields are held by a single Worker
+                    self._schedule_hedge(client_id, message_id, forwarded_request, header, frames)
+            self._logger.debug(f"Request from client '{client_id}' formwarded to worker '{selected_worker_id}'")
+
         except DirectorNoAvailableWorkersError as e:
             self._logger.warning('No available workers to handle client request right now')
             err_response = {
+                'message_id': message_id,
                 'status': 'err',
-                'message': e
+                'message': str(e)
             }
-            msg = [client_id.encode(), b'', json.dumps(err_response).encode()]
-            self._zmq_socket.send_multipart(msg)
-            with self._lock:
-                self._currently_connected_clients.remove(client_id)
-            return
+            self._send_to_client(client_id, err_response)
+        except TypeError as e:
+            # The request could not be converted to the wire format of the selected Worker (e.g.: a codec it does not support)
+            self._logger.warning(f"Unable to forward request from client '{client_id}': {e}")
+            if operation == 'upload_chunk':
+                self._active_uploads.pop((client_id, message_id), None)
+            err_response = {
+                'message_id': message_id,
+                'status': 'err',
+                'message': f'Unable to forward the request to a Worker: {e}'
+            }
+            self._send_to_client(client_id, err_response)
 
-        msg = [selected_worker_id.encode(), b'', json.dumps(json_payload).encode()]
+    def _forward_to_worker(self, worker_id: str, header: dict, frames: list[bytes]) -> None:
+        '''
+        Forwards a client request to a Worker, in the wire format version negotiated with it.
+        Requests using a codec the Worker does not support are converted to the default codec.
+
+        Raises:
+            TypeError: Raised if the request cannot be represented with the default codec.
+        '''
+        wire_version = self._workers[worker_id].get('wire_version', 1)
+        codec_name = header.get('codec', DEFAULT_CODEC)
+        if codec_name not in self._workers[worker_id].get('codecs', [DEFAULT_CODEC]):
+            codec_name = DEFAULT_CODEC
+        msg = [worker_id.encode(), b'', *reencode_message(header, frames, wire_version, codec_name, self._compressor)]
+        self._zmq_socket.send_multipart(msg)
+
+    def _send_to_worker(self, worker_id: str, json_payload: dict) -> None:
+        '''
+        Sends a message originated by the Director (e.g.: synchronization) to a Worker, in the wire format version negotiated with it.
+        '''
+        wire_version = self._workers[worker_id].get('wire_version', 1)
+        msg = [worker_id.encode(), b'', *encode_message(json_payload, wire_version, self._compressor)]
+        self._zmq_socket.send_multipart(msg)
+
+    def _forward_to_client(self, client_id: str, header: dict, frames: list[bytes]) -> None:
+        '''
+        Forwards a Worker's response to the client waiting for it, in the wire format the client spoke.
+        Partial responses of a stream leave the client waiting for the following ones.
+        '''
+        wire_version, codec_name = self._clients_wire_formats.get(client_id, (1, DEFAULT_CODEC))
+        msg = [client_id.encode(), b'', *reencode_message(header, frames, wire_version, codec_name, self._compressor)]
+        self._zmq_socket.send_multipart(msg)
+        if not header.get('partial'):
+            self._release_client(client_id)
+
+    def _send_to_client(self, client_id: str, json_payload: dict) -> None:
+        '''
+        Sends a response built by the Director itself to a client, in the wire format the client spoke.
+        '''
+        wire_version, codec_name = self._clients_wire_formats.get(client_id, (1, DEFAULT_CODEC))
+        msg = [client_id.encode(), b'', *encode_message({**json_payload, 'codec': codec_name}, wire_version, self._compressor)]
         self._zmq_socket.send_multipart(msg)
-        self._logger.debug(f"Request from client '{client_id}' formwarded to worker '{selected_worker_id}'")
+        self._release_client(client_id)
 
-    def _select_worker(self, func_id: str = None) -> str:
+    def _release_client(self, client_id: str) -> None:
+        # Remove client from list of clients that are waiting for a response
+        with self._lock:
+            self._currently_connected_clients.remove(client_id)
+            if client_id not in self._currently_connected_clients:
+                self._clients_wire_formats.pop(client_id, None)
+
+    def _broadcast_request_id(self, client_id: str, message_id: str) -> str:
+        return f'{client_id}/{message_id}'
+
+    def _gather_broadcast_response(self, request_id: str, worker_id: str, worker_result: dict) -> None:
+        '''
+        Records the outcome of a 'broadcast' request on a Worker: the Worker's response, as {'frames': its base64-encoded frames}
+        (the Director never decodes the results of user functions, the client does), or an error detected by the Director,
+        as {'status': 'err', 'message': ...}. Once every Worker has answered, sends the client a single response whose
+        result maps each Worker ID to its own outcome.
+        '''
+        pending_responses = self._pending_multiple_responses[request_id]
+        if worker_id not in pending_responses['waiting']:
+            return          # Repeated response
+
+        pending_responses['results'][worker_id] = worker_result
+        pending_responses['waiting'].discard(worker_id)
+        if pending_responses['waiting']:
+            return          # Still waiting for other Workers
+
+        del self._pending_multiple_responses[request_id]
+        broadcast_response = {
+            'message_id': pending_responses['message_id'],
+            'status': 'ok',
+            'action': 'broadcasted',
+            'result': pending_responses['results']
+        }
+        self._send_to_client(pending_responses['client_id'], broadcast_response)
+
+    def _schedule_hedge(self, client_id: str, message_id: str, forwarded_request: dict, header: dict, frames: list[bytes]) -> None:
+        '''
+        Schedules the sending of a duplicate of an 'exec' request to a second Worker, once the latency of the request exceeds
+        the configured percentile of the latest latencies of its function. Requests of functions held by a single Worker,
+        or whose latency is not known well enough yet, are not hedged.
+        '''
+        latencies = self._exec_latencies.get(forwarded_request['func_id'], [])
+        if len(latencies) < self._hedge_min_samples:
+            return
+        holder_worker_ids = [worker_id for worker_id in self._functions_workers_map.get(forwarded_request['func_id'], []) if worker_id in self._workers]
+        if len(holder_worker_ids) < 2:
+            return
+
+        sorted_latencies = sorted(latencies)
+        hedge_delay_s = sorted_latencies[min(len(sorted_latencies) - 1, int(len(sorted_latencies) * self._hedge_percentile / 100))]
+        forwarded_request['hedge'] = (header, frames)
+        heapq.heappush(self._scheduled_hedges, (time.monotonic() + max(hedge_delay_s, self._hedge_min_delay_s), client_id, message_id))
+
+    def _send_due_hedges(self) -> None:
+        # Sends the duplicates of the hedged requests that are still waiting for a response once their hedge delay has elapsed
+        now = time.monotonic()
+        while self._scheduled_hedges and self._scheduled_hedges[0][0] <= now:
+            _, client_id, message_id = heapq.heappop(self._scheduled_hedges)
+            forwarded_request = self._forwarded_requests.get((client_id, message_id))
+            if forwarded_request is None or forwarded_request['hedge'] is None:
+                continue            # Answered in time
+            header, frames = forwarded_request['hedge']
+            forwarded_request['hedge'] = None
+            if header.get('deadline') is not None and header['deadline'] <= time.time():
+                continue            # Nobody waits for the response any more
+
+            candidate_worker_ids = [
+                worker_id for worker_id in self._functions_workers_map.get(forwarded_request['func_id'], [])
+                if worker_id in self._workers and worker_id not in forwarded_request['worker_ids'] and self._has_free_slot(worker_id)
+            ]
+            if not candidate_worker_ids:
+                continue
+            if self._worker_selection_strategy in ('Least-Loaded', 'Affinity'):
+                hedge_worker_id = self._least_loaded_worker(candidate_worker_ids)
+            elif self._worker_selection_strategy == 'Fastest':
+                hedge_worker_id = self._fastest_worker(candidate_worker_ids, forwarded_request['func_id'])
+            else:
+                hedge_worker_id = random.choice(candidate_worker_ids)
+            try:
+                self._forward_to_worker(hedge_worker_id, header, frames)
+            except TypeError as e:
+                self._logger.warning(f"Unable to hedge request '{message_id}' from client '{client_id}': {e}")
+                continue
+            forwarded_request['worker_ids'].append(hedge_worker_id)
+            self._add_in_flight(forwarded_request, hedge_worker_id)
+            self._logger.debug(f"Hedged request '{message_id}' from client '{client_id}' to worker '{hedge_worker_id}'")
+
+    def _coalesce_request(self, client_id: str, message_id: str, coalesce_key: bytes, deadline: float = None) -> bool:
+        '''
+        Attaches an 'exec' request sent with coalesce=True to an identical request in flight, if any.
+
+        Returns:
+            bool: True if the request will be answered with the response to the identical request (it must not be forwarded), False otherwise.
+        '''
+        coalesced_execution = self._coalesced_executions.get(coalesce_key)
+        if coalesced_execution is None or coalesced_execution['leader'] == (client_id, message_id):
+            return False
+        if coalesced_execution['deadline'] is not None and (deadline is None or deadline > coalesced_execution['deadline']):
+            return False        # The execution in flight may be skipped when its deadline expires, while this request is still wanted
+
+        coalesced_execution['followers'].append((client_id, message_id))
+        self._coalesced_followers[(client_id, message_id)] = coalesce_key
+        self._logger.debug(f"Request '{message_id}' from client '{client_id}' coalesced with request '{coalesced_execution['leader'][1]}' in flight")
+        return True
+
+    def _pop_coalesced_followers(self, request_key: tuple[str, str], forwarded_request: dict) -> list[tuple[str, str]]:
+        # The forwarded request is answered (or its response is not expected any more): identical calls are not coalesced with it any more
+        coalesce_key = forwarded_request.get('coalesce_key')
+        coalesced_execution = self._coalesced_executions.get(coalesce_key) if coalesce_key is not None else None
+        if coalesced_execution is None or coalesced_execution['leader'] != request_key:
+            return []       # Identical calls are coalesced with another request
+        del self._coalesced_executions[coalesce_key]
+        for follower in coalesced_execution['followers']:
+            self._coalesced_followers.pop(follower, None)
+        return coalesced_execution['followers']
+
+    def _fail_coalesced_followers(self, request_key: tuple[str, str], forwarded_request: dict, message: str) -> None:
+        # The response to the forwarded request is not expected any more: nothing will answer the identical requests waiting for it
+        for follower_client_id, follower_message_id in self._pop_coalesced_followers(request_key, forwarded_request):
+            err_response = {
+                'message_id': follower_message_id,
+                'status': 'err',
+                'message': message
+            }
+            self._send_to_client(follower_client_id, err_response)
+
+    def _cache_response(self, forwarded_request: dict, header: dict, frames: list[bytes]) -> None:
+        # Only successful executions are cached: errors (e.g.: 'no_func', an exception raised by the function) are not replayed.
+        # The status travels in the header: the payload, holding the result of the user function, is never decoded
+        if header.get('status') == 'ok':
+            self._response_cache.add(forwarded_request['cache_key'], forwarded_request['func_id'], header, frames)
+
+    def _has_free_slot(self, worker_id: str) -> bool:
+        return self._max_in_flight_per_worker == 0 or self._in_flight_requests.get(worker_id, 0) < self._max_in_flight_per_worker
+
+    def _free_worker(self, func_id: str = None) -> str | None:
+        # Least loaded of the Workers holding the function (of every Worker, if none does) below the end of their in-flight window
+        worker_ids = [worker_id for worker_id in self._functions_workers_map.get(func_id, []) if worker_id in self._workers] or list(self._workers)
+        free_worker_ids = [worker_id for worker_id in worker_ids if self._has_free_slot(worker_id)]
+        return self._least_loaded_worker(free_worker_ids) if free_worker_ids else None
+
+    def _queue_request(self, client_id: str, header: dict, frames: list[bytes]) -> None:
+        '''
+        Holds a request no Worker can take right now, until a Worker frees a slot of its in-flight window (see _dispatch_queued_requests()).
+        The client gets an 'overloaded' error if max_queued_requests requests are already waiting.
+        '''
+        message_id = header.get('message_id')
+        if len(self._queued_requests) >= self._max_queued_requests:
+            self._logger.warning(f"Rejecting request '{message_id}' from client '{client_id}': {len(self._queued_requests)} requests are already waiting for a Worker")
+            err_response = {
+                'message_id': message_id,
+                'status': 'err',
+                'action': 'overloaded',
+                'message': f'The Director is overloaded: {len(self._queued_requests)} requests are already waiting for a Worker, retry later'
+            }
+            self._send_to_client(client_id, err_response)
+            return
+
+        self._release_client(client_id)     # The request is handled again, from the beginning, when it leaves the queue
+        self._queued_requests.append((client_id, header, frames))
+        self._queued_request_ids.add((client_id, message_id))
+        self._queued_func_ids[header.get('func_id')] += 1
+        self._logger.debug(f"Queued request '{message_id}' from client '{client_id}' ({len(self._queued_requests)} waiting)")
+
+    def _dispatch_queued_requests(self) -> None:
+        # Oldest first, every request that a Worker has a free slot for: a request waiting for busy Workers does not hold back
+        # the requests for other functions behind it. Once no Worker is free for a function, its later requests are skipped
+        queued_requests, self._queued_requests = self._queued_requests, collections.deque()
+        waiting_requests = collections.deque()
+        blocked_func_ids = set()
+        for client_id, header, frames in queued_requests:
+            func_id = header.get('func_id')
+            if func_id in blocked_func_ids or self._free_worker(func_id) is None:
+                blocked_func_ids.add(func_id)
+                waiting_requests.append((client_id, header, frames))
+                continue
+            self._queued_request_ids.discard((client_id, header.get('message_id')))
+            self._queued_func_ids[func_id] -= 1
+            if self._queued_func_ids[func_id] == 0:
+                del self._queued_func_ids[func_id]
+            self._handle_client_request(client_id, header, frames, dequeued=True)
+        waiting_requests.extend(self._queued_requests)        # Requests queued again meanwhile (e.g.: their Worker left)
+        self._queued_requests = waiting_requests
+
+    def _add_in_flight(self, forwarded_request: dict, worker_id: str) -> None:
+        forwarded_request['in_flight'][worker_id] = time.monotonic()
+        if forwarded_request['windowed']:
+            self._in_flight_requests[worker_id] = self._in_flight_requests.get(worker_id, 0) + 1
+
+    def _release_in_flight(self, forwarded_request: dict, worker_id: str = None) -> None:
+        # The Worker (every Worker, if None) responded to the request, or its response is not expected any more
+        released_worker_ids = list(forwarded_request['in_flight']) if worker_id is None else [worker_id] if worker_id in forwarded_request['in_flight'] else []
+        for released_worker_id in released_worker_ids:
+            del forwarded_request['in_flight'][released_worker_id]
+            if forwarded_request['windowed'] and self._in_flight_requests.get(released_worker_id, 0) > 0:
+                self._in_flight_requests[released_worker_id] -= 1
+
+    def _record_response_time(self, forwarded_request: dict, worker_id: str) -> None:
+        # Called upon the response of a Worker to a request still in flight on it, late responses to hedged requests included
+        response_time_s = time.monotonic() - forwarded_request['in_flight'][worker_id]
+        keys = [(worker_id, None)] if forwarded_request['func_id'] is None else [(worker_id, None), (worker_id, forwarded_request['func_id'])]
+        for key in keys:
+            previous_ewma = self._response_time_ewmas.get(key)
+            self._response_time_ewmas[key] = response_time_s if previous_ewma is None else _RESPONSE_TIME_EWMA_ALPHA * response_time_s + (1 - _RESPONSE_TIME_EWMA_ALPHA) * previous_ewma
+
+    def _least_loaded_worker(self, worker_ids: list[str]) -> str:
+        # Ties are broken in Round-Robin order, so that idle Workers share the requests
+        start_index = self._round_robin_index % len(worker_ids)
+        self._round_robin_index += 1
+        rotated_worker_ids = worker_ids[start_index:] + worker_ids[:start_index]
+        return min(rotated_worker_ids, key=lambda worker_id: self._in_flight_requests.get(worker_id, 0))
+
+    def _fastest_worker(self, worker_ids: list[str], func_id: str = None) -> str:
+        # Expected latency: moving average of the response times of the Worker for the function (for any request, if unknown),
+        # multiplied by the requests that would be in flight on it. Workers with no response time yet are tried first
+        def expected_latency(worker_id: str) -> float:
+            response_time_ewma = self._response_time_ewmas.get((worker_id, func_id), self._response_time_ewmas.get((worker_id, None), 0.0))
+            return response_time_ewma * (self._in_flight_requests.get(worker_id, 0) + 1)
+
+        start_index = self._round_robin_index % len(worker_ids)
+        self._round_robin_index += 1
+        rotated_worker_ids = worker_ids[start_index:] + worker_ids[:start_index]
+        return min(rotated_worker_ids, key=expected_latency)
+
+    def _affinity_key(self, header: dict, frames: list[bytes]) -> bytes:
+        # Identical calls of a function have identical arguments frames: they are hashed as they are, never decoded by the Director
+        if header.get('wire_version', 1) == 1:
+            arguments = json.dumps([header.get('positional_args'), header.get('default_args')], sort_keys=True).encode()
+        else:
+            arguments = b''.join(frames[1:])
+        return str(header.get('func_id')).encode() + b'\x00' + arguments
+
+    def _affinity_worker(self, worker_ids: list[str], affinity_key: bytes = None) -> str:
+        # Requests with no arguments to hash (e.g.: 'unregister') go to the least loaded Worker
+        if affinity_key is None:
+            return self._least_loaded_worker(worker_ids)
+
+        if self._hash_ring_members != self._workers.keys():
+            self._build_hash_ring()
+
+        # Bounded load: walking the ring clockwise from the hash of the call, the first Worker below its maximum load is chosen
+        candidate_worker_ids = set(worker_ids)
+        total_in_flight = sum(self._in_flight_requests.get(worker_id, 0) for worker_id in worker_ids) + 1
+        max_in_flight = math.ceil(self._affinity_load_factor * total_in_flight / len(worker_ids))
+        start_index = bisect.bisect(self._hash_ring_points, _hash_ring_point(affinity_key))
+        for offset in range(len(self._hash_ring_points)):
+            worker_id = self._hash_ring_worker_ids[(start_index + offset) % len(self._hash_ring_points)]
+            if worker_id in candidate_worker_ids and self._in_flight_requests.get(worker_id, 0) < max_in_flight:
+                return worker_id
+        return self._least_loaded_worker(worker_ids)
+
+    def _build_hash_ring(self) -> None:
+        hash_ring = sorted(
+            (_hash_ring_point(f'{worker_id}#{point_index}'.encode()), worker_id)
+            for worker_id in self._workers
+            for point_index in range(_HASH_RING_POINTS_PER_WORKER)
+        )
+        self._hash_ring_points = [point for point, _ in hash_ring]
+        self._hash_ring_worker_ids = [worker_id for _, worker_id in hash_ring]
+        self._hash_ring_members = frozenset(self._workers)
+
+    def _select_worker(self, func_id: str = None, affinity_key: bytes = None) -> str:
         '''
         Chooses a Worker ID from the pool of connected ones based on some policy.
 
         Args:
             func_id (str): In case of an 'exec' command request, the ID of the function that needs to be executed.
+            affinity_key (bytes): In case of an execution request and of the 'Affinity' strategy, the key hashed onto the
+                consistent-hash ring of the Workers (see _affinity_key()), so that identical calls go to the same Worker.
 
         Returns:
             str: the Worker ID that has been chosen.
@@ -292,22 +954,30 @@ class PyfaasDirector:
             raise DirectorNoAvailableWorkersError('No workers are available')
         
         # User requested a function execution operation (passed the target function's hash)
-        if func_id is not None:
+        # Unknown functions are handed to any Worker, which will answer with a 'no_func' error
+        if func_id is not None and func_id in self._functions_workers_map:
+            # Workers holding the function that are still registered
+            worker_ids = [worker_id for worker_id in self._functions_workers_map[func_id] if worker_id in self._workers]
+
             # Check if the function can be found only in a single worker (this means workers have not
             # been synchronized yet, if multiple)
-            if len(self._functions_workers_map[func_id]) != len(self._workers):
-                if len(self._functions_workers_map[func_id]) == 1:
-                    return self._functions_workers_map[func_id]
+            if worker_ids and len(worker_ids) != len(self._workers):
+                if len(worker_ids) == 1:
+                    return worker_ids[0]
                 else:       # If here, during synchronization one/more Workers failed to synchronize, choose one
                     match self._worker_selection_strategy:
                         case 'Round-Robin':
-                            worker_ids = self._functions_workers_map[func_id]           # It's a list
                             worker_id = worker_ids[self._round_robin_index % len(worker_ids)]
                             self._round_robin_index += 1
                             return worker_id
                         case 'Random':
-                            worker_id, _ = random.choice(self._functions_workers_map[func_id])
-                            return worker_id            
+                            return random.choice(worker_ids)
+                        case 'Least-Loaded':
+                            return self._least_loaded_worker(worker_ids)
+                        case 'Fastest':
+                            return self._fastest_worker(worker_ids, func_id)
+                        case 'Affinity':
+                            return self._affinity_worker(worker_ids, affinity_key)
 
         # Multiple Workers and possibly synchronized, choose worker
         match self._worker_selection_strategy:
@@ -319,12 +989,18 @@ class PyfaasDirector:
             case 'Random':
                 worker_id, _ = random.choice(list(self._workers.items()))
                 return worker_id
+            case 'Least-Loaded':
+                return self._least_loaded_worker(list(self._workers.keys()))
+            case 'Fastest':
+                return self._fastest_worker(list(self._workers.keys()), func_id)
+            case 'Affinity':
+                return self._affinity_worker(list(self._workers.keys()), affinity_key)
 
-    def _handle_worker_request(self, worker_id: str, json_payload: dict) -> None:
-        operation = json_payload.get('director_operation')
+    def _handle_worker_request(self, worker_id: str, header: dict, frames: list[bytes]) -> None:
+        operation = header.get('director_operation')
 
         if operation is None:
-            self._logger.warning(f"Worker {worker_id} sent malformed JSON: {json_payload}")
+            self._logger.warning(f"Worker {worker_id} sent malformed JSON: {header}")
             return
 
         match operation:
@@ -335,29 +1011,55 @@ class PyfaasDirector:
                 # 3) Director sends ACK msg
                 # 4) Worker receives ACK msg
 
+                # Wire format version negotiation: the highest version both sides support
+                # Workers not advertising their versions only speak version 1
+                common_wire_versions = set(header.get('wire_versions', [1])) & set(SUPPORTED_WIRE_VERSIONS)
+                if not common_wire_versions:
+                    self._logger.warning(f"Refused registration of worker '{worker_id}': no supported wire format version in {header.get('wire_versions')}")
+                    nack_msg = [worker_id.encode(), b'', json.dumps({'ACK': 'ERR', 'message': f'Supported wire format versions: {SUPPORTED_WIRE_VERSIONS}'}).encode()]
+                    self._zmq_socket.send_multipart(nack_msg)
+                    return
+                wire_version = max(common_wire_versions)
+
                 # Init dict entry for the new worker
                 with self._lock:
                     self._workers[worker_id] = {
                         'registered_at': datetime.datetime.now(),
-                        'last_heartbeat': datetime.datetime.now()
+                        'last_heartbeat': datetime.datetime.now(),
+                        'wire_version': wire_version,
+                        'codecs': header.get('codecs', [DEFAULT_CODEC]),    # Payload codecs the Worker can decode
+                        'tags': header.get('tags', [])                      # Used by clients to target some of the Workers
                     }
                 
-                # Send back ACK msg to worker that wants to register
-                ack_msg = [worker_id.encode(), b'', json.dumps({'ACK': 'OK'}).encode()]
+                # Send back ACK msg to worker that wants to register (single JSON frame, readable whatever the worker's version)
+                ack_msg = [worker_id.encode(), b'', json.dumps({'ACK': 'OK', 'wire_version': wire_version}).encode()]
                 self._zmq_socket.send_multipart(ack_msg)
-                self._logger.info(f"Worker '{worker_id}' registered and stored")
+                self._logger.info(f"Worker '{worker_id}' registered and stored (wire format version {wire_version})")
                 self._logger.debug(f'Current status of self._workers: {self._workers}')
 
                 self._last_worker_connection_ts = datetime.datetime.now()
             
             case 'forward_to_client':
-                original_client_operation = json_payload.get('original_client_operation')
+                original_client_operation = header.get('original_client_operation')
+
+                if original_client_operation == 'broadcast':
+                    # The response of every Worker is gathered into a single one for the client
+                    if header['message_id'] in self._pending_multiple_responses:
+                        # Nested into the gathered response, the frames must be representable by any codec
+                        worker_result = {'frames': [base64.b64encode(frame).decode('utf-8') for frame in frames]}
+                        self._gather_broadcast_response(header['message_id'], worker_id, worker_result)
+                    return
+
+                if original_client_operation in ('register', 'register_batch'):
+                    # The IDs of the functions the Worker now holds (registered by the request, or already held) travel in the header
+                    registered_func_ids = header.get('func_ids') or ([header['func_id']] if header.get('func_id') else [])
+                    self._record_function_holder(worker_id, registered_func_ids)
 
                 if original_client_operation == 'unregister':
                     # Need to collect every response to the 'unregister' command from the workers and
                     # forward to the client only one of them (otherwise it would receive multiple and break everything)
-                    request_id = json_payload['message_id']
-                    pending_responses = self._pending_multiple_responses[request_id]
+                    request_id = header['message_id']
+                    pending_responses = self._pending_multiple_responses.get(request_id)
                     if pending_responses is None:
                         return      # Already handled
                     
@@ -367,28 +1069,70 @@ class PyfaasDirector:
                         return
                     else:
                         del self._pending_multiple_responses[request_id]        # Can continue with sending the single message to the client
+                        header['message_id'] = pending_responses['message_id']    # Restoring the client's correlation ID
 
                 # The worker contacts the director to make it proxy the message to the client specified in the message
                 # The message contains the response for the client request
-                destination_client_id = json_payload['destination_client']
-                self._logger.debug(f"Received message to be forwarded to client '{destination_client_id}' from '{worker_id}': {json_payload}")
+                destination_client_id = header.pop('destination_client')      # Proxy message back to the client, stripped of unnecessary fields
+                if original_client_operation == 'exec_stream' and not header.get('partial'):
+                    self._active_streams.pop((destination_client_id, header.get('message_id')), None)      # End of the stream
+                active_upload = self._active_uploads.get((destination_client_id, header.get('message_id'))) if original_client_operation == 'upload_chunk' else None
+                if active_upload is not None:
+                    if header.get('status') != 'ok':
+                        # Rejected chunk, or undecodable upload: the Worker dropped the upload
+                        del self._active_uploads[(destination_client_id, header.get('message_id'))]
+                    else:
+                        active_upload['updated_at'] = time.monotonic()
+                        active_upload['uploaded'] = not header.get('partial')
+                coalesced_followers = []
+                if not header.get('partial'):
+                    forwarded_request = self._forwarded_requests.get((destination_client_id, header.get('message_id')))
+                    if forwarded_request is not None:
+                        if worker_id in forwarded_request['in_flight']:
+                            self._record_response_time(forwarded_request, worker_id)
+                        self._release_in_flight(forwarded_request, worker_id)
+                        if forwarded_request['answered_by'] not in (None, worker_id):
+                            # Late response of a hedged request: the client already got the other Worker's one
+                            self._logger.debug(f"Discarding response of '{worker_id}' to hedged request '{header.get('message_id')}'")
+                            return
+                        if forwarded_request['answered_by'] is None:
+                            coalesced_followers = self._pop_coalesced_followers((destination_client_id, header.get('message_id')), forwarded_request)
+                        if forwarded_request['answered_by'] is None and forwarded_request.get('cache_key') is not None:
+                            self._cache_response(forwarded_request, header, frames)
+                        if forwarded_request['answered_by'] is None and forwarded_request['func_id'] is not None:
+                            latencies = self._exec_latencies.setdefault(forwarded_request['func_id'], collections.deque(maxlen=_LATENCY_SAMPLES))
+                            latencies.append(time.monotonic() - forwarded_request['forwarded_at'])
+                        forwarded_request['answered_by'] = worker_id
+                        forwarded_request['hedge'] = None
+                self._logger.debug(f"Received message to be forwarded to client '{destination_client_id}' from '{worker_id}': {header}")
                 
-                # Proxy message back to the client, stripped of unnecessary fields
-                response = json_payload.copy()
-                response.pop('destination_client', None)        # Delete key if present
-                msg = [destination_client_id.encode(), b'', json.dumps(response).encode()]
-                self._zmq_socket.send_multipart(msg)
+                self._forward_to_client(destination_client_id, header, frames)
                 self._logger.debug(f'Routed to {destination_client_id}')
-
-                # Remove client from list of clients that are waiting for a response
-                with self._lock:
-                    self._currently_connected_clients.remove(destination_client_id)
+                for follower_client_id, follower_message_id in coalesced_followers:
+                    # Identical requests coalesced with the answered one get the same response
+                    self._forward_to_client(follower_client_id, {**header, 'message_id': follower_message_id}, frames)
 
             # Worker is responding to a 'sync_state_request' message from the Director
             # This incoming message can either be a response containing:
             #   - 'action': 'current_functions_state' -> the Worker is letting the Director know the functions he currently has available
             #   - 'action': 'function_code_request'   -> the Worker is requesting the Director for the code of the functions he misses
+            # With a sharded Director, a Worker announces to the other shards the functions registered or unregistered through one of them
+            # (or received by the synchronization run by shard 0), so that every shard routes the function calls to its holders
+            case 'functions_registered':
+                self._record_function_holder(worker_id, header.get('func_ids') or [])
+
+            case 'functions_unregistered':
+                for func_id in header.get('func_ids') or []:
+                    self._response_cache.invalidate_function(func_id)
+                    holder_worker_ids = self._functions_workers_map.get(func_id)
+                    if holder_worker_ids is not None and worker_id in holder_worker_ids:
+                        holder_worker_ids.remove(worker_id)
+                        if not holder_worker_ids:
+                            del self._functions_workers_map[func_id]
+                self._logger.debug(f'Workers-Functions state: {self._functions_workers_map}')
+
             case 'sync_state_response':
+                json_payload = decode_message(frames)
                 action = json_payload.get('action')
 
                 # Worker is providing its currently registered functions
@@ -420,9 +1164,8 @@ class PyfaasDirector:
 
         This function runs in a dedicated thread started in run().
         '''
-        while True:
-            # Try to synchronize Workers every self._synchronization_interval_ms milliseconds
-            time.sleep(self._synchronization_interval_ms / 1000)
+        # Try to synchronize Workers every self._synchronization_interval_ms milliseconds
+        while not self._threading_stop_event.wait(self._synchronization_interval_ms / 1000):
             if len(self._workers) <= 1:     # No workers to synchronize or just 1 registered Worker
                 continue
             if len(self._currently_connected_clients) != 0:     # Wait until no clients are being served
@@ -436,8 +1179,7 @@ class PyfaasDirector:
 
             # Send message to every connected Worker asking for its set of registered functions
             for worker_id in self._workers.keys():
-                request_state_msg = [worker_id.encode(), b'', json.dumps({'operation': 'sync_state_request'}).encode()]
-                self._zmq_socket.send_multipart(request_state_msg)
+                self._send_to_worker(worker_id, {'operation': 'sync_state_request'})
 
             # Wait for all the Workers' responses: watch dedicated queue
             functions_per_worker = {}       # Map to keep the functions received from each Worker in the next loop
@@ -457,18 +1199,18 @@ class PyfaasDirector:
 
             # Compute the set of functions whose code needs to be requested to Workers, 
             # so that is can be shared to the other Workers (aggregated)
-            function_code_to_be_requested = set(missing_functions_per_worker.keys())
+            function_code_to_be_requested = set().union(*missing_functions_per_worker.values())
 
             # Ask the Workers that have available the functions missing on other 
             # Workers to provide the code for such functions
             for func_id in function_code_to_be_requested:
-                target_worker = self._select_worker(func_id)        # Get Worker to contact to get such function code
+                # Get Worker to contact to get such function code: any of the ones holding it
+                target_worker = next(worker_id for worker_id, funcs in functions_per_worker.items() if func_id in funcs)
                 json_payload = {
                     'operation': 'sync_function_code_request',
                     'func_id': func_id
                 }
-                msg = [target_worker.encode(), b'', json.dumps(json_payload).encode()]
-                self._zmq_socket.send_multipart(msg)
+                self._send_to_worker(target_worker, json_payload)
                 self._logger.debug(f"Asked Worker '{target_worker}' for function code of function '{func_id}'")
             
             # Wait for as many messages as the number of single functions that need to be shared
@@ -484,10 +1226,9 @@ class PyfaasDirector:
             for worker_id, missing_functions in missing_functions_per_worker.items():
                 json_payload = {
                     'operation': 'sync_missing_function_code',
-                    'missing_functions_total': missing_functions_per_worker[worker_id]
+                    'missing_functions_total': len(missing_functions)
                 }
-                msg = [worker_id.encode(), b'', json.dumps(json_payload).encode()]
-                self._zmq_socket.send_multipart(msg)
+                self._send_to_worker(worker_id, json_payload)
 
             # Finally sending the actual functions' code
             for _ in function_code_to_be_requested:
@@ -497,21 +1238,42 @@ class PyfaasDirector:
                 # Send the code to the Workers that miss such function
                 json_payload['operation'] = 'sync_missing_function_code'
                 for worker_id in workers_per_missing_function[func_id]:
-                    msg = [worker_id.encode(), b'', json.dumps(json_payload).encode()]
-                    self._zmq_socket.send_multipart(msg)
+                    self._send_to_worker(worker_id, json_payload)
                     self._logger.debug(f"Sent to Worker '{worker_id}' the code for function '{func_id}'")
 
             with self._lock:
+                # Every synchronized Worker now holds every function
+                for func_id in all_functions:
+                    self._functions_workers_map[func_id] = list(functions_per_worker.keys())
                 self._workers_are_synchronized = True
 
+    # Must stay in line with pyfaas.util.serialization.compute_function_id(), used by clients to probe the cluster before registering,
+    # and with pyfaas_worker.app.util.general.compute_function_id(), used by Workers to register functions
     def _compute_function_id(self, func_name: str, func_code: str) -> str:
         return hashlib.sha256(f"{func_name}:{func_code}".encode()).hexdigest()
 
+    def _record_function_holder(self, worker_id: str, func_ids: list[str]) -> None:
+        for func_id in func_ids:
+            if not self._is_function_available(func_id):
+                self._functions_workers_map[func_id] = [worker_id]     # Until synchronized, the function can be found only on that Worker
+            elif worker_id not in self._functions_workers_map[func_id]:
+                self._functions_workers_map[func_id].append(worker_id)
+        if func_ids:
+            with self._lock:
+                self._workers_are_synchronized = False
+            self._logger.debug(f'Workers-Functions state: {self._functions_workers_map}')
+
+    def _is_function_available(self, func_id: str) -> bool:
+        '''
+        Checks whether at least one of the currently registered Workers holds the function identified by func_id.
+        '''
+        return any(worker_id in self._workers for worker_id in self._functions_workers_map.get(func_id, []))
+
     def _heartbeats_watcher(self) -> None:
         self._logger.info('Started worker unregistration check thread...')
-        while not self._threading_stop_event.is_set():
-            time.sleep(self._heartbeat_check_interval_ms / 1000)
+        while not self._threading_stop_event.wait(self._heartbeat_check_interval_ms / 1000):
             to_be_unregistered = []
+            self._discard_expired_uploads()
 
             with self._lock:
                 now = datetime.datetime.now()
@@ -534,25 +1296,61 @@ class PyfaasDirector:
                 except Exception as e:
                     self._logger.warning(f"Failed to notify worker '{worker_id}': {e}")
                 finally:
+                    dropped_requests = []
                     with self._lock:
                         if worker_id in self._workers:
                             self._logger.info(f"Worker '{worker_id}' unregistered")
                             del self._workers[worker_id]
+                        for request_key in [request_key for request_key, request_worker_id in list(self._active_streams.items()) if request_worker_id == worker_id]:
+                            del self._active_streams[request_key]
+                        for request_key in [request_key for request_key, active_upload in list(self._active_uploads.items()) if active_upload['worker_id'] == worker_id]:
+                            del self._active_uploads[request_key]
+                        # Retries of the requests forwarded to the dead Worker are handled as new requests
+                        for request_key, forwarded_request in list(self._forwarded_requests.items()):
+                            if worker_id in forwarded_request['worker_ids'] and not any(request_worker_id in self._workers for request_worker_id in forwarded_request['worker_ids']):
+                                del self._forwarded_requests[request_key]
+                                dropped_requests.append((request_key, forwarded_request))
+                    for request_key, forwarded_request in dropped_requests:
+                        self._fail_coalesced_followers(request_key, forwarded_request, f"Worker '{worker_id}' died while executing the identical request this one was coalesced with, retry it")
+
+    def _discard_expired_uploads(self) -> None:
+        # Uploads abandoned by their client: the Worker discards them too. A client still waiting for the upload's response is answered
+        now = time.monotonic()
+        with self._lock:
+            expired_uploads = [(request_key, active_upload) for request_key, active_upload in list(self._active_uploads.items()) if now - active_upload['updated_at'] > _UPLOAD_EXPIRATION_S]
+            for request_key, _ in expired_uploads:
+                del self._active_uploads[request_key]
+        for (client_id, upload_id), active_upload in expired_uploads:
+            self._logger.info(f"Discarding expired upload '{upload_id}' of client '{client_id}'")
+            if not active_upload['uploaded']:
+                err_response = {
+                    'message_id': upload_id,
+                    'status': 'err',
+                    'message': f'The upload received no chunk for {_UPLOAD_EXPIRATION_S} s and has been discarded'
+                }
+                self._send_to_client(client_id, err_response)
 
     def _cleanup(self) -> None:
         try:
             self._logger.info('Cleaning up Director resources...')
-            self._threading_stop_event.set()        # Signaling heartbeat thread to stop
-            if self._heartbeat_thread and self._heartbeat_thread.is_alive():
-                self._heartbeat_thread.join(timeout=2)           # Waiting for it to exit cleanly
-                self._logger.info('Successfully stopped worker heartbeat monitor thread')
+            self._threading_stop_event.set()        # Signaling heartbeat and synchronization threads to stop
+            for thread in (self._heartbeat_thread, self._worker_synchronizer_thread):
+                if thread and thread.is_alive():
+                    thread.join(timeout=2)           # Waiting for it to exit cleanly
+            self._logger.info('Successfully stopped worker heartbeat monitor and synchronization threads')
             self._zmq_socket.close(linger=0)
-            self._zmq_context.term()
+            if self._owns_zmq_context:
+                self._zmq_context.term()
             self._logger.info('Successfully closed ZeroMQ context and socket')
         except Exception as e:
             self._logger.warning(f'Error during cleanup: {e}')
 
 
+def _hash_ring_point(key: bytes) -> int:
+    # Position of a key on the consistent-hash ring, the same in every shard and run of the Director
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'big')
+
+
 def setup_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
     parser.add_argument('-c', '--config_file', default=None, help="The Director's configuration file path")
@@ -583,8 +1381,28 @@ def main():
 
     general.setup_logging(config['logging']['log_level'])
 
+    # Sharded Director: shards other than 0 run in their own processes, so that routing is not bound to a single core
+    shard_processes = []
+    for shard in range(1, config['network']['shards']):
+        shard_process = multiprocessing.Process(target=_run_shard, args=(config, shard), name=f'pyfaas-director-shard-{shard}', daemon=True)
+        shard_process.start()
+        shard_processes.append(shard_process)
+
     director = PyfaasDirector(config)
-    director.run()
+    try:
+        director.run()
+    finally:
+        for shard_process in shard_processes:
+            shard_process.terminate()
+            shard_process.join()
+
+
+def _run_shard(config: dict, shard: int) -> None:
+    general.setup_logging(config['logging']['log_level'])
+    try:
+        PyfaasDirector(config, shard=shard).run()
+    except KeyboardInterrupt:
+        pass            # Ctrl+C reaches the whole process group: shard 0 stops the shards
 
 
 if __name__ == '__main__':
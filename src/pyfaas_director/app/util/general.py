@@ -3,6 +3,7 @@ import logging
 import socket
 
 from ..exceptions import DirectorConfigError
+from .compression import COMPRESSION_ALGORITHMS
 
 
 def read_config_toml(path: str) -> dict:
@@ -30,10 +31,61 @@ def read_config_toml(path: str) -> dict:
         raise DirectorConfigError(f"Config error: invalid or missing field value for 'synchronization_interval_ms': {config['workers']['synchronization_interval_ms']}")
 
     # Checking worker selection strategy
-    allowed = ['Round-Robin', 'Random']
+    allowed = ['Round-Robin', 'Random', 'Least-Loaded', 'Fastest', 'Affinity']
     if config['workers']['worker_selection_strategy'] is None or config['workers']['worker_selection_strategy'] not in allowed:
         raise DirectorConfigError(f"Config error: invalid or missing field value for 'worker_selection_strategy': {config['workers']['worker_selection_strategy']}") 
 
+    # Checking the load bound of the 'Affinity' strategy (optional field)
+    config['workers'].setdefault('affinity_load_factor', 1.25)
+    if type(config['workers']['affinity_load_factor']) not in (int, float) or config['workers']['affinity_load_factor'] < 1:
+        raise DirectorConfigError(f"Config error: invalid value {config['workers']['affinity_load_factor']} for field 'affinity_load_factor'. A number not lower than 1 is needed")
+
+    # Checking backpressure fields (optional fields, the in-flight requests of the Workers are unbounded if missing)
+    config['workers'].setdefault('max_in_flight_per_worker', 0)
+    config['workers'].setdefault('max_queued_requests', 1024)
+    if type(config['workers']['max_in_flight_per_worker']) != int or config['workers']['max_in_flight_per_worker'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {config['workers']['max_in_flight_per_worker']} for field 'max_in_flight_per_worker'. A non-negative integer is needed")
+    if type(config['workers']['max_queued_requests']) != int or config['workers']['max_queued_requests'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {config['workers']['max_queued_requests']} for field 'max_queued_requests'. A non-negative integer is needed")
+
+    # Checking number of shards (optional field, the Director is a single routing process if missing)
+    config['network'].setdefault('shards', 1)
+    if type(config['network']['shards']) != int or config['network']['shards'] < 1:
+        raise DirectorConfigError(f"Config error: invalid value {config['network']['shards']} for field 'shards'. A positive integer is needed")
+
+    # Checking compression fields (optional section, compression is disabled if missing)
+    compression_config = config.setdefault('compression', {})
+    compression_config.setdefault('algorithm', 'none')
+    compression_config.setdefault('level', 6)
+    compression_config.setdefault('threshold_bytes', 65536)
+    if compression_config['algorithm'] not in COMPRESSION_ALGORITHMS:
+        raise DirectorConfigError(f"Config error: unsupported compression algorithm '{compression_config['algorithm']}'. Available algorithms: {COMPRESSION_ALGORITHMS}")
+    if type(compression_config['level']) != int or not 0 <= compression_config['level'] <= 9:
+        raise DirectorConfigError(f"Config error: invalid value {compression_config['level']} for field 'level'. An integer between 0 and 9 is needed")
+    if type(compression_config['threshold_bytes']) != int or compression_config['threshold_bytes'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {compression_config['threshold_bytes']} for field 'threshold_bytes'")
+
+    # Checking hedging fields (optional section)
+    hedging_config = config.setdefault('hedging', {})
+    hedging_config.setdefault('percentile', 95)
+    hedging_config.setdefault('min_samples', 20)
+    hedging_config.setdefault('min_delay_ms', 10)
+    if type(hedging_config['percentile']) not in (int, float) or not 0 < hedging_config['percentile'] <= 100:
+        raise DirectorConfigError(f"Config error: invalid value {hedging_config['percentile']} for field 'percentile'. A number between 0 (excluded) and 100 is needed")
+    if type(hedging_config['min_samples']) != int or hedging_config['min_samples'] < 1:
+        raise DirectorConfigError(f"Config error: invalid value {hedging_config['min_samples']} for field 'min_samples'. A positive integer is needed")
+    if type(hedging_config['min_delay_ms']) not in (int, float) or hedging_config['min_delay_ms'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {hedging_config['min_delay_ms']} for field 'min_delay_ms'")
+
+    # Checking response caching fields (optional section, the Director caches no response if missing)
+    caching_config = config.setdefault('caching', {})
+    caching_config.setdefault('max_size', 0)
+    caching_config.setdefault('ttl_s', 0)
+    if type(caching_config['max_size']) != int or caching_config['max_size'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {caching_config['max_size']} for field 'max_size'. A non-negative integer is needed")
+    if type(caching_config['ttl_s']) not in (int, float) or caching_config['ttl_s'] < 0:
+        raise DirectorConfigError(f"Config error: invalid value {caching_config['ttl_s']} for field 'ttl_s'")
+
     return config
 
 def setup_logging(log_level: str) -> None:
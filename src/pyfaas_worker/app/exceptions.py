@@ -18,3 +18,9 @@ class WorkerFunctionCacheError(WorkerError):
 
 class WorkerFunctionExecutionError(WorkerError):
     pass
+
+class WorkerStreamError(WorkerError):
+    pass
+
+class WorkerDeadlineExceededError(WorkerError):
+    pass
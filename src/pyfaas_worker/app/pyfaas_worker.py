@@ -9,12 +9,17 @@ import threading
 import zmq
 import sys
 import queue
-import base64
 import argparse
+import socket
+import collections
 
 from pathlib import Path
 from pyfaas_worker.app.util import general
 from pyfaas_worker.app.util.file_logger import FileLogger
+from pyfaas_worker.app.util.wire import encode_message, decode_message, SUPPORTED_WIRE_VERSIONS
+from pyfaas_worker.app.util.compression import FrameCompressor
+from pyfaas_worker.app.util.codec import available_codecs
+from pyfaas_worker.app.util.sharding import shard_endpoint, client_shard
 from pyfaas_worker.app.worker_caching.func_cache import WorkerFunctionExecutionCache
 from pyfaas_worker.app.exceptions import *
 from pyfaas_worker.app.worker_operations import WorkerOperations
@@ -22,8 +27,20 @@ from pyfaas_worker.app.worker_operations import WorkerOperations
 
 _DEFAULT_TOML_CONFIG_FILE = 'pyfaas_worker/worker_config.toml'
 
+# Client requests answered by a single response, that clients retry with the same message_id when the response is late.
+# A repeated request gets the stored response (or nothing, if it is still being handled) instead of being handled again
+_DEDUPLICATED_OPERATIONS = ('register', 'register_batch', 'exec', 'broadcast', 'map', 'chain_exec', 'list', 'get_stats', 'get_worker_info', 'get_cache_dump', 'PING')
+# Marks the requests handled whose response is not kept (see 'dedup_table_max_bytes'): their retries get an error, not a second execution
+_RESPONSE_NOT_KEPT = 'response_not_kept'
+
 class PyfaasWorker:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, zmq_context: zmq.Context = None):
+        '''
+        Args:
+            config (dict): The Worker configuration, as read by read_config_toml().
+            zmq_context (zmq.Context): A ZeroMQ context shared with the Director running in the same process, needed to connect
+                to an 'inproc://' endpoint (see pyfaas.local_cluster). None: the Worker creates its own.
+        '''
         self._logger = logging.getLogger('pyfaas.worker')
 
         self._id = f'worker-{uuid.uuid4()}'
@@ -45,21 +62,55 @@ class PyfaasWorker:
 
         self._director_host = self._config['network']['director_ip_addr']
         self._director_port = self._config['network']['director_port']
+        # Optional ZeroMQ endpoint of the Director, instead of tcp://<director_ip_addr>:<director_port> (e.g.: 'ipc:///tmp/pyfaas.sock')
+        self._director_endpoint = self._config['network'].get('director_endpoint') or f'tcp://{self._director_host}:{self._director_port}'
+        # Shards of the Director (see pyfaas_worker.app.util.sharding): the Worker connects to every one of them
+        self._director_shards = self._config['network'].get('director_shards', 1)
         self._hearbeat_interval_ms = self._config['network']['heartbeat_interval_ms']
 
+        # Compresses the large frames of the messages sent to the Director (e.g.: big function results)
+        self._compressor = FrameCompressor(**self._config.get('compression', {}))
+
         # Multiple tyhreads could access self._functions, self._stats, self._function_exec_cache
         self._lock = threading.RLock()
 
+        # Request fields uploaded in chunks by clients, waiting for the request they belong to ('upload_chunk' requests)
+        #   - Key: upload ID (message_id of the chunks)
+        #   - Value: {'data': bytearray, 'frame_sizes': list[int], 'received_bytes': int, 'fields': dict | None, 'updated_at': float}
+        self._uploads = {}
+
+        # Latest requests handled, to recognize the retries of clients (see _DEDUPLICATED_OPERATIONS). Bounded: the oldest entries are evicted first.
+        # The kept responses are bounded in bytes too: past the limit, the oldest ones are replaced with _RESPONSE_NOT_KEPT
+        #   - Key: (requester client ID, message_id of the request)
+        #   - Value: the encoded response frames, None while the request is being handled, _RESPONSE_NOT_KEPT if they are not kept
+        self._handled_requests = collections.OrderedDict()
+        self._handled_requests_max_size = self._config['behavior'].get('dedup_table_size', 1024)
+        self._handled_requests_max_bytes = self._config['behavior'].get('dedup_table_max_bytes', 64 * 1024 * 1024)
+        self._handled_requests_bytes = 0        # Total size of the kept response frames
+
+        # Flow control state of the streams being produced ('exec_stream' requests)
+        #   - Key: message_id of the request
+        #   - Value: {'credits': threading.Semaphore, 'cancelled': bool}
+        self._streams = {}
+
         # Heartbeat thread
         self._heartbeat_thread = None
         self._threading_stop_event = threading.Event()
 
         # --- ZeroMQ vars ---
-        self._zmq_context = zmq.Context()
-        self._zmq_socket = self._zmq_context.socket(zmq.DEALER)
-        self._zmq_socket.setsockopt_string(zmq.IDENTITY, self._id)
-
-        self._outgoing_tx_queue = queue.Queue()         # Queue of messages to send to the Director
+        self._owns_zmq_context = zmq_context is None       # A shared context is terminated by its owner
+        self._zmq_context = zmq_context if zmq_context is not None else zmq.Context()
+        self._zmq_sockets = []                          # One per shard of the Director, all with the same identity
+        for _ in range(self._director_shards):
+            zmq_socket = self._zmq_context.socket(zmq.DEALER)
+            zmq_socket.setsockopt_string(zmq.IDENTITY, self._id)
+            self._zmq_sockets.append(zmq_socket)
+
+        self._outgoing_tx_queue = queue.Queue()         # Queue of (shard, message) to send to the Director
+        # Writing a byte to the wakeup socket pair wakes the I/O thread up as soon as a message is queued
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wire_version = 1                          # Wire format version spoken with the Director, negotiated upon registration
         self._io_thread = threading.Thread(             # Dedicated ZMQ I/O thread (started in run())
             target=self._socket_loop,
             daemon=True
@@ -125,24 +176,38 @@ class PyfaasWorker:
         self._last_client_connection_ts = None
 
     def _register_to_director(self) -> None:
-        director_connection_str = f'tcp://{self._director_host}:{self._director_port}'
-        self._zmq_socket.connect(director_connection_str)
+        for shard, zmq_socket in enumerate(self._zmq_sockets):
+            self._register_to_director_shard(zmq_socket, shard_endpoint(self._director_endpoint, shard))
+
+    def _register_to_director_shard(self, zmq_socket: zmq.Socket, director_endpoint: str) -> None:
+        zmq_socket.connect(director_endpoint)
         
-        registration_msg = [b'', json.dumps({'operation': 'worker_registration'}).encode()]   # Worker ID automatically included by ZeroMQ (see call to setsockopt in __int__)
-        self._zmq_socket.send_multipart(registration_msg)
+        # Sent as a single JSON frame, readable by a Director speaking any wire format version
+        registration_json_payload = {
+            'director_operation': 'worker_registration',
+            'wire_versions': SUPPORTED_WIRE_VERSIONS,       # The Director picks the highest version both sides support
+            'tags': self._config['behavior'].get('tags', []),   # Clients can target the Workers having some tags (e.g.: 'broadcast' requests)
+            'codecs': available_codecs()                    # Requests using other codecs are converted by the Director
+        }
+        registration_msg = [b'', json.dumps(registration_json_payload).encode()]   # Worker ID automatically included by ZeroMQ (see call to setsockopt in __int__)
+        zmq_socket.send_multipart(registration_msg)
 
         # Polling for director ACK: wait for up to 10s
         poller = zmq.Poller()
-        poller.register(self._zmq_socket, zmq.POLLIN)
+        poller.register(zmq_socket, zmq.POLLIN)
         sockets = dict(poller.poll(timeout=10000))
 
-        if self._zmq_socket in sockets:
-            ack_msg_parts = self._zmq_socket.recv_multipart()   # Receiving [empty][JSON_payload]
+        if zmq_socket in sockets:
+            ack_msg_parts = zmq_socket.recv_multipart()   # Receiving [empty][JSON_payload]
             ack_msg = json.loads(ack_msg_parts[-1].decode())
             if ack_msg.get('ACK') == 'OK':
-                self._logger.info(f'Connected and registered to director at {self._director_host}:{self._director_port}')
+                self._wire_version = ack_msg.get('wire_version', 1)     # Directors not negotiating the version only speak version 1
+                self._logger.info(f'Connected and registered to director at {self._director_endpoint} (wire format version {self._wire_version})')
+            else:
+                self._logger.error(f"Registration refused by Director at {self._director_endpoint}: {ack_msg.get('message')}")
+                self._kill_worker(cause='registration_refused')
         else:
-            self._logger.error(f'No ACK received from Director at {self._director_host}:{self._director_port} within time limits (10s)')
+            self._logger.error(f'No ACK received from Director at {self._director_endpoint} within time limits (10s)')
             self._kill_worker(cause='director_unreachable')
 
     def run(self) -> None:
@@ -161,30 +226,54 @@ class PyfaasWorker:
         # Starting dedicated ZMQ I/O thread -> executes _socket_loop()
         self._io_thread.start()
 
-        # Keeping main thread alive
+        # Keeping main thread alive, until Ctrl+C or a call to stop()
         try:
-            while self._running:
-                time.sleep(1)
+            self._threading_stop_event.wait()
         except KeyboardInterrupt:
             self._logger.info('Ctrl+C pressed, exiting...')
             self._logger.info('Goodbye')
             self._cleanup()
+            return
+
+        # Stopped by stop(): the socket is closed once the I/O thread, its owner, is done with it
+        self._running = False
+        self._io_thread.join(timeout=2)
+        self._cleanup()
+        for zmq_socket in self._zmq_sockets:
+            zmq_socket.close(linger=0)
+        if self._owns_zmq_context:
+            self._zmq_context.term()
+
+    def stop(self) -> None:
+        '''
+        Makes run() return, from another thread. Requests being executed are not waited for.
+        '''
+        self._threading_stop_event.set()
 
     # ZMQ socket loop (single thread)
     def _socket_loop(self) -> None:
         # Setting up polling to catch Ctrl+C
         poller = zmq.Poller()
-        poller.register(self._zmq_socket, zmq.POLLIN)
+        for zmq_socket in self._zmq_sockets:
+            poller.register(zmq_socket, zmq.POLLIN)
+        poller.register(self._wakeup_receiver, zmq.POLLIN)
 
         while self._running:
             sockets = dict(poller.poll(timeout=100))
+            if self._wakeup_receiver.fileno() in sockets:
+                try:
+                    self._wakeup_receiver.recv(4096)
+                except BlockingIOError:
+                    pass
 
             # --- Incoming messages handler ---
-            if self._zmq_socket in sockets:
-                director_msg_parts = self._zmq_socket.recv_multipart()      # Receiving [empty][JSON_payload]
-                json_payload = json.loads(director_msg_parts[-1].decode())
+            for zmq_socket in self._zmq_sockets:
+                if zmq_socket not in sockets:
+                    continue
+                _, *director_msg_frames = zmq_socket.recv_multipart()      # Receiving [empty][header][payload][binary frames]
+                json_payload = decode_message(director_msg_frames)
 
-                self._logger.debug(f"Received '{json_payload}' from director")
+                self._logger.debug(f"Received '{json_payload.get('operation')}' request '{json_payload.get('message_id')}' from director")      # Payloads may be large (e.g.: uploaded chunks)
                 self._request_count += 1
                 
                 # Starting incoming request handler thread
@@ -198,22 +287,76 @@ class PyfaasWorker:
             # --- Outgoing messages handler ---
             while True:
                 try:
-                    outgoing_msg = self._outgoing_tx_queue.get_nowait()
-                    self._zmq_socket.send_multipart(outgoing_msg)
+                    shard, outgoing_msg = self._outgoing_tx_queue.get_nowait()
+                    self._zmq_sockets[shard].send_multipart(outgoing_msg)
                 except queue.Empty:
                     break           # Send until empty queue
         
     def _handle_incoming_request(self, command: str, json_payload: dict) -> None:
+        if command in _DEDUPLICATED_OPERATIONS and not self._start_request(json_payload):
+            return          # Retry of a request already handled, or still being handled
+
+        if json_payload.get('upload_id') is not None:
+            # The large fields of the request (e.g.: function arguments) have been uploaded beforehand, in chunks
+            uploaded_fields = self._operations.claim_upload(json_payload['upload_id'])
+            if uploaded_fields is None:
+                client_json_response = self._operations._build_JSON_response(
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
+                    dest_client=json_payload.get('requester'), 
+                    director_operation='forward_to_client', 
+                    original_client_operation=command,
+                    status='err', 
+                    action='no_upload', 
+                    result_type=None, 
+                    result=None, 
+                    message=f"No completed upload with ID '{json_payload['upload_id']}' is held by the Worker"
+                )
+                self._send_to_director(client_json_response)
+                return
+            json_payload.update(uploaded_fields)
+
+        if self._operations.deadline_exceeded(json_payload):
+            # The request expired while queued: nobody waits for its response any more, the work is skipped
+            self._logger.info(f"Skipping '{command}' request '{json_payload.get('message_id')}': its deadline has expired")
+            self._operations.send_deadline_exceeded_response(json_payload, command, f"The deadline of the '{command}' request expired before its execution")
+            return
+
+        try:
+            self._dispatch_request(command, json_payload)
+        except Exception as e:
+            self._logger.error(f"Error while handling '{command}' request '{json_payload.get('message_id')}': {e}")
+            self._file_logger.log('ERROR', f"Request handling error ({command}): {e}")
+            if command in _DEDUPLICATED_OPERATIONS:
+                self._fail_request(command, json_payload, e)
+
+    def _dispatch_request(self, command: str, json_payload: dict) -> None:
         match command:
             case 'register':
                 self._operations.execute_register_cmd(json_payload)
 
+            case 'register_batch':
+                self._operations.execute_register_batch_cmd(json_payload)
+
             case 'unregister':
                 self._operations.execute_unregister_cmd(json_payload)
 
-            case 'exec':
+            case 'exec' | 'broadcast':
+                # 'broadcast' requests are 'exec' requests sent by the Director to several Workers
                 self._operations.execute_exec_cmd(json_payload)
 
+            case 'exec_stream':
+                self._operations.execute_exec_stream_cmd(json_payload)
+
+            case 'stream_credit':
+                self._operations.execute_stream_credit_cmd(json_payload)
+
+            case 'upload_chunk':
+                self._operations.execute_upload_chunk_cmd(json_payload)
+
+            case 'map':
+                self._operations.execute_map_cmd(json_payload)
+
             case 'list':
                 self._operations.execute_list_cmd(json_payload)
 
@@ -251,32 +394,166 @@ class PyfaasWorker:
                 self._file_logger.log('WARNING', f"Unknown command: '{command}'")
                 self._logger.warning(f"Client specified unknown command '{command}'")
 
+    def _start_request(self, json_payload: dict) -> bool:
+        '''
+        Records a client request as being handled, unless it is the retry of a request already received.
+        The retry of an answered request gets the stored response again.
+
+        Returns:
+            bool: True if the request has to be handled, False if it is a retry.
+        '''
+        if self._handled_requests_max_size == 0:
+            return True         # Deduplication disabled
+
+        request_key = (json_payload.get('requester'), json_payload.get('message_id'))
+        with self._lock:
+            if request_key not in self._handled_requests:
+                self._handled_requests[request_key] = None
+                while len(self._handled_requests) > self._handled_requests_max_size:
+                    _, evicted_response_frames = self._handled_requests.popitem(last=False)
+                    self._handled_requests_bytes -= _response_size(evicted_response_frames)
+                return True
+            self._handled_requests.move_to_end(request_key)
+            response_frames = self._handled_requests[request_key]
+
+        if response_frames is None:
+            self._logger.debug(f"Request '{request_key[1]}' from '{request_key[0]}' is already being handled, ignoring its retry")
+        elif response_frames == _RESPONSE_NOT_KEPT:
+            self._logger.debug(f"Request '{request_key[1]}' from '{request_key[0]}' has already been handled, its response has not been kept")
+            client_json_response = self._operations._build_JSON_response(
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
+                dest_client=request_key[0], 
+                director_operation='forward_to_client', 
+                original_client_operation=json_payload.get('operation'),
+                status='err', 
+                action='response_not_kept', 
+                result_type=None, 
+                result=None, 
+                message='The request has already been handled, but its response was too large to be kept for retries'
+            )
+            self._send_to_director(client_json_response)
+        else:
+            self._logger.debug(f"Request '{request_key[1]}' from '{request_key[0]}' has already been handled, sending its response again")
+            self._enqueue_outgoing(response_frames, self._director_shard_of(request_key[0]))
+        return False
+
+    def _fail_request(self, command: str, json_payload: dict, error: Exception) -> None:
+        '''
+        Answers a deduplicated request whose handler raised before sending its final response with an error.
+        The error response is stored as the response of the request: its retries get it too, instead of being ignored forever.
+        '''
+        request_key = (json_payload.get('requester'), json_payload.get('message_id'))
+        with self._lock:
+            if self._handled_requests_max_size > 0 and self._handled_requests.get(request_key) is not None:
+                return          # The final response had already been sent
+        client_json_response = self._operations._build_JSON_response(
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
+            dest_client=json_payload.get('requester'), 
+            director_operation='forward_to_client', 
+            original_client_operation=command,
+            status='err', 
+            action=None, 
+            result_type=None, 
+            result=None, 
+            message=f"Error while handling the '{command}' request: {error}"
+        )
+        self._send_to_director(client_json_response)
+
     def _forward_function_code(self, json_payload: dict) -> None:
         '''
         TODO: 
         '''
         requested_func_id = json_payload.get('func_id')
         requested_func_code = self._functions[requested_func_id]['code']
-        serialized_func = dill.dumps(requested_func_code)
-        serialized_func_base64 = base64.b64encode(serialized_func).decode('utf-8')
         director_json_response = {
-            'operation': 'sync_state_response',
+            'director_operation': 'sync_state_response',
             'action': 'function_code_response',
             'func_id': requested_func_id,
-            'serialized_func_base64': serialized_func_base64
+            'func_code': dill.dumps(requested_func_code)
         }
-        response = [b'', json.dumps(director_json_response).encode()]
-        self._outgoing_tx_queue.put(response)
+        self._send_to_director(director_json_response)
+
+    def _send_to_director(self, json_payload: dict) -> None:
+        '''
+        Encodes a message with the negotiated wire format version and queues it for the I/O thread.
+
+        A function result that the codec of the request cannot represent is sent dill-serialized, as a binary frame.
+        '''
+        try:
+            msg_frames = encode_message(json_payload, self._wire_version, self._compressor)
+        except TypeError:
+            if json_payload.get('result_type') != 'json':
+                raise
+            json_payload = {**json_payload, 'result': dill.dumps(json_payload['result']), 'result_type': 'pickle'}
+            msg_frames = encode_message(json_payload, self._wire_version, self._compressor)
+
+        if json_payload.get('destination_client') is not None and not json_payload.get('partial'):
+            # Final response to a client request: kept for the retries of the request, if it is deduplicated
+            request_key = (json_payload['destination_client'], json_payload.get('message_id'))
+            with self._lock:
+                if request_key in self._handled_requests:
+                    self._keep_response(request_key, [b'', *msg_frames])
+        self._enqueue_outgoing([b'', *msg_frames], self._director_shard_of(json_payload.get('destination_client')))
+
+    def _keep_response(self, request_key: tuple[str, str], response_frames: list[bytes]) -> None:
+        '''
+        Keeps the response to a handled request for its retries, within 'dedup_table_max_bytes': the oldest kept responses
+        make room for it, a response larger than the limit is not kept. Called with self._lock held.
+        '''
+        if self._handled_requests[request_key] == _RESPONSE_NOT_KEPT:
+            return          # Error response to the retry of a request whose response has not been kept: the request stays marked
+        self._handled_requests_bytes -= _response_size(self._handled_requests[request_key])
+        if _response_size(response_frames) > self._handled_requests_max_bytes:
+            self._handled_requests[request_key] = _RESPONSE_NOT_KEPT
+            return
+
+        self._handled_requests[request_key] = response_frames
+        self._handled_requests_bytes += _response_size(response_frames)
+        for kept_request_key, kept_response_frames in self._handled_requests.items():
+            if self._handled_requests_bytes <= self._handled_requests_max_bytes:
+                break
+            if kept_request_key != request_key and kept_response_frames not in (None, _RESPONSE_NOT_KEPT):
+                self._handled_requests[kept_request_key] = _RESPONSE_NOT_KEPT
+                self._handled_requests_bytes -= _response_size(kept_response_frames)
+
+    def _announce_functions(self, director_operation: str, func_ids: list[str], informed_shard: int | None) -> None:
+        '''
+        With a sharded Director, lets every shard route to the functions this Worker holds: the shard that handled the request
+        changing them (informed_shard, None if none did) learns it from the response, the other ones from this announcement.
+
+        Args:
+            director_operation (str): 'functions_registered' or 'functions_unregistered'.
+            func_ids (list[str]): The IDs of the registered or unregistered functions.
+            informed_shard (int | None): The shard already aware of the change.
+        '''
+        if self._director_shards == 1 or not func_ids:
+            return
+        announcement_msg = [b'', *encode_message({'director_operation': director_operation, 'func_ids': func_ids}, self._wire_version)]
+        for shard in range(self._director_shards):
+            if shard != informed_shard:
+                self._enqueue_outgoing(announcement_msg, shard)
+
+    def _enqueue_outgoing(self, msg: list[bytes], shard: int = 0) -> None:
+        # The sockets are owned by the I/O thread, not thread-safe: messages are handed to it
+        self._outgoing_tx_queue.put((shard, msg))
+        self._wakeup_sender.send(b'\x00')
+
+    def _director_shard_of(self, client_id: str | None) -> int:
+        # Responses go to the shard of the Director owning the client, every other message (e.g.: synchronization) to shard 0
+        if client_id is None or self._director_shards == 1:
+            return 0
+        return client_shard(client_id, self._director_shards)
 
     def _synchronize_state(self):
         # Send to Director the function IDs of the functions registered on this Worker
         synch_json_response = {
-            'operation': 'sync_state_response',
+            'director_operation': 'sync_state_response',
             'action': 'current_functions_state',
             'functions': list(self._functions.keys())   # Send just the IDs, code will be received later on, if needed
         }
-        response = [b'', json.dumps(synch_json_response).encode()]
-        self.worker._outgoing_tx_queue.put(response)
+        self._send_to_director(synch_json_response)
         
         # Wait for the missing functions' code and update
         # First message of this kind contains the number of messages
@@ -285,14 +562,12 @@ class PyfaasWorker:
         missing_functions_total = missing_functions_total_msg.get('missing_functions_total')
         self._logger.debug(f'Sync: waiting for the code of {missing_functions_total} function(s)')
         
-        if missing_functions_total != 0:        # Receiving the messages with the codes
+        synchronized_func_ids = []
+        for _ in range(missing_functions_total):        # Receiving the messages with the codes
             missing_function_code_msg = self._incoming_sync_function_code_queue.get()      # Blocks waiting for a message
 
             func_id = missing_function_code_msg['func_id']
-            serialized_func_base64 = missing_function_code_msg['serialized_func_base64']
-
-            serialized_func_bytes = base64.b64decode(serialized_func_base64)
-            final_function = dill.loads(serialized_func_bytes)
+            final_function = dill.loads(missing_function_code_msg['func_code'])
             func_name = final_function.__name__
 
             with self._lock:
@@ -300,8 +575,11 @@ class PyfaasWorker:
                 self._functions[func_id]['name'] = func_name
                 self._functions[func_id]['code'] = final_function
                 self._functions[func_id]['registering_client'] = None    # TODO: what do we do here??????
+            synchronized_func_ids.append(func_id)
             self._logger.debug(f"Sync: added function '{func_id}' to the set of available functions")    
 
+        self._announce_functions('functions_registered', synchronized_func_ids, informed_shard=0)     # Shard 0 runs the synchronization
+
         self._logger.debug('Sync: finished synchronization procedure')
 
     def _dump_worker_state(self) -> None:       # TODO: unfinished function?
@@ -343,22 +621,42 @@ class PyfaasWorker:
                 self._file_logger.log('ERROR', f'Unable to dump worker state: {e}')
 
     def _kill_worker(self, cause: str):
+        '''
+        Stops the Worker for good. A Worker running in its own process exits with an error code; one embedded in another
+        process (sharing the ZeroMQ context of its owner, e.g.: in a LocalCluster) must not end that process, and raises instead.
+
+        Raises:
+            WorkerDirectorConnectionError: Raised if the ZeroMQ context is not owned by the Worker.
+        '''
         if cause == 'director_unreachable':
             self._logger.info(f'Worker killed at {datetime.datetime.now()}: director unreachable')
+        elif cause == 'registration_refused':
+            self._logger.info(f'Worker killed at {datetime.datetime.now()}: registration refused by the director')
         try:
-            self._zmq_socket.close(linger=0)
-            self._zmq_context.term()
+            for zmq_socket in self._zmq_sockets:
+                zmq_socket.close(linger=0)
+            if self._owns_zmq_context:
+                self._zmq_context.term()
         except Exception as e:
             self._logger.warning(f"Error during socket cleanup: {e}")
         self._file_logger.log('INFO', f'Worker killed. Cause: {cause}')
         self._cleanup()
+        if not self._owns_zmq_context:
+            raise WorkerDirectorConnectionError(f'Worker killed. Cause: {cause}')
         sys.exit(1)         # Exiting immediately with error code
 
     def _send_heartbeat(self) -> None:
-        heartbeat_msg = [b'', json.dumps({'operation': 'heartbeat'}).encode()]       # Worker ID automatically included by ZeroMQ (see call to setsockopt in __int__)
-        while not self._threading_stop_event.is_set():
-            time.sleep(self._hearbeat_interval_ms / 1000)
-            self._zmq_socket.send_multipart(heartbeat_msg)
+        heartbeat_msg = [b'', *encode_message({'director_operation': 'heartbeat'}, self._wire_version)]       # Worker ID automatically included by ZeroMQ (see call to setsockopt in __int__)
+        while not self._threading_stop_event.wait(self._hearbeat_interval_ms / 1000):
+            for shard in range(self._director_shards):      # Every shard of the Director watches the Worker
+                self._enqueue_outgoing(heartbeat_msg, shard)
+
+
+def _response_size(response_frames: list[bytes] | str | None) -> int:
+    # Bytes held by an entry of PyfaasWorker._handled_requests
+    if response_frames is None or response_frames == _RESPONSE_NOT_KEPT:
+        return 0
+    return sum(len(frame) for frame in response_frames)
 
 
 def setup_parser() -> argparse.ArgumentParser:
@@ -0,0 +1,91 @@
+import json
+import pickle
+import importlib.util
+
+
+DEFAULT_CODEC = 'json'
+
+
+class Codec:
+    '''
+    Serializer of the payload frame of a message (wire format version 2).
+
+    encode() returns the payload frame, possibly followed by out-of-band buffer frames, and raises TypeError
+    if the object cannot be represented by the codec. decode() is given the same frames back.
+    '''
+    name = None
+
+    def encode(self, obj: object) -> list:
+        raise NotImplementedError
+
+    def decode(self, frames: list) -> object:
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    name = 'json'
+
+    def encode(self, obj: object) -> list:
+        try:
+            return [json.dumps(obj).encode()]
+        except (TypeError, ValueError, OverflowError) as e:
+            raise TypeError(f"Object not serializable by the '{self.name}' codec: {e}")
+
+    def decode(self, frames: list) -> object:
+        return json.loads(frames[0])
+
+
+class MsgpackCodec(Codec):
+    '''
+    The msgpack module is imported on first use, not along with this module.
+    '''
+    name = 'msgpack'
+
+    def encode(self, obj: object) -> list:
+        import msgpack
+        try:
+            return [msgpack.packb(obj, use_bin_type=True)]
+        except (TypeError, ValueError, OverflowError) as e:
+            raise TypeError(f"Object not serializable by the '{self.name}' codec: {e}")
+
+    def decode(self, frames: list) -> object:
+        import msgpack
+        return msgpack.unpackb(frames[0], raw=False, strict_map_key=False)
+
+
+class PickleCodec(Codec):
+    '''
+    Pickle protocol 5: buffers of objects supporting it (e.g.: bytearrays, NumPy arrays) are sent out-of-band,
+    as separate frames, instead of being copied into the pickle stream.
+    '''
+    name = 'pickle'
+
+    def encode(self, obj: object) -> list:
+        buffers = []
+        try:
+            data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise TypeError(f"Object not serializable by the '{self.name}' codec: {e}")
+        return [data, *(buffer.raw() for buffer in buffers)]
+
+    def decode(self, frames: list) -> object:
+        return pickle.loads(frames[0], buffers=frames[1:])
+
+
+_CODECS = {codec.name: codec for codec in (JSONCodec(), PickleCodec())}
+if importlib.util.find_spec('msgpack') is not None:     # Optional dependency: the 'msgpack' codec is available only if installed
+    _CODECS[MsgpackCodec.name] = MsgpackCodec()
+
+
+def available_codecs() -> list[str]:
+    return list(_CODECS.keys())
+
+
+def get_codec(codec_name: str) -> Codec:
+    '''
+    Raises:
+        ValueError: Raised if no codec named codec_name is available.
+    '''
+    if codec_name not in _CODECS:
+        raise ValueError(f"Unsupported codec '{codec_name}'. Available codecs: {available_codecs()}")
+    return _CODECS[codec_name]
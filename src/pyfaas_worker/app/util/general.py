@@ -1,8 +1,11 @@
 import tomli
 import logging
 import socket
+import base64
+import hashlib
 
 from pyfaas_worker.app.exceptions import WorkerConfigError
+from pyfaas_worker.app.util.compression import COMPRESSION_ALGORITHMS
 
 
 def read_config_toml(path: str) -> dict:
@@ -19,6 +22,11 @@ def read_config_toml(path: str) -> dict:
     if config['network']['director_port'] is None or config['network']['director_port'] <= 1024 or config['network']['director_port'] >= 65535:
         raise WorkerConfigError(f"Config error: invalid field value for 'director_port': {config['network']['director_port']}")
     
+    # Checking number of Director shards (optional, a single Director process if missing)
+    config['network'].setdefault('director_shards', 1)
+    if type(config['network']['director_shards']) != int or config['network']['director_shards'] < 1:
+        raise WorkerConfigError(f"Config error: invalid value {config['network']['director_shards']} for field 'director_shards'. A positive integer is needed")
+
     # Checking caching options validity
     available_policies = ['LRU']
     if config['behavior']['caching']['policy'] not in available_policies:
@@ -26,10 +34,36 @@ def read_config_toml(path: str) -> dict:
     if config['behavior']['caching']['max_size'] < 0:
         raise WorkerConfigError(f"Config error: invalid cache max size {config['behavior']['caching']['max_size']}")
 
+    # Checking deduplication table size (optional, 1024 responses if missing)
+    config['behavior'].setdefault('dedup_table_size', 1024)
+    if type(config['behavior']['dedup_table_size']) != int or config['behavior']['dedup_table_size'] < 0:
+        raise WorkerConfigError(f"Config error: invalid value {config['behavior']['dedup_table_size']} for field 'dedup_table_size'")
+    # Checking the bytes of the responses kept by the deduplication table (optional, 64 MiB if missing)
+    config['behavior'].setdefault('dedup_table_max_bytes', 64 * 1024 * 1024)
+    if type(config['behavior']['dedup_table_max_bytes']) != int or config['behavior']['dedup_table_max_bytes'] < 0:
+        raise WorkerConfigError(f"Config error: invalid value {config['behavior']['dedup_table_max_bytes']} for field 'dedup_table_max_bytes'")
+
+    # Checking tags (optional, no tags if missing)
+    config['behavior'].setdefault('tags', [])
+    if type(config['behavior']['tags']) != list or any(type(tag) != str for tag in config['behavior']['tags']):
+        raise WorkerConfigError(f"Config error: invalid value {config['behavior']['tags']} for field 'tags'. A list of strings is needed")
+
     # Checking heartbeat interval
     if config['network']['heartbeat_interval_ms'] is None or config['network']['heartbeat_interval_ms'] <= 0:
         raise WorkerConfigError(f"Config error: invalid field value for 'heartbeat_interval_ms'. A positive integer is needed, {config['network']['heartbeat_interval_ms']} was provided")
 
+    # Checking compression fields (optional section, compression is disabled if missing)
+    compression_config = config.setdefault('compression', {})
+    compression_config.setdefault('algorithm', 'none')
+    compression_config.setdefault('level', 6)
+    compression_config.setdefault('threshold_bytes', 65536)
+    if compression_config['algorithm'] not in COMPRESSION_ALGORITHMS:
+        raise WorkerConfigError(f"Config error: unsupported compression algorithm '{compression_config['algorithm']}'. Available algorithms: {COMPRESSION_ALGORITHMS}")
+    if type(compression_config['level']) != int or not 0 <= compression_config['level'] <= 9:
+        raise WorkerConfigError(f"Config error: invalid value {compression_config['level']} for field 'level'. An integer between 0 and 9 is needed")
+    if type(compression_config['threshold_bytes']) != int or compression_config['threshold_bytes'] < 0:
+        raise WorkerConfigError(f"Config error: invalid value {compression_config['threshold_bytes']} for field 'threshold_bytes'")
+
     # Checking shutdown persistence fields
     if config['behavior']['shutdown_persistence'] is True and config['behavior']['dump_file'] is None:
         raise WorkerConfigError(f"Config error: field 'shutdown_persistence' set to true but no field 'dump_file' was specified")
@@ -64,3 +98,19 @@ def setup_logging(log_level: str) -> None:
         case _:
             log_level = logging.INFO
     logging.basicConfig(format='[WORKER, %(levelname)s]\t %(message)s', level=log_level, force=True)
+
+
+def compute_function_id(func_name: str, serialized_func: bytes) -> str:
+    '''
+    Computes the ID of a function, i.e. SHA256(func_name:func_code), func_code being the base64 representation of the
+    dill-serialized function. Must stay in line with pyfaas.util.serialization.compute_function_id(), used by clients.
+
+    Args:
+        func_name (str): The name of the function.
+        serialized_func (bytes): The dill-serialized function code.
+
+    Returns:
+        str: The ID of the function.
+    '''
+    serialized_func_base64 = base64.b64encode(serialized_func).decode('utf-8')
+    return hashlib.sha256(f"{func_name}:{serialized_func_base64}".encode()).hexdigest()
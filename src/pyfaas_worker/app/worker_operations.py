@@ -1,18 +1,27 @@
-import json
 import datetime
 import platform
 import os
-import base64
 import dill
 import inspect
 import time
 import multiprocessing
 import signal
 import sys
-import uuid
+import threading
+import bisect
 
+from collections.abc import Iterator
 from pyfaas_worker.app.exceptions import *
 from pyfaas_worker.app.util.worker_side_workflow_validation import *
+from pyfaas_worker.app.util.codec import get_codec
+from pyfaas_worker.app.util.general import compute_function_id
+
+
+# How long a stream can wait for the client to grant new credits before being aborted
+_STREAM_CREDIT_TIMEOUT_S = 60
+
+# How long an upload is kept after its latest chunk, waiting to be completed and then claimed by a request
+_UPLOAD_EXPIRATION_S = 60
 
 
 class WorkerOperations:
@@ -22,11 +31,9 @@ class WorkerOperations:
     def execute_register_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
 
-        serialized_func_base64 = json_payload['serialized_func_base64']
-        serialized_func_bytes = base64.b64decode(serialized_func_base64)
-        client_function = dill.loads(serialized_func_bytes)
+        client_function = dill.loads(json_payload['func_code'])       # Raw dill-serialized function code
         func_name = client_function.__name__
-        func_id = json_payload['func_id']           # Computed and sent by the Director
+        func_id = compute_function_id(func_name, json_payload['func_code'])      # The Director routes the request without decoding the code
 
         client_json_response = None
         response = None
@@ -38,7 +45,8 @@ class WorkerOperations:
             if param.annotation is inspect._empty:
                 self.worker._logger.debug(f"Unspecified type annotation for parameter '{name}' of function '{func_name}'")
                 client_json_response = self._build_JSON_response(
-                    message_id=uuid.uuid4(),
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
                     dest_client=requester_client, 
                     director_operation='forward_to_client', 
                     original_client_operation='register',
@@ -48,15 +56,15 @@ class WorkerOperations:
                     result=None, 
                     message=f"Unspecified type annotation for parameter '{name}' of function '{func_name}'"
                 )
-                response = [b'', json.dumps(client_json_response).encode()]
-                self.worker._outgoing_tx_queue.put(response)
+                self.worker._send_to_director(client_json_response)
                 return
         
         # Checking if the client has specified type annotation for the return type
         if func_signature.return_annotation is inspect._empty:
             self.worker._logger.debug(f"Unspecified return annotation of function '{func_name}'")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='register',
@@ -66,8 +74,7 @@ class WorkerOperations:
                 result=None, 
                 message=f"Unspecified return annotation of function '{func_name}'"
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
             return
 
         # Function has been validated and is register-able at this point
@@ -80,7 +87,8 @@ class WorkerOperations:
             self.worker._logger.info(f'Function {func_name} successfully registered')
             self.worker._file_logger.log('INFO', f"Function registration: '{func_name}'")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='register',
@@ -93,7 +101,8 @@ class WorkerOperations:
         else:
             self.worker._logger.warning(f"A function named '{func_name}' is already registered")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='register',
@@ -104,32 +113,101 @@ class WorkerOperations:
                 message=None
             )
 
-        response = [b'', json.dumps(client_json_response).encode()]
-        self.worker._outgoing_tx_queue.put(response)
+        client_json_response['func_id'] = func_id       # Travels in the header: the Director records the holder of the function
+        self.worker._announce_functions('functions_registered', [func_id], self.worker._director_shard_of(requester_client))
+        self.worker._send_to_director(client_json_response)
+
+    def execute_register_batch_cmd(self, json_payload: dict) -> None:
+        '''
+        Registers the functions of a 'register_batch' request, concatenated in its 'func_codes' field in the order of its
+        'functions' field. Functions failing validation are reported in the message of the response, the others are registered anyway.
+        '''
+        requester_client = json_payload['requester']
+
+        registered_func_ids = {}        # Function name -> function ID, registered now or already held
+        errors = []
+        code_offset = 0
+        for function in json_payload['functions']:
+            func_name = function['func_name']
+            func_code_bytes = json_payload['func_codes'][code_offset:code_offset + function['code_size']]
+            code_offset += function['code_size']
+            try:
+                client_function = dill.loads(func_code_bytes)
+            except Exception as e:
+                errors.append(f"Unable to deserialize function '{func_name}': {e}")
+                continue
+
+            error_message = self._find_missing_annotation(client_function)
+            if error_message is not None:
+                self.worker._logger.debug(error_message)
+                errors.append(error_message)
+                continue
+
+            func_id = compute_function_id(func_name, func_code_bytes)
+            with self.worker._lock:
+                already_registered = func_id in self.worker._functions
+                if not already_registered:
+                    self.worker._functions[func_id] = {
+                        'name': func_name,
+                        'code': client_function,
+                        'registering_client': requester_client
+                    }
+            if not already_registered:
+                self.worker._logger.info(f'Function {func_name} successfully registered')
+                self.worker._file_logger.log('INFO', f"Function registration: '{func_name}'")
+            registered_func_ids[func_name] = func_id
+
+        client_json_response = self._build_JSON_response(
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
+            dest_client=requester_client,
+            director_operation='forward_to_client',
+            original_client_operation='register_batch',
+            status='ok' if not errors else 'err',
+            action='registered' if not errors else None,
+            result_type='json',
+            result=registered_func_ids,
+            message='; '.join(errors) if errors else None
+        )
+        client_json_response['func_ids'] = list(registered_func_ids.values())      # Travels in the header: the Director records the holder of the functions
+        self.worker._announce_functions('functions_registered', client_json_response['func_ids'], self.worker._director_shard_of(requester_client))
+        self.worker._send_to_director(client_json_response)
+
+    def _find_missing_annotation(self, client_function: object) -> str | None:
+        # Registered functions must annotate every parameter and their return type. Returns the description of the first missing annotation
+        func_name = client_function.__name__
+        func_signature = inspect.signature(client_function)
+        for name, param in func_signature.parameters.items():
+            if param.annotation is inspect._empty:
+                return f"Unspecified type annotation for parameter '{name}' of function '{func_name}'"
+        if func_signature.return_annotation is inspect._empty:
+            return f"Unspecified return annotation of function '{func_name}'"
+        return None
 
     def execute_get_cache_dump_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']           # Extracting ID of the client that requested the operation
         with self.worker._lock:
             cache_dump = self.worker._function_exec_cache.get_cache_dump()
         client_json_response = self._build_JSON_response(
-            message_id=uuid.uuid4(),
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
             dest_client=requester_client, 
             director_operation='forward_to_client', 
-            original_client_operation='register',
+            original_client_operation='get_cache_dump',
             status='ok', 
             action=None, 
             result_type='json', 
             result=cache_dump, 
             message=None
         )
-        response = [b'', json.dumps(client_json_response).encode()]
-        self.worker._outgoing_tx_queue.put(response)
+        self.worker._send_to_director(client_json_response)
 
     def execute_ping_cmd(self, json_payload: dict) -> None:
         self.worker._logger.info(f"Client says: 'PING'")
         requester_client = json_payload['requester']
         client_json_response = self._build_JSON_response(
-            message_id=uuid.uuid4(),
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
             dest_client=requester_client, 
             director_operation='forward_to_client', 
             original_client_operation='ping',
@@ -139,8 +217,7 @@ class WorkerOperations:
             result='PONG', 
             message=None
         )
-        response = [b'', json.dumps(client_json_response).encode()]
-        self.worker._outgoing_tx_queue.put(response)
+        self.worker._send_to_director(client_json_response)
 
     def execute_get_worker_info_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
@@ -165,6 +242,7 @@ class WorkerOperations:
             info_summary['config'] = {}
             info_summary['config']['enabled_statistics'] = self.worker._config['statistics']['enabled']
             info_summary['config']['log_level'] = self.worker._config['misc']['log_level']
+            info_summary['config']['tags'] = self.worker._config['behavior'].get('tags', [])
 
             # TODO: add execution limits in info
 
@@ -178,7 +256,8 @@ class WorkerOperations:
             info_summary['network']['last_client_connection_timestamp'] = str(self.worker._last_client_connection_ts)
 
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='get_worker_info',
@@ -188,11 +267,11 @@ class WorkerOperations:
                 result=info_summary, 
                 message=None
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
         except Exception as e:
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='get_worker_info',
@@ -202,8 +281,7 @@ class WorkerOperations:
                 result=None, 
                 message=f'{e}'
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
 
     def execute_get_stats_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
@@ -220,7 +298,8 @@ class WorkerOperations:
                     stats_for_client = self.worker._stats   # No func name was specified, send all stats
 
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='get_stats',
@@ -230,11 +309,11 @@ class WorkerOperations:
                 result=stats_for_client, 
                 message=None
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
         except Exception as e:
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='get_stats', 
@@ -244,8 +323,7 @@ class WorkerOperations:
                 result=None, 
                 message=f'{e}'
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
 
     def execute_list_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
@@ -258,7 +336,8 @@ class WorkerOperations:
             self.worker._logger.info(f'List: retrieved {len(func_list)} functions')
 
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='list',
@@ -268,11 +347,11 @@ class WorkerOperations:
                 result=func_list, 
                 message=None
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
         except Exception as e:
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='list', 
@@ -282,11 +361,11 @@ class WorkerOperations:
                 result=None, 
                 message=f'{type(e).__name__}: {e}'
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
 
     def execute_exec_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
+        client_operation = json_payload.get('operation', 'exec')       # 'exec' or 'broadcast'
 
         func_id = json_payload['func_id']       # Used as KEY to access self._functions
         func_positional_args = json_payload.get('positional_args', [])        # Default empty list
@@ -296,18 +375,18 @@ class WorkerOperations:
         if func_id not in self.worker._functions:
             self.worker._logger.info(f"No function with ID '{func_id}' is registered right now")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
-                original_client_operation='exec',
+                original_client_operation=client_operation,
                 status='err', 
                 action='no_func', 
                 result_type=None, 
                 result=None, 
                 message=f"No function with ID '{func_id}' is registered at the Worker right now"
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
         else:
             try:
                 func_res = self._execute_function(
@@ -317,35 +396,351 @@ class WorkerOperations:
                     save_in_cache=save_in_cache
                 )
 
-                encoded_func_res, func_res_type = self._encode_func_result(func_res)          # JSON or base64
                 client_json_response = self._build_JSON_response(
-                    message_id=uuid.uuid4(),
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
                     dest_client=requester_client, 
                     director_operation='forward_to_client', 
-                    original_client_operation='exec',
+                    original_client_operation=client_operation,
                     status='ok', 
                     action='executed', 
-                    result_type=func_res_type, 
-                    result=encoded_func_res, 
+                    result_type='json',             # Sent pickled if the codec of the request cannot represent it
+                    result=func_res, 
                     message=None
                 )
 
-                response = [b'', json.dumps(client_json_response).encode()]
-                self.worker._outgoing_tx_queue.put(response)
+                self.worker._send_to_director(client_json_response)
             except Exception as e:
                 client_json_response = self._build_JSON_response(
-                    message_id=uuid.uuid4(),
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
                     dest_client=requester_client, 
                     director_operation='forward_to_client', 
-                    original_client_operation='exec',
+                    original_client_operation=client_operation,
                     status='err', 
                     action=None, 
                     result_type='json', 
                     result=None, 
                     message=f'{type(e).__name__}: {e}'
                 )
-                response = [b'', json.dumps(client_json_response).encode()]
-                self.worker._outgoing_tx_queue.put(response)
+                self.worker._send_to_director(client_json_response)
+
+    def execute_exec_stream_cmd(self, json_payload: dict) -> None:
+        requester_client = json_payload['requester']
+
+        func_id = json_payload['func_id']
+        func_positional_args = json_payload.get('positional_args', [])
+        func_default_args = json_payload.get('default_args') or {}
+
+        if func_id not in self.worker._functions:
+            self.worker._logger.info(f"No function with ID '{func_id}' is registered right now")
+            client_json_response = self._build_JSON_response(
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
+                dest_client=requester_client, 
+                director_operation='forward_to_client', 
+                original_client_operation='exec_stream',
+                status='err', 
+                action='no_func', 
+                result_type=None, 
+                result=None, 
+                message=f"No function with ID '{func_id}' is registered at the Worker right now"
+            )
+            self.worker._send_to_director(client_json_response)
+            return
+
+        # Flow control: each item sent consumes a credit, the client grants new ones as it consumes the items
+        # so that a fast producer cannot flood the client (messages exceeding the Director's queues would be dropped)
+        message_id = json_payload.get('message_id')
+        stream_window = json_payload.get('stream_window')       # Credits granted upfront. None: no flow control
+        stream_state = None
+        if stream_window:
+            stream_state = {'credits': threading.Semaphore(stream_window), 'cancelled': False}
+            with self.worker._lock:
+                self.worker._streams[message_id] = stream_state
+
+        # Every produced item is sent as soon as it is available, as a partial response
+        # The last message (end of the stream or error) carries the number of items sent before it
+        stream_seq = 0
+        stream_end_action = 'streamed'
+        func_results = self._stream_function(func_id, func_positional_args, func_default_args)
+        try:
+            for func_res in func_results:
+                if stream_state is not None:
+                    if not stream_state['credits'].acquire(timeout=_STREAM_CREDIT_TIMEOUT_S):
+                        raise WorkerStreamError(f'No credits granted by the client in {_STREAM_CREDIT_TIMEOUT_S} s, stream aborted')
+                    if stream_state['cancelled']:
+                        self.worker._logger.info(f"Stream '{message_id}' cancelled by the client after {stream_seq} item(s)")
+                        stream_end_action = 'cancelled'     # The last message still lets the Director know that the stream is over
+                        break
+                client_json_response = self._build_JSON_response(
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
+                    dest_client=requester_client, 
+                    director_operation='forward_to_client', 
+                    original_client_operation='exec_stream',
+                    status='ok', 
+                    action='partial', 
+                    result_type='json',             # Sent pickled if the codec of the request cannot represent it
+                    result=func_res, 
+                    message=None
+                )
+                client_json_response['partial'] = True          # More messages will follow: the Director keeps the client waiting
+                client_json_response['stream_seq'] = stream_seq
+                self.worker._send_to_director(client_json_response)
+                stream_seq += 1
+        except Exception as e:
+            client_json_response = self._build_JSON_response(
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
+                dest_client=requester_client, 
+                director_operation='forward_to_client', 
+                original_client_operation='exec_stream',
+                status='err', 
+                action=None, 
+                result_type='json', 
+                result=None, 
+                message=f'{type(e).__name__}: {e}'
+            )
+            client_json_response['stream_seq'] = stream_seq
+            self.worker._send_to_director(client_json_response)
+            return
+        finally:
+            func_results.close()        # Stops the function's generator, if the stream did not reach its end
+            if stream_state is not None:
+                with self.worker._lock:
+                    self.worker._streams.pop(message_id, None)
+
+        client_json_response = self._build_JSON_response(
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
+            dest_client=requester_client, 
+            director_operation='forward_to_client', 
+            original_client_operation='exec_stream',
+            status='ok', 
+            action=stream_end_action, 
+            result_type='json', 
+            result=None, 
+            message=None
+        )
+        client_json_response['stream_seq'] = stream_seq
+        self.worker._send_to_director(client_json_response)
+
+    def execute_stream_credit_cmd(self, json_payload: dict) -> None:
+        # The client consumed some items of a stream (or abandoned it): no response is expected
+        with self.worker._lock:
+            stream_state = self.worker._streams.get(json_payload.get('message_id'))
+        if stream_state is None:
+            return      # The stream has already ended
+        if json_payload.get('cancel'):
+            stream_state['cancelled'] = True
+            stream_state['credits'].release()       # Waking the stream up, in case it is waiting for credits
+        elif json_payload.get('credits', 0) > 0:
+            stream_state['credits'].release(json_payload['credits'])
+
+    def execute_upload_chunk_cmd(self, json_payload: dict) -> None:
+        '''
+        Stores a chunk of the fields of a request (e.g.: large function arguments) that the client uploads beforehand.
+
+        The fields are encoded by the codec of the upload into one or more frames, laid out one after the other:
+        every chunk carries its offset, so that chunks can be handled in any order. Each chunk is acknowledged
+        with a partial response (the client keeps a bounded number of chunks unacknowledged), the completion of
+        the upload with a final one. The fields are then merged into the request naming the upload ('upload_id').
+        '''
+        requester_client = json_payload['requester']
+        upload_id = json_payload['message_id']
+        chunk = json_payload['chunk']
+
+        with self.worker._lock:
+            upload = self.worker._uploads.get(upload_id)
+            if upload is None:
+                self._discard_expired_uploads()
+                upload = {
+                    'data': bytearray(sum(json_payload['upload_frame_sizes'])),     # Allocated once, chunks are written in place
+                    'frame_sizes': json_payload['upload_frame_sizes'],
+                    'received_bytes': 0,
+                    'received_ranges': [],      # (start, end) of the chunks received, sorted
+                    'fields': None,             # Decoded once every chunk has been received
+                    'updated_at': time.monotonic()
+                }
+                self.worker._uploads[upload_id] = upload
+
+        offset = json_payload['chunk_offset']
+        chunk_end = offset + len(chunk)
+        with self.worker._lock:
+            # The chunk must lie within the upload, without overlapping the chunks already received
+            received_ranges = upload['received_ranges']
+            upload_size = len(upload['data']) if upload['data'] is not None else 0      # None: every chunk has already been received
+            i = bisect.bisect(received_ranges, (offset, chunk_end))
+            chunk_is_valid = (
+                0 <= offset and chunk_end <= upload_size and
+                (i == 0 or received_ranges[i - 1][1] <= offset) and
+                (i == len(received_ranges) or chunk_end <= received_ranges[i][0])
+            )
+            if chunk_is_valid:
+                received_ranges.insert(i, (offset, chunk_end))
+            else:
+                self.worker._uploads.pop(upload_id, None)
+
+        if not chunk_is_valid:
+            self.worker._logger.error(f"Dropping upload '{upload_id}': chunk [{offset}, {chunk_end}) is out of the {upload_size} bytes of the upload, or overlaps a chunk already received")
+            client_json_response = self._build_JSON_response(
+                message_id=upload_id,
+                codec=json_payload.get('codec'),
+                dest_client=requester_client, 
+                director_operation='forward_to_client', 
+                original_client_operation='upload_chunk',
+                status='err', 
+                action=None, 
+                result_type=None, 
+                result=None, 
+                message=f'Invalid upload chunk: bytes [{offset}, {chunk_end}) are out of the {upload_size} bytes of the upload, or have already been received'
+            )
+            self.worker._send_to_director(client_json_response)
+            return
+
+        upload['data'][offset:chunk_end] = chunk
+        with self.worker._lock:
+            upload['received_bytes'] += len(chunk)
+            upload['updated_at'] = time.monotonic()
+            upload_completed = upload['received_bytes'] == len(upload['data'])
+
+        if not upload_completed:
+            client_json_response = self._build_JSON_response(
+                message_id=upload_id,
+                codec=json_payload.get('codec'),
+                dest_client=requester_client, 
+                director_operation='forward_to_client', 
+                original_client_operation='upload_chunk',
+                status='ok', 
+                action='chunk_received', 
+                result_type=None, 
+                result=None, 
+                message=None
+            )
+            client_json_response['partial'] = True          # The upload is not over yet
+            self.worker._send_to_director(client_json_response)
+            return
+
+        try:
+            if len(upload['frame_sizes']) == 1:
+                frames = [upload['data']]
+            else:
+                # Zero-copy views of the frames (e.g.: pickle out-of-band buffers)
+                data = memoryview(upload['data'])
+                frames = []
+                frame_start = 0
+                for frame_size in upload['frame_sizes']:
+                    frames.append(data[frame_start:frame_start + frame_size])
+                    frame_start += frame_size
+            upload['fields'] = get_codec(json_payload.get('codec')).decode(frames)
+            upload['data'] = None
+            status, action, message = 'ok', 'uploaded', None
+        except Exception as e:
+            with self.worker._lock:
+                self.worker._uploads.pop(upload_id, None)
+            self.worker._logger.error(f"Unable to decode upload '{upload_id}': {e}")
+            status, action, message = 'err', None, f'Unable to decode the uploaded data. {type(e).__name__}: {e}'
+
+        client_json_response = self._build_JSON_response(
+            message_id=upload_id,
+            codec=json_payload.get('codec'),
+            dest_client=requester_client, 
+            director_operation='forward_to_client', 
+            original_client_operation='upload_chunk',
+            status=status, 
+            action=action, 
+            result_type=None, 
+            result=None, 
+            message=message
+        )
+        self.worker._send_to_director(client_json_response)
+
+    def claim_upload(self, upload_id: str) -> dict | None:
+        '''
+        Returns the fields uploaded with the upload identified by upload_id, which is then discarded.
+        None if there is no such completed upload.
+        '''
+        with self.worker._lock:
+            upload = self.worker._uploads.get(upload_id)
+            if upload is None or upload['fields'] is None:
+                return None
+            del self.worker._uploads[upload_id]
+        return upload['fields']
+
+    def _discard_expired_uploads(self) -> None:
+        now = time.monotonic()
+        for upload_id, upload in list(self.worker._uploads.items()):
+            if now - upload['updated_at'] > _UPLOAD_EXPIRATION_S:
+                self.worker._logger.info(f"Discarding expired upload '{upload_id}'")
+                del self.worker._uploads[upload_id]
+
+    def execute_map_cmd(self, json_payload: dict) -> None:
+        requester_client = json_payload['requester']
+
+        func_id = json_payload['func_id']
+        args_chunk = json_payload.get('args_chunk', [])                        # One list of positional args per call
+        func_default_args = json_payload.get('default_args') or {}             # Shared by every call of the chunk
+        save_in_cache = json_payload.get('save_in_cache', False)
+
+        if func_id not in self.worker._functions:
+            self.worker._logger.info(f"No function with ID '{func_id}' is registered right now")
+            client_json_response = self._build_JSON_response(
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
+                dest_client=requester_client, 
+                director_operation='forward_to_client', 
+                original_client_operation='map',
+                status='err', 
+                action='no_func', 
+                result_type=None, 
+                result=None, 
+                message=f"No function with ID '{func_id}' is registered at the Worker right now"
+            )
+            self.worker._send_to_director(client_json_response)
+            return
+
+        chunk_results = []      # Results of the calls, in the same order as args_chunk
+        for i, func_positional_args in enumerate(args_chunk):
+            try:
+                func_res = self._execute_function(
+                    func_id=func_id,
+                    func_positional_args=func_positional_args,
+                    func_default_args=func_default_args,
+                    save_in_cache=save_in_cache
+                )
+                chunk_results.append(func_res)
+            except Exception as e:
+                # The whole chunk fails with the first failing call
+                client_json_response = self._build_JSON_response(
+                    message_id=json_payload.get('message_id'),
+                    codec=json_payload.get('codec'),
+                    dest_client=requester_client, 
+                    director_operation='forward_to_client', 
+                    original_client_operation='map',
+                    status='err', 
+                    action=None, 
+                    result_type='json', 
+                    result=None, 
+                    message=f'Call with positional args {func_positional_args} failed. {type(e).__name__}: {e}'
+                )
+                self.worker._send_to_director(client_json_response)
+                return
+
+        # The results of the whole chunk travel together: pickled if the codec of the request cannot represent any of them
+        client_json_response = self._build_JSON_response(
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
+            dest_client=requester_client, 
+            director_operation='forward_to_client', 
+            original_client_operation='map',
+            status='ok', 
+            action='mapped', 
+            result_type='json', 
+            result=chunk_results, 
+            message=None
+        )
+        self.worker._send_to_director(client_json_response)
 
     def execute_chain_exec_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
@@ -355,13 +750,14 @@ class WorkerOperations:
         workflow_id = workflow.get('id')
         workflow_function_set = workflow.get('functions')
         
-        # Check if all the listed functions are registered
+        # Check if all the listed functions are registered. Workflows name the functions, the Worker holds them by ID
         function_names = [func_name for func_name, _ in workflow_function_set.items()]
-        all_funcs_registered, missing_func_name = self._check_function_set_registration(function_names)
-        if not all_funcs_registered:
+        function_ids, missing_func_name = self._check_function_set_registration(function_names)
+        if missing_func_name is not None:
             self.worker._logger.error(f"No function named '{missing_func_name}' specified in the workflow is registered right now")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='chain_exec',
@@ -371,8 +767,7 @@ class WorkerOperations:
                 result=None, 
                 message=f"No function named '{missing_func_name}' specified in the workflow is registered at the worker right now"
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
             return
 
         self.worker._logger.info('All functions are registered')
@@ -380,7 +775,7 @@ class WorkerOperations:
         # Worker-side function validation
         try:
             for func_name in function_names:        # Validating each function
-                func_code = self.worker._functions[func_name]   # Here function is registered for sure
+                func_code = self.worker._functions[function_ids[func_name]]['code']     # Here function is registered for sure
                 func_positional_args = workflow_function_set[func_name]['positional_args']
                 func_default_args = workflow_function_set[func_name]['default_args']
                 
@@ -394,7 +789,7 @@ class WorkerOperations:
                 # Referenced arguments validation
                 next_func_in_chain = workflow_function_set[func_name]['next']    # Get function that receives input from this function
                 if next_func_in_chain != '':        # If not the final function in chain
-                    next_func_in_chain_code = self._functions[next_func_in_chain]
+                    next_func_in_chain_code = self.worker._functions[function_ids[next_func_in_chain]]['code']
                     next_func_in_chain_positional_args = workflow_function_set[next_func_in_chain]['positional_args']
                     next_func_in_chain_default_args = workflow_function_set[next_func_in_chain]['default_args']
                     validate_return_type_references(        # Provide function i and (i+1) in chain data
@@ -406,7 +801,8 @@ class WorkerOperations:
         except WorkerWorkflowValidationError as e:
             self.worker._logger.error(f"Error while validating workflow: {e}")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='chain_exec',
@@ -416,79 +812,63 @@ class WorkerOperations:
                 result=None, 
                 message=f"Error while validating workflow '{workflow_id}': {e}"
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
             return
 
         # Functions have been validated, are OK, and can be chained
         try:
-            # Executing entry function
-            entry_func_name = workflow.get('entry_function')
-            entry_func_positional_args = workflow_function_set[entry_func_name]['positional_args']
-            entry_func_default_args = workflow_function_set[entry_func_name]['default_args']
-            save_in_cache = workflow_function_set[entry_func_name]['cache_result']
-
-            entry_func_res = self._execute_function(
-                func_name=entry_func_name,
-                func_positional_args=entry_func_positional_args,
-                func_default_args=entry_func_default_args,
-                save_in_cache=save_in_cache
-            )
-
-            next_func = workflow_function_set[entry_func_name]['next']
-            
-            # Executing the following functions in the workflow
-            prev_func_name = entry_func_name
-            prev_func_result = entry_func_res
-            while True:
-                func_name = next_func
+            # Executing the functions of the workflow, from the entry function to the one with no 'next' function
+            func_name = workflow.get('entry_function')
+            prev_func_name = None
+            func_res = None
+            while func_name != '':
                 save_in_cache = workflow_function_set[func_name]['cache_result']
-                
+
                 # Replacing references with results of the previous function
-                func_positional_args = workflow_function_set[func_name]['positional_args']
-                func_default_args = workflow_function_set[func_name]['default_args']
-                for i, arg in enumerate(func_positional_args):
-                    if arg == f'${prev_func_name}.output':
-                        func_positional_args[i] = prev_func_result
-                for def_arg_name, def_arg_value in func_default_args.items():
-                    if def_arg_value == f'${prev_func_name}.output':
-                        func_default_args[def_arg_name] = prev_func_result
-                
+                func_positional_args = [
+                    func_res if prev_func_name is not None and arg == f'${prev_func_name}.output' else arg
+                    for arg in workflow_function_set[func_name]['positional_args']
+                ]
+                func_default_args = {
+                    def_arg_name: func_res if prev_func_name is not None and def_arg_value == f'${prev_func_name}.output' else def_arg_value
+                    for def_arg_name, def_arg_value in workflow_function_set[func_name]['default_args'].items()
+                }
+
+                self._check_deadline(json_payload, func_name)     # The functions already executed cannot be interrupted, the following ones are skipped
                 func_res = self._execute_function(
-                    func_name=func_name,
+                    func_id=function_ids[func_name],
                     func_positional_args=func_positional_args,
                     func_default_args=func_default_args,
                     save_in_cache=save_in_cache
                 )
 
                 # Updating cycle vars
-                next_func = workflow_function_set[func_name]['next']
-                if next_func == '':
-                    # End of workflow, executed last function, can break out of while
-                    break
                 prev_func_name = func_name
-                prev_func_result = func_res
-
-            encoded_func_res, func_res_type = self._encode_func_result(func_res)          # JSON or base64
+                func_name = workflow_function_set[func_name]['next']
 
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='chain_exec',
                 status='ok', 
                 action='chain_executed', 
-                result_type=func_res_type, 
-                result=encoded_func_res, 
+                result_type='json',             # Sent pickled if the codec of the request cannot represent it
+                result=func_res, 
                 message=None
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
+
+        except WorkerDeadlineExceededError as e:
+            self.worker._logger.info(f"Workflow '{workflow_id}' stopped: {e}")
+            self.send_deadline_exceeded_response(json_payload, 'chain_exec', f"Workflow '{workflow_id}' stopped: {e}")
 
-        except WorkerChainedExecutionError as e:
+        except (WorkerChainedExecutionError, WorkerFunctionExecutionError) as e:
             self.worker._logger.error(f"Error while executing workflow '{workflow_id}': {e}")
             client_json_response = self._build_JSON_response(
-                message_id=uuid.uuid4(),
+                message_id=json_payload.get('message_id'),
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='chain_exec',
@@ -498,8 +878,7 @@ class WorkerOperations:
                 result=None, 
                 message=f"Error while executing workflow '{workflow_id}': {e}"
             )
-            response = [b'', json.dumps(client_json_response).encode()]
-            self.worker._outgoing_tx_queue.put(response)
+            self.worker._send_to_director(client_json_response)
 
     def execute_unregister_cmd(self, json_payload: dict) -> None:
         requester_client = json_payload['requester']
@@ -517,9 +896,12 @@ class WorkerOperations:
                 with self.worker._lock:
                     del self.worker._functions[func_id]
                 if self.worker._config['statistics']['enabled']:
-                    del self.worker._stats[func_name]
+                    with self.worker._lock:
+                        self.worker._stats.pop(func_id, None)      # Stats are keyed by function ID, absent if it has never been executed
+                self.worker._announce_functions('functions_unregistered', [func_id], self.worker._director_shard_of(requester_client))
                 client_json_response = self._build_JSON_response(
                     message_id=request_id,         # Sending back the same ID for the director to handle multiple Workers'responses
+                    codec=json_payload.get('codec'),
                     dest_client=requester_client, 
                     director_operation='forward_to_client', 
                     original_client_operation='unregister',
@@ -533,6 +915,7 @@ class WorkerOperations:
                 self.worker._logger.info(f"Client '{requester_client}' is not allowed to unregister the function")
                 client_json_response = self._build_JSON_response(
                     message_id=request_id,         # Sending back the same ID for the director to handle multiple Workers'responses
+                    codec=json_payload.get('codec'),
                     dest_client=requester_client, 
                     director_operation='forward_to_client', 
                     original_client_operation='unregister',
@@ -546,6 +929,7 @@ class WorkerOperations:
             self.worker._logger.info(f"No function with ID '{func_id}' is registered right now")
             client_json_response = self._build_JSON_response(
                 message_id=request_id,          # Sending back the same ID for the director to handle multiple Workers'responses
+                codec=json_payload.get('codec'),
                 dest_client=requester_client, 
                 director_operation='forward_to_client', 
                 original_client_operation='unregister',
@@ -556,10 +940,9 @@ class WorkerOperations:
                 message=f"No function with ID '{func_id}' is registered at the worker right now"
             )
 
-        response = [b'', json.dumps(client_json_response).encode()]
-        self.worker._outgoing_tx_queue.put(response)
+        self.worker._send_to_director(client_json_response)
 
-    def _execute_function(self, func_id: str, func_positional_args: list, func_default_args: dict, save_in_cache: bool) -> None:
+    def _execute_function(self, func_id: str, func_positional_args: list, func_default_args: dict, save_in_cache: bool) -> object:
         func_name = self.worker._functions[func_id]['name']
         self.worker._logger.info(f'Executing the following call: {func_name}({func_positional_args}, {func_default_args})')
         try:
@@ -581,11 +964,11 @@ class WorkerOperations:
                             func_positional_args,
                             func_default_args
                         )
-                    self._logger.info(f"Got cached result: '{func_res}' for '{func_name}'")
-                    self._file_logger.log('INFO', 'Cache hit')
+                    self.worker._logger.info(f"Got cached result: '{func_res}' for '{func_name}'")
+                    self.worker._file_logger.log('INFO', 'Cache hit')
                 except WorkerFunctionCacheError as e:
-                    self._logger.error(f'Exception while fetching result from cache: {e}')
-                    self._file_logger.log('ERROR', f'Cache error: {e}')
+                    self.worker._logger.error(f'Exception while fetching result from cache: {e}')
+                    self.worker._file_logger.log('ERROR', f'Cache error: {e}')
                     raise Exception(e)
             else:
                 # Result is NOT in cache
@@ -619,7 +1002,35 @@ class WorkerOperations:
                 self.worker._logger.info(f"Executed '{func_name}' in {exec_time} s. Result: '{func_res}'")
                 self.worker._file_logger.log('INFO', f'Executed {func_name}({func_positional_args}, {func_default_args}) in {exec_time}')
 
-                return func_res
+            return func_res
+        except Exception as e:
+            self.worker._logger.error(f"Error while executing function '{func_name}': {e}")
+            raise WorkerFunctionExecutionError(e)
+
+    def _stream_function(self, func_id: str, func_positional_args: list, func_default_args: dict) -> Iterator[object]:
+        '''
+        Executes a function and yields its results one at a time, without ever holding all of them in memory:
+        the iterator returned by generator functions is consumed lazily, any other return value is yielded as the only item.
+        Results are never cached. The recorded execution time covers the whole consumption of the iterator.
+        '''
+        func_name = self.worker._functions[func_id]['name']
+        self.worker._logger.info(f'Streaming the following call: {func_name}({func_positional_args}, {func_default_args})')
+        try:
+            requested_function = self.worker._functions[func_id]['code']
+
+            start_time = time.time()
+            func_res = requested_function(*func_positional_args, **func_default_args)
+            if isinstance(func_res, Iterator):
+                yield from func_res
+            else:
+                yield func_res
+            exec_time = time.time() - start_time
+
+            if self.worker._config['statistics']['enabled']:
+                self._record_stats(func_id, exec_time)
+
+            self.worker._logger.info(f"Streamed '{func_name}' in {exec_time} s")
+            self.worker._file_logger.log('INFO', f'Streamed {func_name}({func_positional_args}, {func_default_args}) in {exec_time}')
         except Exception as e:
             self.worker._logger.error(f"Error while executing function '{func_name}': {e}")
             raise WorkerFunctionExecutionError(e)
@@ -641,9 +1052,10 @@ class WorkerOperations:
     def _build_JSON_response(
             self, 
             message_id: str, 
+            codec: str, 
             dest_client: str, 
             director_operation: str, 
-            client_operation: str, 
+            original_client_operation: str, 
             status: str, 
             action: str, 
             result_type: str, 
@@ -652,9 +1064,10 @@ class WorkerOperations:
         ) -> bytes:
         return {
             'message_id': message_id,
+            'codec': codec,                                  # Codec of the request, used for the response too
             'destination_client': dest_client,               # Client that requested the execution of the operation
             'director_operation': director_operation,        # What the director should do at the reception of this msg
-            'original_client_operation': client_operation,   # The operation that was originally requested by the client, for which this message is a response
+            'original_client_operation': original_client_operation,   # The operation that was originally requested by the client, for which this message is a response
             'status': status,                                # Outcome of the operation
             'action': action,                                # What has been done (depends on the operation)
             'result_type': result_type,                      # Type of the result (mostly JSON)
@@ -662,20 +1075,48 @@ class WorkerOperations:
             'message': message                               # A non-mandatory message (used in exception handling)
         }
 
-    def _encode_func_result(self, func_result: object) -> tuple[str, str]:
-        try:
-            json.dumps(func_result)      # Test JSON-serializability, return plain result if successful
-            return func_result, 'json'
-        except (TypeError, OverflowError):      # result is not JSON-serializable, let caller know
-            func_result_bytes = dill.dumps(func_result)
-            func_result_base64 = base64.b64encode(func_result_bytes).decode()
-            return func_result_base64, 'pickle_base64'
-
-    def _check_function_set_registration(self, function_set: list[str]) -> tuple[bool, str | None]:
-        for func in function_set:
-            if func not in self.worker._functions:
-                return False, func
-        return True, None
+    def deadline_exceeded(self, json_payload: dict) -> bool:
+        # The deadline is the wall-clock timestamp set by the client, past which nobody waits for the response
+        deadline = json_payload.get('deadline')
+        return deadline is not None and time.time() >= deadline
+
+    def send_deadline_exceeded_response(self, json_payload: dict, client_operation: str, message: str) -> None:
+        client_json_response = self._build_JSON_response(
+            message_id=json_payload.get('message_id'),
+            codec=json_payload.get('codec'),
+            dest_client=json_payload.get('requester'), 
+            director_operation='forward_to_client', 
+            original_client_operation=client_operation,
+            status='err', 
+            action='deadline_exceeded', 
+            result_type=None, 
+            result=None, 
+            message=message
+        )
+        self.worker._send_to_director(client_json_response)
+
+    def _check_deadline(self, json_payload: dict, func_name: str) -> None:
+        '''
+        Raises:
+            WorkerDeadlineExceededError: Raised if the deadline of the request has expired before the execution of func_name.
+        '''
+        if self.deadline_exceeded(json_payload):
+            raise WorkerDeadlineExceededError(f"the deadline expired before the execution of '{func_name}'")
+
+    def _check_function_set_registration(self, function_set: list[str]) -> tuple[dict[str, str], str | None]:
+        '''
+        Resolves the names of the functions of a workflow to the IDs of the registered functions.
+        Among the functions registered with the same name, the latest registered one is chosen.
+
+        Returns:
+            tuple[dict[str, str], str | None]: The function ID of each function name, and the first name no registered function has (None if all are registered).
+        '''
+        with self.worker._lock:
+            function_ids = {function['name']: func_id for func_id, function in self.worker._functions.items()}
+        for func_name in function_set:
+            if func_name not in function_ids:
+                return {}, func_name
+        return {func_name: function_ids[func_name] for func_name in function_set}, None
 
     # TODO:
     # # Runs inside the child process
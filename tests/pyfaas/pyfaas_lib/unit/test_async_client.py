@@ -0,0 +1,200 @@
+import time
+import asyncio
+import pytest
+
+from unittest.mock import MagicMock, patch
+from pyfaas.pyfaas_client.async_pyfaas_client import AsyncPyfaasClient
+from pyfaas.util.wire import encode_message, decode_message
+from pyfaas.exceptions import (
+    PyFaaSTimeoutError,
+    PyFaaSFunctionExecutionError,
+)
+
+
+class FakeDealerSocket:
+    """Records sent requests and hands out the replies pushed by the test."""
+    def __init__(self):
+        self.sent = []
+        self.replies = asyncio.Queue()
+        self.request_sent = asyncio.Event()
+
+    def setsockopt(self, *args):
+        pass
+
+    def connect(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    async def send_multipart(self, msg):
+        self.sent.append(decode_message(msg[1:]))
+        self.request_sent.set()
+
+    async def recv_multipart(self):
+        reply = await self.replies.get()
+        return [b'', *encode_message(reply)]
+
+
+def make_client(receive_timeout_s=5, **kwargs):
+    fake_socket = FakeDealerSocket()
+    mock_context = MagicMock()
+    mock_context.return_value.socket.return_value = fake_socket
+    with patch('pyfaas.pyfaas_client.async_pyfaas_client.zmq.asyncio.Context', mock_context):
+        client = AsyncPyfaasClient('127.0.0.1', 40000, receive_timeout_s, **kwargs)
+    return client, fake_socket
+
+
+async def wait_for_requests(fake_socket, count):
+    while len(fake_socket.sent) < count:
+        fake_socket.request_sent.clear()
+        await fake_socket.request_sent.wait()
+
+
+def exec_reply(message_id, result):
+    return {
+        'message_id': message_id,
+        'status': 'ok',
+        'action': 'executed',
+        'result_type': 'json',
+        'result': result,
+        'message': None
+    }
+
+
+def test_requests_carry_distinct_message_ids():
+    async def scenario():
+        client, fake_socket = make_client()
+        tasks = [asyncio.ensure_future(client.pyfaas_exec('id123', [i])) for i in range(3)]
+        await wait_for_requests(fake_socket, 3)
+
+        message_ids = [request['message_id'] for request in fake_socket.sent]
+        assert len(set(message_ids)) == 3
+        for request in fake_socket.sent:
+            await fake_socket.replies.put(exec_reply(request['message_id'], request['positional_args'][0]))
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_out_of_order_replies_are_routed_by_message_id():
+    async def scenario():
+        client, fake_socket = make_client()
+        tasks = [asyncio.ensure_future(client.pyfaas_exec('id123', [i])) for i in range(50)]
+        await wait_for_requests(fake_socket, 50)
+
+        for request in reversed(fake_socket.sent):
+            await fake_socket.replies.put(exec_reply(request['message_id'], request['positional_args'][0] * 10))
+        results = await asyncio.gather(*tasks)
+        assert client._pending_requests == {}
+        return results
+
+    assert asyncio.run(scenario()) == [i * 10 for i in range(50)]
+
+
+def test_unknown_message_id_is_discarded():
+    async def scenario():
+        client, fake_socket = make_client()
+        task = asyncio.ensure_future(client.pyfaas_exec('id123', [1]))
+        await wait_for_requests(fake_socket, 1)
+
+        await fake_socket.replies.put(exec_reply('stale-id', 'stale'))
+        await fake_socket.replies.put(exec_reply(fake_socket.sent[0]['message_id'], 'fresh'))
+        return await task
+
+    assert asyncio.run(scenario()) == 'fresh'
+
+
+def test_exec_error_reply_raises():
+    async def scenario():
+        client, fake_socket = make_client()
+        task = asyncio.ensure_future(client.pyfaas_exec('id123', [1]))
+        await wait_for_requests(fake_socket, 1)
+
+        await fake_socket.replies.put({
+            'message_id': fake_socket.sent[0]['message_id'],
+            'status': 'err',
+            'message': 'Function not found'
+        })
+        await task
+
+    with pytest.raises(PyFaaSFunctionExecutionError):
+        asyncio.run(scenario())
+
+
+def test_timeout_raises_and_clears_pending_request():
+    client, fake_socket = make_client(receive_timeout_s=0.05, max_retries=2, retry_backoff_s=0.01)
+
+    async def scenario():
+        await client.pyfaas_exec('id123', [1])
+
+    with pytest.raises(PyFaaSTimeoutError):
+        asyncio.run(scenario())
+    assert len(fake_socket.sent) == 3
+    assert client._pending_requests == {}
+
+
+def test_retries_reuse_the_message_id():
+    async def scenario():
+        client, fake_socket = make_client(receive_timeout_s=0.05, max_retries=3, retry_backoff_s=0.01)
+        task = asyncio.ensure_future(client.pyfaas_exec('id123', [1]))
+        await wait_for_requests(fake_socket, 2)
+
+        assert fake_socket.sent[0] == fake_socket.sent[1]
+        await fake_socket.replies.put(exec_reply(fake_socket.sent[0]['message_id'], 'late'))
+        return await task
+
+    assert asyncio.run(scenario()) == 'late'
+
+
+def test_deadline_travels_with_the_request_and_ends_the_wait():
+    client, fake_socket = make_client(receive_timeout_s=5, max_retries=2, retry_backoff_s=0.5)
+
+    async def scenario():
+        await client.pyfaas_exec('id123', [1], deadline_s=0.05)
+
+    before = time.time()
+    with pytest.raises(PyFaaSTimeoutError):
+        asyncio.run(scenario())
+    assert time.time() - before < 1         # Neither the receive timeout nor the retries outlive the deadline
+    assert len(fake_socket.sent) == 1
+    assert before < fake_socket.sent[0]['deadline'] <= before + 1
+
+
+def test_deadline_exceeded_reply_raises_timeout():
+    async def scenario():
+        client, fake_socket = make_client()
+        task = asyncio.ensure_future(client.pyfaas_exec('id123', [1], deadline_s=10))
+        await wait_for_requests(fake_socket, 1)
+
+        await fake_socket.replies.put({
+            'message_id': fake_socket.sent[0]['message_id'],
+            'status': 'err',
+            'action': 'deadline_exceeded',
+            'message': 'Deadline expired'
+        })
+        await task
+
+    with pytest.raises(PyFaaSTimeoutError):
+        asyncio.run(scenario())
+
+
+def test_stream_items_are_yielded_until_end_of_stream():
+    async def scenario():
+        client, fake_socket = make_client()
+
+        async def consume():
+            return [item async for item in client.pyfaas_exec_stream('id123', [3])]
+
+        task = asyncio.ensure_future(consume())
+        await wait_for_requests(fake_socket, 1)
+
+        message_id = fake_socket.sent[0]['message_id']
+        for i in range(3):
+            await fake_socket.replies.put({**exec_reply(message_id, i), 'action': 'partial', 'partial': True, 'stream_seq': i})
+        await fake_socket.replies.put({**exec_reply(message_id, None), 'action': 'streamed', 'stream_seq': 3})
+        items = await task
+        assert client._pending_requests == {}
+        return items
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
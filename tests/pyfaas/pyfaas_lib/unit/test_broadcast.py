@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import MagicMock
+import base64
+import dill
+import zmq
+
+from pyfaas.pyfaas import pyfaas_broadcast, _CLIENT_MANAGER
+from pyfaas.exceptions import (
+    PyFaaSParameterMismatchError,
+    PyFaaSTimeoutError,
+    PyFaaSDeserializationError,
+    PyFaaSFunctionExecutionError,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    """Ensure _CLIENT_MANAGER is reset before each test."""
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    yield
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+
+
+def test_broadcast_not_configured():
+    with pytest.raises(RuntimeError):
+        pyfaas_broadcast("id123", [])
+
+
+def test_broadcast_invalid_positional_arg_type():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.client = MagicMock()
+
+    with pytest.raises(PyFaaSParameterMismatchError):
+        pyfaas_broadcast("id123", "not_a_list")
+
+
+def test_broadcast_timeout():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_broadcast.side_effect = zmq.Again()
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSTimeoutError):
+        pyfaas_broadcast("id123", [])
+
+
+def test_broadcast_maps_each_worker_to_its_outcome():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_broadcast.return_value = {
+        "status": "ok",
+        "action": "broadcasted",
+        "result": {
+            "worker-1": {"status": "ok", "result_type": "json", "result": 42, "message": None},
+            "worker-2": {"status": "ok", "result_type": "pickle_base64", "result": base64.b64encode(dill.dumps({1, 2})).decode(), "message": None},
+            "worker-3": {"status": "err", "result_type": "json", "result": None, "message": "ValueError: boom"},
+            "worker-4": {"status": "ok", "result_type": "pickle_base64", "result": base64.b64encode(b"garbage").decode(), "message": None},
+        },
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    results = pyfaas_broadcast("id123", [1], tags=["gpu"])
+
+    mock_client.pyfaas_broadcast.assert_called_once_with("id123", [1], {}, False, ["gpu"])
+    assert results["worker-1"] == 42
+    assert results["worker-2"] == {1, 2}
+    assert isinstance(results["worker-3"], PyFaaSFunctionExecutionError)
+    assert "boom" in str(results["worker-3"])
+    assert isinstance(results["worker-4"], PyFaaSDeserializationError)
+
+
+def test_broadcast_without_workers_raises():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_broadcast.return_value = {
+        "status": "err",
+        "action": "no_func",
+        "message": "No registered Worker holds the function with ID 'id123'",
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSFunctionExecutionError):
+        pyfaas_broadcast("id123", [])
+
+
+def test_broadcast_decodes_the_worker_responses_forwarded_by_the_director():
+    from pyfaas.util.wire import encode_message
+
+    _CLIENT_MANAGER.configured = True
+
+    def forwarded(response):
+        return {"frames": [base64.b64encode(frame).decode() for frame in encode_message(response)]}
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_broadcast.return_value = {
+        "status": "ok",
+        "action": "broadcasted",
+        "result": {
+            "worker-1": forwarded({"status": "ok", "result_type": "pickle", "result": dill.dumps({1, 2}), "codec": "pickle"}),
+            "worker-2": forwarded({"status": "err", "message": "ValueError: boom"}),
+            "worker-3": {"frames": [base64.b64encode(b"not a header").decode()]},
+            "worker-4": {"status": "err", "message": "Worker 'worker-4' is no longer registered"},
+        },
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    results = pyfaas_broadcast("id123", [1])
+
+    assert results["worker-1"] == {1, 2}
+    assert isinstance(results["worker-2"], PyFaaSFunctionExecutionError)
+    assert isinstance(results["worker-3"], PyFaaSDeserializationError)
+    assert isinstance(results["worker-4"], PyFaaSFunctionExecutionError)
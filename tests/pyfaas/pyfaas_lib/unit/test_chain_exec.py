@@ -66,7 +66,7 @@ def test_chain_exec_success(_):
         result = pyfaas_chain_exec(VALID_WORKFLOW)
 
     assert result == expected_result
-    mock_client.pyfaas_chain_exec.assert_called_once_with(VALID_WORKFLOW)
+    mock_client.pyfaas_chain_exec.assert_called_once_with(VALID_WORKFLOW, deadline_s=None)
     mock_logger.info.assert_called()
 
 @patch("pyfaas.pyfaas.validate_json_workflow_structure", side_effect=mock_validate_workflow_success)
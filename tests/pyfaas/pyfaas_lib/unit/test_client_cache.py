@@ -0,0 +1,118 @@
+import pytest
+from unittest.mock import MagicMock, patch
+
+from pyfaas.pyfaas import pyfaas_exec, pyfaas_get_client_cache_stats, _CLIENT_MANAGER
+from pyfaas.client_caching.result_cache import ClientResultCache
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    """Ensure _CLIENT_MANAGER is reset before each test."""
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    _CLIENT_MANAGER.result_cache = None
+    yield
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    _CLIENT_MANAGER.result_cache = None
+
+
+def exec_response(result):
+    return {
+        "status": "ok",
+        "action": "executed",
+        "result_type": "json",
+        "result": result,
+        "message": "",
+    }
+
+
+def test_cache_hit_and_miss_counters():
+    cache = ClientResultCache(max_size=2)
+
+    assert cache.get_cached_result("f", [1], {}) == (False, None)
+    cache.add("f", [1], {}, 10)
+    assert cache.get_cached_result("f", [1], {}) == (True, 10)
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_cache_default_args_are_canonicalized():
+    cache = ClientResultCache(max_size=2)
+
+    cache.add("f", [1], {"a": 1, "b": 2}, 10)
+
+    assert cache.get_cached_result("f", [1], {"b": 2, "a": 1}) == (True, 10)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ClientResultCache(max_size=2)
+    cache.add("f", [1], {}, 1)
+    cache.add("f", [2], {}, 2)
+    cache.get_cached_result("f", [1], {})       # [1] becomes the most recently used entry
+    cache.add("f", [3], {}, 3)
+
+    assert cache.get_cached_result("f", [2], {}) == (False, None)
+    assert cache.get_cached_result("f", [1], {}) == (True, 1)
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_cache_entries_expire_after_ttl():
+    cache = ClientResultCache(max_size=2, ttl_s=10)
+    with patch("pyfaas.client_caching.result_cache.time.monotonic", return_value=100):
+        cache.add("f", [1], {}, 1)
+    with patch("pyfaas.client_caching.result_cache.time.monotonic", return_value=111):
+        assert cache.get_cached_result("f", [1], {}) == (False, None)
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_cache_disabled_with_zero_max_size():
+    cache = ClientResultCache(max_size=0)
+    cache.add("f", [1], {}, 1)
+
+    assert cache.get_cached_result("f", [1], {}) == (False, None)
+
+
+def test_cached_results_cannot_be_altered_by_callers():
+    cache = ClientResultCache(max_size=2)
+    cache.add("f", [1], {}, {"value": 1})
+
+    _, result = cache.get_cached_result("f", [1], {})
+    result["value"] = 2
+
+    assert cache.get_cached_result("f", [1], {}) == (True, {"value": 1})
+
+
+def test_exec_served_from_client_cache():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.result_cache = ClientResultCache(max_size=10)
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = exec_response(42)
+    _CLIENT_MANAGER.client = mock_client
+
+    assert pyfaas_exec("id123", [1, 2], use_client_cache=True) == 42
+    assert pyfaas_exec("id123", [1, 2], use_client_cache=True) == 42
+
+    mock_client.pyfaas_exec.assert_called_once()
+    assert pyfaas_get_client_cache_stats()["hits"] == 1
+
+
+def test_exec_without_client_cache_flag_always_contacts_director():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.result_cache = ClientResultCache(max_size=10)
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = exec_response(42)
+    _CLIENT_MANAGER.client = mock_client
+
+    pyfaas_exec("id123", [1, 2])
+    pyfaas_exec("id123", [1, 2])
+
+    assert mock_client.pyfaas_exec.call_count == 2
+
+
+def test_get_client_cache_stats_not_configured():
+    with pytest.raises(RuntimeError):
+        pyfaas_get_client_cache_stats()
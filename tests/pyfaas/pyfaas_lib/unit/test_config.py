@@ -70,7 +70,7 @@ def test_client_is_instantiated_correctly():
 
         pyfaas_mod.pyfaas_config("x.toml")
 
-        mock_client.assert_called_once_with("1.2.3.4", 9999, 5)
+        mock_client.assert_called_once_with("1.2.3.4", 9999, 5, codec="json", compression_config=None, max_retries=2, retry_backoff_s=0.5, director_shards=1)
         assert pyfaas_mod._CLIENT_MANAGER.client is mock_client.return_value
 
 
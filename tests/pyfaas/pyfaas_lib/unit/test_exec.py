@@ -10,6 +10,7 @@ from pyfaas.exceptions import (
     PyFaaSTimeoutError,
     PyFaaSDeserializationError,
     PyFaaSFunctionExecutionError,
+    PyFaaSOverloadedError,
 )
 
 
@@ -63,7 +64,7 @@ def test_exec_success_raw_json_result():
     res = pyfaas_exec("id123", [1, 2], {"x": 5}, save_in_cache=True)
 
     assert res == {"value": 42}
-    mock_client.pyfaas_exec.assert_called_once_with("id123", [1, 2], {"x": 5}, True)
+    mock_client.pyfaas_exec.assert_called_once_with("id123", [1, 2], {"x": 5}, True, hedge=False, deadline_s=None, coalesce=False, use_director_cache=False)
 
 
 def test_exec_success_pickle_result():
@@ -139,4 +140,73 @@ def test_exec_default_args_are_initialized():
     res = pyfaas_exec("id123", [1])
 
     assert res == 123
-    mock_client.pyfaas_exec.assert_called_once_with("id123", [1], {}, False)
+    mock_client.pyfaas_exec.assert_called_once_with("id123", [1], {}, False, hedge=False, deadline_s=None, coalesce=False, use_director_cache=False)
+
+
+def test_exec_hedge_is_forwarded_to_client():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = {
+        "status": "ok",
+        "action": "executed",
+        "result_type": "json",
+        "result": 7,
+        "message": None,
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    assert pyfaas_exec("id123", [1], hedge=True) == 7
+    mock_client.pyfaas_exec.assert_called_once_with("id123", [1], {}, False, hedge=True, deadline_s=None, coalesce=False, use_director_cache=False)
+
+
+def test_exec_coalesce_is_forwarded_to_client():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = {
+        "status": "ok",
+        "action": "executed",
+        "result_type": "json",
+        "result": 7,
+        "message": None,
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    assert pyfaas_exec("id123", [1], coalesce=True) == 7
+    mock_client.pyfaas_exec.assert_called_once_with("id123", [1], {}, False, hedge=False, deadline_s=None, coalesce=True, use_director_cache=False)
+
+
+def test_exec_deadline_exceeded_raises_timeout():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = {
+        "status": "err",
+        "action": "deadline_exceeded",
+        "result_type": None,
+        "result": None,
+        "message": "The deadline of the 'exec' request expired before its execution",
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSTimeoutError):
+        pyfaas_exec("id123", [1], deadline_s=0.5)
+    mock_client.pyfaas_exec.assert_called_once_with("id123", [1], {}, False, hedge=False, deadline_s=0.5, coalesce=False, use_director_cache=False)
+
+
+def test_exec_overloaded_raises_overloaded_error():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec.return_value = {
+        "status": "err",
+        "action": "overloaded",
+        "result_type": None,
+        "result": None,
+        "message": "The Director is overloaded: 1024 requests are already waiting for a Worker, retry later",
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSOverloadedError):
+        pyfaas_exec("id123", [1])
@@ -0,0 +1,105 @@
+import pytest
+from concurrent.futures import Future
+from unittest.mock import MagicMock, patch
+import zmq
+
+from pyfaas.pyfaas import pyfaas_exec_async, pyfaas_chain_exec_async, _CLIENT_MANAGER
+from pyfaas.exceptions import (
+    PyFaaSParameterMismatchError,
+    PyFaaSTimeoutError,
+    PyFaaSFunctionExecutionError,
+    PyFaaSChainedExecutionError,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    """Ensure _CLIENT_MANAGER is reset before each test."""
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    yield
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+
+
+def configure_client_with_future(method_name):
+    _CLIENT_MANAGER.configured = True
+    response_future = Future()
+    mock_client = MagicMock()
+    getattr(mock_client, method_name).return_value = response_future
+    _CLIENT_MANAGER.client = mock_client
+    return mock_client, response_future
+
+
+def test_exec_async_not_configured():
+    with pytest.raises(RuntimeError):
+        pyfaas_exec_async("id123", [])
+
+
+def test_exec_async_invalid_positional_arg_type():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.client = MagicMock()
+
+    with pytest.raises(PyFaaSParameterMismatchError):
+        pyfaas_exec_async("id123", "not_a_list")
+
+
+def test_exec_async_returns_pending_future():
+    mock_client, response_future = configure_client_with_future("pyfaas_exec_async")
+
+    result_future = pyfaas_exec_async("id123", [1, 2])
+
+    assert not result_future.done()
+    mock_client.pyfaas_exec_async.assert_called_once_with("id123", [1, 2], {}, False, hedge=False, deadline_s=None, coalesce=False, use_director_cache=False)
+
+    response_future.set_result({
+        "status": "ok",
+        "action": "executed",
+        "result_type": "json",
+        "result": 3,
+        "message": None,
+    })
+    assert result_future.result(timeout=1) == 3
+
+
+def test_exec_async_error_is_set_on_future():
+    _, response_future = configure_client_with_future("pyfaas_exec_async")
+
+    result_future = pyfaas_exec_async("id123", [])
+    response_future.set_result({"status": "err", "message": "Function not found"})
+
+    with pytest.raises(PyFaaSFunctionExecutionError):
+        result_future.result(timeout=1)
+
+
+def test_exec_async_timeout_is_set_on_future():
+    _, response_future = configure_client_with_future("pyfaas_exec_async")
+
+    result_future = pyfaas_exec_async("id123", [])
+    response_future.set_exception(zmq.Again())
+
+    with pytest.raises(PyFaaSTimeoutError):
+        result_future.result(timeout=1)
+
+
+@patch("pyfaas.pyfaas.validate_json_workflow_structure")
+def test_chain_exec_async_success(_):
+    mock_client, response_future = configure_client_with_future("pyfaas_chain_exec_async")
+    workflow = {"id": "workflow1"}
+
+    result_future = pyfaas_chain_exec_async(workflow)
+    response_future.set_result({"status": "ok", "result": "final_output_data", "message": ""})
+
+    assert result_future.result(timeout=1) == "final_output_data"
+    mock_client.pyfaas_chain_exec_async.assert_called_once_with(workflow, deadline_s=None)
+
+
+@patch("pyfaas.pyfaas.validate_json_workflow_structure")
+def test_chain_exec_async_error_is_set_on_future(_):
+    _, response_future = configure_client_with_future("pyfaas_chain_exec_async")
+
+    result_future = pyfaas_chain_exec_async({"id": "workflow1"})
+    response_future.set_result({"status": "err", "result": None, "message": "A task failed"})
+
+    with pytest.raises(PyFaaSChainedExecutionError):
+        result_future.result(timeout=1)
@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import MagicMock
+import dill
+import zmq
+
+from pyfaas.pyfaas import pyfaas_exec_stream, _CLIENT_MANAGER
+from pyfaas.exceptions import (
+    PyFaaSParameterMismatchError,
+    PyFaaSTimeoutError,
+    PyFaaSNetworkError,
+    PyFaaSFunctionExecutionError,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    """Ensure _CLIENT_MANAGER is reset before each test."""
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    yield
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+
+
+def partial_response(stream_seq, result, result_type="json"):
+    return {
+        "status": "ok",
+        "action": "partial",
+        "partial": True,
+        "stream_seq": stream_seq,
+        "result_type": result_type,
+        "result": result,
+        "message": None,
+    }
+
+
+def end_response(stream_seq):
+    return {"status": "ok", "action": "streamed", "stream_seq": stream_seq, "result": None, "message": None}
+
+
+def configure_client_with_stream(responses):
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec_stream.return_value = (response for response in responses)
+    _CLIENT_MANAGER.client = mock_client
+    return mock_client
+
+
+def test_exec_stream_not_configured():
+    with pytest.raises(RuntimeError):
+        pyfaas_exec_stream("id123", [])
+
+
+def test_exec_stream_invalid_positional_arg_type():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.client = MagicMock()
+
+    with pytest.raises(PyFaaSParameterMismatchError):
+        pyfaas_exec_stream("id123", "not_a_list")
+
+
+def test_exec_stream_yields_items_until_end_of_stream():
+    mock_client = configure_client_with_stream([
+        partial_response(0, "a"),
+        partial_response(1, dill.dumps({"b"}), "pickle"),
+        end_response(2),
+    ])
+
+    assert list(pyfaas_exec_stream("id123", [2])) == ["a", {"b"}]
+    mock_client.pyfaas_exec_stream.assert_called_once_with("id123", [2], {})
+
+
+def test_exec_stream_error_raises_after_previous_items():
+    configure_client_with_stream([
+        partial_response(0, 1),
+        {"status": "err", "stream_seq": 1, "result": None, "message": "ValueError: boom"},
+    ])
+
+    items = pyfaas_exec_stream("id123", [])
+    assert next(items) == 1
+    with pytest.raises(PyFaaSFunctionExecutionError):
+        next(items)
+
+
+def test_exec_stream_lost_items_raise():
+    configure_client_with_stream([
+        partial_response(0, 1),
+        partial_response(2, 3),
+    ])
+
+    items = pyfaas_exec_stream("id123", [])
+    assert next(items) == 1
+    with pytest.raises(PyFaaSNetworkError):
+        next(items)
+
+
+def test_exec_stream_timeout():
+    def timing_out_stream(*args):
+        raise zmq.Again()
+        yield
+
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_exec_stream.side_effect = timing_out_stream
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSTimeoutError):
+        list(pyfaas_exec_stream("id123", []))
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+import pyfaas
+
+
+def imported_modules_after(code: str) -> set:
+    # A fresh interpreter: the modules already imported by the test session do not count
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys, json\nprint(json.dumps(list(sys.modules)))"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return set(json.loads(completed.stdout.splitlines()[-1]))
+
+
+def test_import_does_not_load_the_heavy_dependencies():
+    modules = imported_modules_after("import pyfaas")
+
+    assert "pyfaas.pyfaas" not in modules
+    assert not {"zmq", "dill", "msgpack", "asyncio"} & modules
+
+
+def test_public_names_are_loaded_on_first_access():
+    modules = imported_modules_after("from pyfaas import pyfaas_exec")
+
+    assert "pyfaas.pyfaas" in modules
+    assert "zmq" in modules
+    assert "dill" not in modules
+
+
+def test_public_names_resolve_to_their_submodule():
+    from pyfaas.pyfaas import pyfaas_exec
+    from pyfaas.pyfaas_client.async_pyfaas_client import AsyncPyfaasClient
+
+    assert pyfaas.pyfaas_exec is pyfaas_exec
+    assert pyfaas.AsyncPyfaasClient is AsyncPyfaasClient
+    assert set(pyfaas.__all__) <= set(dir(pyfaas))
+
+
+def test_unknown_name_raises_attribute_error():
+    with pytest.raises(AttributeError, match="not_a_pyfaas_function"):
+        pyfaas.not_a_pyfaas_function
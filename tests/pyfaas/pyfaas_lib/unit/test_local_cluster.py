@@ -0,0 +1,257 @@
+import time
+import asyncio
+import pytest
+
+from unittest.mock import patch
+from pyfaas import LocalCluster
+from pyfaas.util.serialization import decode_broadcast_result
+from pyfaas.util.wire import decode_message
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+@pytest.fixture(scope="module")
+def cluster():
+    with LocalCluster(n_workers=2) as local_cluster:
+        yield local_cluster
+
+
+def test_client_executes_on_the_local_cluster(cluster):
+    func_id = cluster.client.pyfaas_register(add)["result"]
+
+    response = cluster.client.pyfaas_exec(func_id, [1, 2], {})
+
+    assert response["status"] == "ok"
+    assert response["result"] == 3
+
+
+def test_requests_are_spread_across_the_workers(cluster):
+    func_id = cluster.client.pyfaas_register(add)["result"]
+
+    responses = [future.result() for future in [cluster.client.pyfaas_exec_async(func_id, [i, 1], {}) for i in range(50)]]
+
+    assert [response["result"] for response in responses] == [i + 1 for i in range(50)]
+    assert len(cluster._director._workers) == 2
+
+
+def test_async_client_shares_the_cluster(cluster):
+    func_id = cluster.client.pyfaas_register(add)["result"]
+
+    async def scenario():
+        return await cluster.new_async_client().pyfaas_exec(func_id, [20, 22])
+
+    assert asyncio.run(scenario()) == 42
+
+
+def test_invalid_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        LocalCluster(n_workers=0)
+    with pytest.raises(ValueError):
+        LocalCluster(transport="udp")
+    with pytest.raises(ValueError):
+        LocalCluster(n_shards=0)
+
+
+def test_sharded_director_routes_each_client_on_its_shard():
+    from pyfaas.util.sharding import client_shard
+
+    with LocalCluster(n_workers=2, n_shards=3) as sharded_cluster:
+        clients = [sharded_cluster.new_client() for _ in range(6)]
+        for client in clients:
+            func_id = client.pyfaas_register(add)["result"]
+            assert client.pyfaas_exec(func_id, [client_shard(client._client_id, 3), 1], {})["result"] == client_shard(client._client_id, 3) + 1
+
+        for shard, director in enumerate(sharded_cluster._directors):
+            routed_clients = {client_id for client_id, _ in director._forwarded_requests}
+            assert routed_clients == {client._client_id for client in clients if client_shard(client._client_id, 3) == shard}
+
+
+def test_function_registered_through_a_shard_is_routed_by_the_other_shards():
+    from pyfaas.util.sharding import client_shard
+
+    def wait_for(condition):
+        deadline = time.monotonic() + 2
+        while not condition() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    with LocalCluster(n_workers=4, n_shards=2) as sharded_cluster:
+        clients_by_shard = {}
+        while len(clients_by_shard) < 2:
+            client = sharded_cluster.new_client()
+            clients_by_shard.setdefault(client_shard(client._client_id, 2), client)
+
+        func_id = clients_by_shard[0].pyfaas_register(add)["result"]
+        other_director = sharded_cluster._directors[1]
+        assert wait_for(lambda: func_id in other_director._functions_workers_map)
+        assert [clients_by_shard[1].pyfaas_exec(func_id, [i, 1], {})["result"] for i in range(8)] == [i + 1 for i in range(8)]
+
+        # The unregistration through shard 0 is known by shard 1 too
+        assert clients_by_shard[0].pyfaas_unregister(func_id)["status"] == "ok"
+        assert wait_for(lambda: func_id not in other_director._functions_workers_map)
+        assert clients_by_shard[1].pyfaas_exec(func_id, [1, 1], {})["status"] == "err"
+
+
+def inc(x: int) -> int:
+    return x + 1
+
+
+def double(x: int) -> int:
+    return 2 * x
+
+
+def slow_inc(x: int) -> int:
+    time.sleep(0.5)
+    return x + 1
+
+
+def slow_add(a: int, b: int) -> int:
+    time.sleep(1)
+    return a + b
+
+
+def repeat(text: str, times: int) -> str:
+    return text * times
+
+
+def _workflow(entry_function, next_function):
+    return {
+        "id": "inc_then_double",
+        "entry_function": entry_function,
+        "functions": {
+            entry_function: {"cache_result": False, "positional_args": [3], "default_args": {}, "next": next_function},
+            next_function: {"cache_result": False, "positional_args": [f"${entry_function}.output"], "default_args": {}, "next": ""},
+        },
+    }
+
+
+def test_chain_exec_runs_the_workflow_functions_by_name():
+    with LocalCluster(n_workers=1) as single_worker_cluster:
+        for func in (inc, double):
+            assert single_worker_cluster.client.pyfaas_register(func)["status"] == "ok"
+
+        response = single_worker_cluster.client.pyfaas_chain_exec(_workflow("inc", "double"))
+
+        assert response["status"] == "ok"
+        assert response["result"] == 8
+
+
+def test_chain_exec_deadline_skips_the_following_functions():
+    with LocalCluster(n_workers=1) as single_worker_cluster:
+        func_ids = {func.__name__: single_worker_cluster.client.pyfaas_register(func)["result"] for func in (slow_inc, double)}
+        worker = single_worker_cluster._workers[0]
+
+        try:
+            single_worker_cluster.client.pyfaas_chain_exec(_workflow("slow_inc", "double"), deadline_s=0.2)
+        except Exception:
+            pass    # The client stops waiting at the deadline too
+
+        deadline = time.monotonic() + 2
+        while func_ids["slow_inc"] not in worker._stats and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        assert worker._stats[func_ids["slow_inc"]]["#calls"] == 1
+        assert func_ids["double"] not in worker._stats
+
+
+def test_retries_of_a_slow_request_execute_it_once():
+    with LocalCluster(n_workers=1, receive_timeout_s=0.3) as single_worker_cluster:
+        client = single_worker_cluster.new_client(max_retries=10, retry_backoff_s=0.05)
+        func_id = client.pyfaas_register(slow_add)["result"]
+
+        response = client.pyfaas_exec(func_id, [1, 2], {})
+
+        assert response["status"] == "ok"
+        assert response["result"] == 3
+        assert single_worker_cluster._workers[0]._stats[func_id]["#calls"] == 1
+
+
+def test_handler_error_answers_the_request_and_its_retries():
+    with LocalCluster(n_workers=1, receive_timeout_s=0.3) as single_worker_cluster:
+        client = single_worker_cluster.new_client(max_retries=10, retry_backoff_s=0.05)
+        func_id = client.pyfaas_register(add)["result"]
+        worker = single_worker_cluster._workers[0]
+        handled_requests = []
+
+        def failing_exec_cmd(json_payload):
+            handled_requests.append(json_payload["message_id"])
+            time.sleep(0.5)     # The client sends retries meanwhile
+            raise RuntimeError("handler failure")
+
+        worker._operations.execute_exec_cmd = failing_exec_cmd
+
+        response = client.pyfaas_exec(func_id, [1, 2], {})
+
+        assert response["status"] == "err"
+        assert "handler failure" in response["message"]
+        assert len(handled_requests) == 1
+
+
+@pytest.mark.parametrize("chunks", [
+    [(0, b"abcd"), (6, b"efgh")],       # Past the end of the upload
+    [(0, b"abcd"), (2, b"efgh")],       # Overlapping a chunk already received
+    [(-2, b"ab")],
+])
+def test_invalid_upload_chunks_drop_the_upload(cluster, chunks, monkeypatch):
+    worker = cluster._workers[0]
+    responses = []
+    monkeypatch.setattr(worker, "_send_to_director", responses.append)
+
+    for offset, chunk in chunks:
+        worker._operations.execute_upload_chunk_cmd({
+            "requester": "client-1", "message_id": "up1", "codec": "json",
+            "upload_frame_sizes": [8], "chunk_offset": offset, "chunk": chunk,
+        })
+
+    assert [response["status"] for response in responses] == ["ok"] * (len(chunks) - 1) + ["err"]
+    assert "up1" not in worker._uploads
+
+
+def to_set(x: int) -> set:
+    return {x, x + 1}
+
+
+def test_broadcast_results_are_decoded_by_the_client_only():
+    with LocalCluster(n_workers=2, codec="pickle") as pickle_cluster:
+        func_id = pickle_cluster.client.pyfaas_register(to_set)["result"]
+        deadline = time.monotonic() + 10
+        while len(pickle_cluster._director._functions_workers_map.get(func_id, [])) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)        # Waiting for the synchronization of the Workers
+
+        with patch("pyfaas_director.app.pyfaas_director.decode_message") as mock_decode_message:
+            response = pickle_cluster.client.pyfaas_broadcast(func_id, [1], {})
+
+        mock_decode_message.assert_not_called()
+        assert response["status"] == "ok"
+        assert decode_broadcast_result(response["result"]) == {worker._id: {1, 2} for worker in pickle_cluster._workers}
+
+
+def test_responses_kept_for_retries_are_bounded_in_bytes(monkeypatch):
+    with LocalCluster(n_workers=1, worker_config={"behavior": {"dedup_table_max_bytes": 5000}}) as single_worker_cluster:
+        func_id = single_worker_cluster.client.pyfaas_register(repeat)["result"]
+        worker = single_worker_cluster._workers[0]
+        sent_responses = []
+        monkeypatch.setattr(worker, "_enqueue_outgoing", lambda msg, shard=0: sent_responses.append(decode_message(msg[1:])))
+
+        def exec_request(message_id, times):
+            worker._handle_incoming_request("exec", {"operation": "exec", "requester": "client-1", "message_id": message_id, "codec": "json",
+                                                     "func_id": func_id, "positional_args": ["x", times], "default_args": {}})
+
+        exec_request("small-1", 1000)
+        exec_request("small-2", 1000)
+        exec_request("large", 10000)        # Larger than the limit: never kept
+        exec_request("small-3", 3000)       # Makes room by dropping the oldest kept response
+        assert [response["status"] for response in sent_responses] == ["ok"] * 4
+        assert worker._handled_requests_bytes <= 5000
+
+        # Retries get the kept responses again, and an error for the others: never a second execution
+        sent_responses.clear()
+        for message_id in ("small-1", "small-2", "large", "small-3"):
+            exec_request(message_id, 1)
+        assert [(response["status"], response.get("action")) for response in sent_responses] == [
+            ("err", "response_not_kept"), ("ok", "executed"), ("err", "response_not_kept"), ("ok", "executed")
+        ]
+        assert [len(response["result"]) for response in sent_responses if response["status"] == "ok"] == [1000, 3000]
+        assert worker._stats[func_id]["#calls"] == 4
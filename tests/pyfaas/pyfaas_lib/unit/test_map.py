@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import MagicMock
+import dill
+import zmq
+
+from pyfaas.pyfaas import pyfaas_map, _CLIENT_MANAGER
+from pyfaas.pyfaas_client.pyfaas_client import PyfaasClient
+from pyfaas.exceptions import (
+    PyFaaSParameterMismatchError,
+    PyFaaSTimeoutError,
+    PyFaaSFunctionExecutionError,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_manager():
+    """Ensure _CLIENT_MANAGER is reset before each test."""
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+    yield
+    _CLIENT_MANAGER.client = None
+    _CLIENT_MANAGER.configured = False
+
+
+def chunk_response(results, result_type="json"):
+    return {
+        "status": "ok",
+        "action": "mapped",
+        "result_type": result_type,
+        "result": results,
+        "message": None,
+    }
+
+
+def test_map_not_configured():
+    with pytest.raises(RuntimeError):
+        pyfaas_map("id123", [(1, 2)])
+
+
+def test_map_invalid_chunk_size():
+    _CLIENT_MANAGER.configured = True
+    _CLIENT_MANAGER.client = MagicMock()
+
+    with pytest.raises(PyFaaSParameterMismatchError):
+        pyfaas_map("id123", [(1, 2)], chunk_size=0)
+
+
+def test_map_yields_results_of_every_chunk_in_order():
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_map.return_value = iter([
+        chunk_response([1, 2]),
+        chunk_response(dill.dumps([{"answer": 42}]), "pickle"),
+    ])
+    _CLIENT_MANAGER.client = mock_client
+
+    results = list(pyfaas_map("id123", [(0, 1), (1, 1), (2, 1)], chunk_size=2))
+
+    assert results == [1, 2, {"answer": 42}]
+    mock_client.pyfaas_map.assert_called_once_with("id123", [(0, 1), (1, 1), (2, 1)], {}, 2, False)
+
+
+def test_map_error_chunk_raises():
+    _CLIENT_MANAGER.configured = True
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_map.return_value = iter([
+        chunk_response([1]),
+        {"status": "err", "result": None, "message": "Call failed"},
+    ])
+    _CLIENT_MANAGER.client = mock_client
+
+    results = pyfaas_map("id123", [1, 2], chunk_size=1)
+    assert next(results) == 1
+    with pytest.raises(PyFaaSFunctionExecutionError):
+        next(results)
+
+
+def test_map_timeout():
+    _CLIENT_MANAGER.configured = True
+
+    def timing_out_chunks(*args):
+        raise zmq.Again()
+        yield
+
+    mock_client = MagicMock()
+    mock_client.pyfaas_map.side_effect = timing_out_chunks
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSTimeoutError):
+        list(pyfaas_map("id123", [1]))
+
+
+def test_client_chunks_arguments():
+    client = PyfaasClient.__new__(PyfaasClient)
+
+    chunks = list(client._chunk_args([(1, 2), [3, 4], 5, (6,), 7], 2))
+
+    assert chunks == [[[1, 2], [3, 4]], [[5], [6]], [[7]]]
@@ -1,8 +1,12 @@
 import pytest
 from unittest.mock import MagicMock, patch
 import zmq
+import base64
+import hashlib
+import dill
 
 from pyfaas.pyfaas import pyfaas_register, _CLIENT_MANAGER
+from pyfaas.pyfaas_client.pyfaas_client import PyfaasClient
 from pyfaas.exceptions import (
     PyFaaSTimeoutError,
     PyFaaSFunctionRegistrationError
@@ -98,3 +102,37 @@ def test_register_missing_annotations():
 
     with pytest.raises(PyFaaSFunctionRegistrationError):
         pyfaas_register(bad_func)
+
+
+def make_client_with_responses(*responses):
+    client = PyfaasClient.__new__(PyfaasClient)
+    client._logger = MagicMock()
+    client._send_request = MagicMock(side_effect=list(responses))
+    return client
+
+def test_client_skips_upload_when_cluster_has_function():
+    client = make_client_with_responses({"status": "ok", "result": True})
+
+    resp = client.pyfaas_register(sample_func)
+
+    serialized_func_base64 = base64.b64encode(dill.dumps(sample_func)).decode()
+    expected_func_id = hashlib.sha256(f"sample_func:{serialized_func_base64}".encode()).hexdigest()
+    client._send_request.assert_called_once_with("has_function", {"func_id": expected_func_id})
+    assert resp["status"] == "ok"
+    assert resp["action"] == "no_action"
+    assert resp["result"] == expected_func_id
+
+def test_client_uploads_function_on_probe_miss():
+    client = make_client_with_responses(
+        {"status": "ok", "result": False},
+        {"status": "ok", "action": "registered", "result": "func123", "message": ""}
+    )
+
+    resp = client.pyfaas_register(sample_func)
+
+    assert client._send_request.call_count == 2
+    operation, extra_payload = client._send_request.call_args.args
+    assert operation == "register"
+    assert extra_payload["func_name"] == "sample_func"
+    assert dill.loads(extra_payload["func_code"])(3) == 3
+    assert resp["action"] == "registered"
@@ -0,0 +1,115 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import zmq
+import dill
+
+from pyfaas import LocalCluster
+from pyfaas.pyfaas import pyfaas_register_many, _CLIENT_MANAGER
+from pyfaas.pyfaas_client.pyfaas_client import PyfaasClient
+from pyfaas.exceptions import (
+    PyFaaSTimeoutError,
+    PyFaaSFunctionRegistrationError,
+    PyFaaSParameterMismatchError
+)
+
+
+def square(x: int) -> int:
+    return x * x
+
+def negate(x: int) -> int:
+    return -x
+
+def unannotated(x):
+    return x
+
+def test_register_many_not_configured():
+    _CLIENT_MANAGER.configured = False
+
+    with pytest.raises(RuntimeError):
+        pyfaas_register_many([square])
+
+def test_register_many_success():
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_register_many.return_value = {
+        "status": "ok",
+        "action": "registered",
+        "result": {"square": "id1", "negate": "id2"},
+        "message": None
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    func_ids = pyfaas_register_many([square, negate])
+
+    assert func_ids == {"square": "id1", "negate": "id2"}
+    mock_client.pyfaas_register_many.assert_called_once_with([square, negate])
+
+def test_register_many_partial_failure_raises():
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_register_many.return_value = {
+        "status": "err",
+        "action": None,
+        "result": {"square": "id1"},
+        "message": "Unspecified return annotation of function 'unannotated'"
+    }
+    _CLIENT_MANAGER.client = mock_client
+
+    with patch("pyfaas.pyfaas.logger"):
+        with pytest.raises(PyFaaSFunctionRegistrationError, match="unannotated"):
+            pyfaas_register_many([square, unannotated])
+
+def test_register_many_timeout():
+    _CLIENT_MANAGER.configured = True
+    mock_client = MagicMock()
+    mock_client.pyfaas_register_many.side_effect = zmq.Again()
+    _CLIENT_MANAGER.client = mock_client
+
+    with pytest.raises(PyFaaSTimeoutError):
+        pyfaas_register_many([square])
+
+
+def make_client():
+    client = PyfaasClient.__new__(PyfaasClient)
+    client._logger = MagicMock()
+    client._send_request = MagicMock(return_value={"status": "ok"})
+    return client
+
+def test_client_sends_the_batch_in_one_request():
+    client = make_client()
+
+    client.pyfaas_register_many([square, negate, square])
+
+    client._send_request.assert_called_once()
+    operation, extra_payload = client._send_request.call_args.args
+    assert operation == "register_batch"
+    assert [function["func_name"] for function in extra_payload["functions"]] == ["square", "negate"]     # Duplicates are sent once
+    square_size = extra_payload["functions"][0]["code_size"]
+    square_code = extra_payload["func_codes"][:square_size]
+    assert dill.loads(square_code)(3) == 9
+    assert dill.loads(extra_payload["func_codes"][square_size:])(3) == -3
+
+def test_client_rejects_different_functions_with_the_same_name():
+    client = make_client()
+    other_square = lambda x: x
+    other_square.__name__ = "square"
+
+    with pytest.raises(PyFaaSParameterMismatchError):
+        client.pyfaas_register_many([square, other_square])
+    with pytest.raises(PyFaaSParameterMismatchError):
+        client.pyfaas_register_many([])
+    client._send_request.assert_not_called()
+
+
+def test_batch_is_registered_by_the_cluster():
+    with LocalCluster(n_workers=2) as cluster:
+        response = cluster.client.pyfaas_register_many([square, negate, unannotated])
+
+        assert response["status"] == "err"
+        assert "unannotated" in response["message"]
+        func_ids = response["result"]
+        assert set(func_ids) == {"square", "negate"}
+        assert cluster.client.pyfaas_exec(func_ids["square"], [4], {})["result"] == 16
+        assert cluster.client.pyfaas_exec(func_ids["negate"], [4], {})["result"] == -4
+        # Registering again is idempotent
+        assert cluster.client.pyfaas_register_many([square])["result"] == {"square": func_ids["square"]}
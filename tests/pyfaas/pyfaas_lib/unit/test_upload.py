@@ -0,0 +1,52 @@
+import pytest
+
+from pyfaas.util.codec import get_codec
+from pyfaas.util.upload import (
+    UPLOAD_CHUNK_BYTES,
+    encode_upload_fields,
+    strip_upload_fields,
+    build_upload_chunks,
+)
+
+
+def test_small_fields_travel_in_the_request():
+    assert encode_upload_fields("json", "exec", {"positional_args": [1, 2], "default_args": {}}) is None
+    assert encode_upload_fields("json", "register", {"func_name": "f"}) is None
+    assert encode_upload_fields("json", "exec", None) is None
+
+
+def test_large_fields_are_encoded_for_upload():
+    big_arg = "x" * (2 * UPLOAD_CHUNK_BYTES)
+
+    frames = encode_upload_fields("json", "exec", {"positional_args": [big_arg], "default_args": {}, "cache_result": True})
+
+    assert get_codec("json").decode(frames) == {"positional_args": [big_arg], "default_args": {}}
+
+
+def test_strip_upload_fields_replaces_them_with_the_upload_id():
+    payload = {"positional_args": [1], "default_args": {"a": 2}, "cache_result": False}
+
+    assert strip_upload_fields("exec", payload, "up1") == {"cache_result": False, "upload_id": "up1"}
+
+
+@pytest.mark.parametrize("codec_name, big_arg", [
+    ("json", "x" * (3 * UPLOAD_CHUNK_BYTES + 10)),
+    ("pickle", bytearray(b"\x07" * (3 * UPLOAD_CHUNK_BYTES + 10))),     # Out-of-band buffer: a frame of its own
+])
+def test_chunks_reassemble_into_the_uploaded_frames(codec_name, big_arg):
+    frames = encode_upload_fields(codec_name, "exec", {"positional_args": [big_arg], "default_args": {}})
+
+    chunks = list(build_upload_chunks("client", codec_name, "up1", "id123", frames))
+
+    assert all(chunk["message_id"] == "up1" and chunk["func_id"] == "id123" for chunk in chunks)
+    assert all(len(chunk["chunk"]) <= UPLOAD_CHUNK_BYTES for chunk in chunks)
+    frame_sizes = chunks[0]["upload_frame_sizes"]
+    upload = bytearray(sum(frame_sizes))
+    for chunk in reversed(chunks):      # Chunks are placed by offset, whatever their order
+        upload[chunk["chunk_offset"]:chunk["chunk_offset"] + len(chunk["chunk"])] = chunk["chunk"]
+    reassembled_frames = []
+    offset = 0
+    for size in frame_sizes:
+        reassembled_frames.append(bytes(upload[offset:offset + size]))
+        offset += size
+    assert get_codec(codec_name).decode(reassembled_frames)["positional_args"] == [big_arg]
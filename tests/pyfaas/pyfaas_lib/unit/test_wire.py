@@ -0,0 +1,167 @@
+import os
+import base64
+import json
+import pickle
+import pytest
+
+from pyfaas.util.wire import encode_message, decode_header, decode_message, reencode_message
+from pyfaas.util.codec import get_codec
+from pyfaas.util.compression import FrameCompressor
+
+
+def test_binary_fields_travel_as_raw_frames():
+    message = {
+        "operation": "register",
+        "message_id": "abc",
+        "func_name": "f",
+        "func_code": b"\x00\x01raw",
+    }
+
+    frames = encode_message(message)
+
+    header = json.loads(frames[0])
+    assert header["frames"] == ["func_code"]
+    assert frames[2] == b"\x00\x01raw"
+    assert decode_message(frames) == {**message, "codec": "json"}
+
+
+def test_header_holds_routing_fields_only():
+    frames = encode_message({
+        "operation": "exec",
+        "message_id": "abc",
+        "func_id": "id123",
+        "positional_args": [1, 2],
+        "default_args": {"c": 3},
+    })
+
+    header = decode_header(frames)
+
+    assert header["operation"] == "exec"
+    assert header["func_id"] == "id123"
+    assert "positional_args" not in header
+    assert json.loads(frames[1]) == {"positional_args": [1, 2], "default_args": {"c": 3}}
+
+
+def test_version_1_messages_are_base64_json():
+    frames = encode_message({"status": "ok", "result_type": "pickle", "result": b"pickled"}, wire_version=1)
+
+    assert len(frames) == 1
+    legacy_message = json.loads(frames[0])
+    assert legacy_message["result_type"] == "pickle_base64"
+    assert base64.b64decode(legacy_message["result"]) == b"pickled"
+    assert decode_message(frames) == {"status": "ok", "result_type": "pickle", "result": b"pickled"}
+
+
+def test_version_1_function_code_is_decoded():
+    legacy_frames = [json.dumps({
+        "operation": "register",
+        "serialized_func_base64": base64.b64encode(b"code").decode(),
+    }).encode()]
+
+    assert decode_message(legacy_frames) == {"operation": "register", "func_code": b"code"}
+
+
+def test_reencode_forwards_frames_untouched_and_applies_header_changes():
+    frames = encode_message({"operation": "register", "func_name": "f", "func_code": b"code"})
+    header = decode_header(frames)
+    header["func_id"] = "id123"
+
+    reencoded_frames = reencode_message(header, frames, 2)
+
+    assert reencoded_frames[1:] == frames[1:]
+    assert decode_message(reencoded_frames)["func_id"] == "id123"
+
+
+def test_reencode_converts_between_versions():
+    frames = encode_message({"operation": "register", "func_name": "f", "func_code": b"code"})
+
+    legacy_frames = reencode_message(decode_header(frames), frames, 1)
+
+    assert json.loads(legacy_frames[0])["serialized_func_base64"] == base64.b64encode(b"code").decode()
+    assert decode_message(reencode_message(decode_header(legacy_frames), legacy_frames, 2))["func_code"] == b"code"
+
+
+def test_codec_is_advertised_in_the_header():
+    frames = encode_message({"operation": "exec", "codec": "pickle", "positional_args": [{1, 2}]})
+
+    assert decode_header(frames)["codec"] == "pickle"
+    assert decode_message(frames)["positional_args"] == [{1, 2}]
+
+
+def test_pickle_codec_sends_buffers_out_of_band():
+    # Objects supporting pickle protocol 5 (e.g.: NumPy arrays) hand their buffers out as PickleBuffer objects
+    frames = encode_message({"operation": "exec", "codec": "pickle", "positional_args": [pickle.PickleBuffer(b"x" * 1000)]})
+
+    assert decode_header(frames)["buffers"] == 1
+    assert bytes(frames[2]) == b"x" * 1000
+    assert bytes(decode_message(frames)["positional_args"][0]) == b"x" * 1000
+
+
+def test_msgpack_codec_roundtrip():
+    pytest.importorskip("msgpack")
+    message = {"operation": "exec", "codec": "msgpack", "positional_args": [1, "a", {"b": 2.5}], "func_code": b"code"}
+
+    assert decode_message(encode_message(message)) == message
+
+
+def test_reencode_converts_between_codecs():
+    frames = encode_message({"operation": "exec", "codec": "pickle", "positional_args": [(1, 2)]})
+
+    json_frames = reencode_message(decode_header(frames), frames, 2, "json")
+
+    assert decode_header(json_frames)["codec"] == "json"
+    assert decode_message(json_frames)["positional_args"] == [[1, 2]]
+
+
+def test_codec_unable_to_represent_payload_raises_type_error():
+    with pytest.raises(TypeError):
+        encode_message({"operation": "exec", "positional_args": [{1, 2}]})
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_large_frames_are_compressed_and_flagged():
+    message = {"operation": "exec", "result": b"a" * 100_000}
+
+    frames = encode_message(message, compressor=FrameCompressor("zlib", threshold_bytes=1024))
+
+    header = decode_header(frames)
+    assert header["compression"] == "zlib"
+    assert header["compressed"] == [1]
+    assert len(frames[2]) < 100_000
+    assert decode_message(frames) == {**message, "codec": "json"}
+
+
+def test_small_and_incompressible_frames_are_not_compressed():
+    message = {"operation": "exec", "result": os.urandom(100_000)}
+
+    frames = encode_message(message, compressor=FrameCompressor("zlib", threshold_bytes=1024))
+
+    assert "compression" not in decode_header(frames)
+    assert frames[2] == message["result"]
+
+
+def test_lzma_compression_roundtrip():
+    message = {"operation": "exec", "positional_args": ["b" * 100_000]}
+
+    frames = encode_message(message, compressor=FrameCompressor("lzma", level=1, threshold_bytes=1024))
+
+    assert decode_header(frames)["compressed"] == [0]
+    assert decode_message(frames) == {**message, "codec": "json"}
+
+
+def test_reencode_forwards_compressed_frames_untouched():
+    frames = encode_message({"operation": "exec", "result": b"a" * 100_000}, compressor=FrameCompressor("zlib", threshold_bytes=1024))
+
+    reencoded_frames = reencode_message(decode_header(frames), frames, 2)
+
+    assert reencoded_frames[1:] == frames[1:]
+    assert decode_message(reencoded_frames)["result"] == b"a" * 100_000
+
+
+def test_unknown_compression_algorithm():
+    with pytest.raises(ValueError):
+        FrameCompressor("brotli")
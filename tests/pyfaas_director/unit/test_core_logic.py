@@ -40,3 +40,479 @@ def test_compute_function_id(mock_zmq_context, mock_file_logger, dummy_config):
     
     assert isinstance(func_id, str)
     assert len(func_id) == 64  # SHA256 hex digest length
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_register_is_routed_by_its_header_only(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header
+
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+    frames = encode_message({'operation': 'register', 'message_id': 'm1', 'func_name': 'f', 'func_id': 'id1', 'func_code': b'not a pickle'})
+    header = decode_header(frames)
+    frames[1] = b'not a payload either'     # Neither the payload nor the code may be decoded to route the request
+
+    with patch('pyfaas_director.app.pyfaas_director.decode_message') as mock_decode_message:
+        director._handle_client_request('client-1', header, frames)
+
+    mock_decode_message.assert_not_called()
+    forwarded_msg = director._zmq_socket.send_multipart.call_args.args[0]
+    assert forwarded_msg[0] == b'worker-1'
+    assert forwarded_msg[3:] == frames[1:]
+
+    # The Worker's response names the function it now holds: the Director records it
+    response_frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'register',
+                                      'destination_client': 'client-1', 'message_id': 'm1', 'func_id': 'id1', 'status': 'ok'})
+    director._handle_worker_request('worker-1', decode_header(response_frames), response_frames)
+
+    assert director._functions_workers_map == {'id1': ['worker-1']}
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_least_loaded_strategy_picks_the_worker_with_fewest_requests_in_flight(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header
+
+    dummy_config['workers']['worker_selection_strategy'] = 'Least-Loaded'
+    director = PyfaasDirector(dummy_config)
+    director._workers = {worker_id: {'wire_version': 2, 'codecs': ['json']} for worker_id in ('worker-1', 'worker-2', 'worker-3')}
+
+    def send_exec(message_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': []})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+        return director._zmq_socket.send_multipart.call_args.args[0][0].decode()
+
+    def respond(worker_id, message_id):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok'})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    # Three requests spread over the three idle Workers
+    busy_worker_ids = [send_exec(f'm{i}') for i in range(3)]
+    assert sorted(busy_worker_ids) == ['worker-1', 'worker-2', 'worker-3']
+
+    # The Worker that responded is the only idle one
+    respond(busy_worker_ids[1], 'm1')
+    assert director._in_flight_requests == {busy_worker_ids[0]: 1, busy_worker_ids[1]: 0, busy_worker_ids[2]: 1}
+    assert send_exec('m3') == busy_worker_ids[1]
+
+    # A duplicate response does not count twice
+    respond(busy_worker_ids[1], 'm1')
+    assert director._in_flight_requests[busy_worker_ids[1]] == 1
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_fastest_strategy_picks_the_worker_with_lowest_expected_latency(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header
+
+    dummy_config['workers']['worker_selection_strategy'] = 'Fastest'
+    director = PyfaasDirector(dummy_config)
+    director._workers = {worker_id: {'wire_version': 2, 'codecs': ['json']} for worker_id in ('worker-1', 'worker-2')}
+
+    def send_exec(message_id, func_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': func_id, 'positional_args': []})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+        return director._zmq_socket.send_multipart.call_args.args[0][0].decode()
+
+    def respond(worker_id, message_id, response_time_s):
+        director._forwarded_requests[('client-1', message_id)]['in_flight'][worker_id] -= response_time_s
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok'})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    # Workers with no response time yet are tried first
+    first_worker_id = send_exec('m0', 'f')
+    respond(first_worker_id, 'm0', 1.0)
+    second_worker_id = send_exec('m1', 'f')
+    assert second_worker_id != first_worker_id
+    respond(second_worker_id, 'm1', 0.1)
+    assert director._response_time_ewmas[(second_worker_id, 'f')] == pytest.approx(0.1, abs=0.05)
+    assert director._response_time_ewmas[(first_worker_id, None)] == pytest.approx(1.0, abs=0.05)
+
+    # The fastest Worker is chosen while its requests in flight do not make it slower than the other one
+    assert [send_exec(f'm{i}', 'f') for i in range(2, 5)] == [second_worker_id] * 3
+
+    # Moving average of the response times of the function
+    respond(second_worker_id, 'm2', 2.0)
+    assert director._response_time_ewmas[(second_worker_id, 'f')] == pytest.approx(0.3 * 2.0 + 0.7 * 0.1, abs=0.05)
+    assert send_exec('m5', 'f') == first_worker_id
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_affinity_strategy_routes_identical_calls_to_the_same_worker(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header
+
+    dummy_config['workers']['worker_selection_strategy'] = 'Affinity'
+    director = PyfaasDirector(dummy_config)
+    director._workers = {f'worker-{i}': {'wire_version': 2, 'codecs': ['json']} for i in range(4)}
+
+    def send_exec(message_id, positional_args):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': positional_args,
+                                 'default_args': {}, 'save_in_cache': True})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+        return director._zmq_socket.send_multipart.call_args.args[0][0].decode()
+
+    def respond(worker_id, message_id):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok'})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    # Identical calls land on the same Worker, different calls are spread over the Workers
+    chosen_worker_ids = {}
+    for i in range(40):
+        worker_id = send_exec(f'm{i}', [i % 10])
+        assert chosen_worker_ids.setdefault(i % 10, worker_id) == worker_id
+        respond(worker_id, f'm{i}')
+    assert len(set(chosen_worker_ids.values())) > 1
+
+    # Bounded load: the calls in flight on an overloaded Worker go to the next Worker on the ring
+    worker_ids = [send_exec(f'n{i}', [0]) for i in range(4)]
+    assert worker_ids[0] == chosen_worker_ids[0]
+    assert len(set(worker_ids)) > 1
+    assert max(director._in_flight_requests.values()) <= 2
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_identical_coalesced_exec_requests_share_one_execution(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+
+    def send_exec(client_id, message_id, positional_args, coalesce=True):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': positional_args,
+                                 'default_args': {}, 'coalesce': coalesce})
+        director._handle_client_request(client_id, decode_header(frames), frames)
+
+    send_exec('client-1', 'm1', [1])
+    send_exec('client-2', 'm2', [1])
+    send_exec('client-2', 'm2', [1])                # Retry of a coalesced request
+    send_exec('client-3', 'm3', [2])                # Other arguments
+    send_exec('client-4', 'm4', [1], coalesce=False)
+    forwarded_message_ids = [decode_header(call.args[0][2:])['message_id'] for call in director._zmq_socket.send_multipart.call_args_list]
+    assert forwarded_message_ids == ['m1', 'm3', 'm4']
+
+    director._zmq_socket.send_multipart.reset_mock()
+    frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec', 'destination_client': 'client-1',
+                             'message_id': 'm1', 'status': 'ok', 'result': b'result'})
+    director._handle_worker_request('worker-1', decode_header(frames), frames)
+    responses = {call.args[0][0].decode(): decode_message(call.args[0][2:]) for call in director._zmq_socket.send_multipart.call_args_list}
+    assert {client_id: (response['message_id'], response['result']) for client_id, response in responses.items()} == {
+        'client-1': ('m1', b'result'), 'client-2': ('m2', b'result')
+    }
+    assert [entry['leader'] for entry in director._coalesced_executions.values()] == [('client-3', 'm3')]
+    assert director._coalesced_followers == {}
+
+    # Identical requests arriving after the response are executed again
+    director._zmq_socket.send_multipart.reset_mock()
+    send_exec('client-2', 'm5', [1])
+    assert decode_header(director._zmq_socket.send_multipart.call_args.args[0][2:])['message_id'] == 'm5'
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_director_cache_answers_identical_exec_requests_itself(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    dummy_config['caching'] = {'max_size': 8, 'ttl_s': 0}
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+    director._functions_workers_map = {'f': ['worker-1']}
+
+    def send(client_id, message_id, operation='exec', positional_args=None):
+        frames = encode_message({'operation': operation, 'message_id': message_id, 'func_id': 'f', 'positional_args': positional_args,
+                                 'default_args': {}, 'use_director_cache': True})
+        director._handle_client_request(client_id, decode_header(frames), frames)
+        destination, _, *response_frames = director._zmq_socket.send_multipart.call_args.args[0]
+        return destination.decode(), decode_message(response_frames)
+
+    def respond(message_id, status, result):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec', 'destination_client': 'client-1',
+                                 'message_id': message_id, 'status': status, 'result': result})
+        with patch('pyfaas_director.app.pyfaas_director.decode_message') as mock_decode_message:
+            director._handle_worker_request('worker-1', decode_header(frames), frames)
+        mock_decode_message.assert_not_called()     # Cacheability is read from the header: the result is never decoded
+
+    # Failed executions are not cached
+    assert send('client-1', 'm1', positional_args=[1])[0] == 'worker-1'
+    respond('m1', 'err', b'')
+    assert send('client-1', 'm2', positional_args=[1])[0] == 'worker-1'
+    respond('m2', 'ok', b'result')
+
+    # Hit: the Director answers with the cached response, no Worker is involved
+    destination, response = send('client-2', 'm3', positional_args=[1])
+    assert (destination, response['message_id'], response['status'], response['result']) == ('client-2', 'm3', 'ok', b'result')
+    assert send('client-2', 'm4', positional_args=[2])[0] == 'worker-1'
+    assert director._response_cache.get_stats()['hits'] == 1
+
+    # Unregistering the function invalidates its cached responses
+    send('client-1', 'm5', operation='unregister')
+    assert send('client-1', 'm6', positional_args=[1])[0] == 'worker-1'
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_followers_of_an_evicted_coalesced_request_are_answered(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+
+    def send_exec(client_id, message_id, positional_args):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': positional_args,
+                                 'default_args': {}, 'coalesce': True})
+        director._handle_client_request(client_id, decode_header(frames), frames)
+
+    with patch('pyfaas_director.app.pyfaas_director._FORWARDED_REQUESTS_MAX_SIZE', 1):
+        send_exec('client-1', 'm1', [1])
+        send_exec('client-2', 'm2', [1])
+        send_exec('client-3', 'm3', [2])        # Evicts the leader of 'm2'
+
+    responses = [(call.args[0][0].decode(), decode_message(call.args[0][2:])) for call in director._zmq_socket.send_multipart.call_args_list]
+    assert [(destination, response['message_id'], response['status']) for destination, response in responses if destination.startswith('client-')] == [
+        ('client-2', 'm2', 'err')
+    ]
+    assert 'client-2' not in director._currently_connected_clients
+    assert director._coalesced_followers == {}
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_followers_of_a_coalesced_request_whose_worker_died_are_answered(mock_zmq_context, mock_file_logger, dummy_config):
+    import datetime
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    director = PyfaasDirector(dummy_config)
+    long_ago = datetime.datetime.now() - datetime.timedelta(minutes=1)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json'], 'registered_at': long_ago, 'last_heartbeat': long_ago}}
+
+    def send_exec(client_id, message_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': [1],
+                                 'default_args': {}, 'coalesce': True})
+        director._handle_client_request(client_id, decode_header(frames), frames)
+
+    for client_id, message_id in (('client-1', 'm1'), ('client-2', 'm2'), ('client-3', 'm3')):
+        send_exec(client_id, message_id)
+    director._zmq_socket.send_multipart.reset_mock()
+
+    # One round of the heartbeat check: the Worker executing 'm1' is dead
+    director._threading_stop_event = MagicMock()
+    director._threading_stop_event.wait.side_effect = [False, True]
+    director._heartbeats_watcher()
+
+    responses = [(call.args[0][0].decode(), call.args[0][2:]) for call in director._zmq_socket.send_multipart.call_args_list]
+    client_responses = [(destination, decode_message(frames)) for destination, frames in responses if destination.startswith('client-')]
+    assert [(destination, response['message_id'], response['status']) for destination, response in client_responses] == [
+        ('client-2', 'm2', 'err'), ('client-3', 'm3', 'err')
+    ]
+    assert director._currently_connected_clients == ['client-1']
+    assert director._coalesced_executions == {}
+    assert director._coalesced_followers == {}
+
+    # Identical requests are not attached to the dead request any more
+    director._workers['worker-2'] = {'wire_version': 2, 'codecs': ['json']}
+    director._zmq_socket.send_multipart.reset_mock()
+    send_exec('client-4', 'm4')
+    assert director._zmq_socket.send_multipart.call_args.args[0][0] == b'worker-2'
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_in_flight_window_queues_excess_requests_and_rejects_them_when_the_queue_is_full(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    dummy_config['workers']['max_in_flight_per_worker'] = 1
+    dummy_config['workers']['max_queued_requests'] = 2
+    director = PyfaasDirector(dummy_config)
+    director._workers = {worker_id: {'wire_version': 2, 'codecs': ['json']} for worker_id in ('worker-1', 'worker-2')}
+
+    def send_exec(message_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': []})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+
+    def respond(worker_id, message_id):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok'})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    def sent_messages():
+        messages = [(call.args[0][0].decode(), decode_message(call.args[0][2:])) for call in director._zmq_socket.send_multipart.call_args_list]
+        director._zmq_socket.send_multipart.reset_mock()
+        return messages
+
+    # One request in flight on each Worker, two waiting, the last one rejected
+    for i in range(5):
+        send_exec(f'm{i}')
+    send_exec('m2')         # Retry of a waiting request
+    messages = sent_messages()
+    assert sorted((destination, message['message_id']) for destination, message in messages[:2]) == [('worker-1', 'm0'), ('worker-2', 'm1')]
+    assert [(destination, message['message_id'], message['action']) for destination, message in messages[2:]] == [('client-1', 'm4', 'overloaded')]
+    assert [header['message_id'] for _, header, _ in director._queued_requests] == ['m2', 'm3']
+
+    # A Worker answering frees a slot for the oldest waiting request
+    worker_id_of_m0 = messages[0][0] if messages[0][1]['message_id'] == 'm0' else messages[1][0]
+    respond(worker_id_of_m0, 'm0')
+    director._dispatch_queued_requests()
+    messages = sent_messages()
+    assert [(destination, message['message_id']) for destination, message in messages] == [('client-1', 'm0'), (worker_id_of_m0, 'm2')]
+    assert [header['message_id'] for _, header, _ in director._queued_requests] == ['m3']
+    assert max(director._in_flight_requests.values()) == 1
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_queued_requests_are_not_held_back_by_busy_workers_of_other_functions(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    dummy_config['workers']['max_in_flight_per_worker'] = 1
+    director = PyfaasDirector(dummy_config)
+    director._workers = {worker_id: {'wire_version': 2, 'codecs': ['json']} for worker_id in ('worker-1', 'worker-2')}
+    director._functions_workers_map = {'f': ['worker-1'], 'g': ['worker-2']}
+
+    def send_exec(func_id, message_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': func_id, 'positional_args': []})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+
+    def respond(worker_id, message_id):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok'})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    def forwarded_messages():
+        messages = [(call.args[0][0].decode(), decode_message(call.args[0][2:])['message_id']) for call in director._zmq_socket.send_multipart.call_args_list]
+        director._zmq_socket.send_multipart.reset_mock()
+        return [message for message in messages if message[0].startswith('worker-')]
+
+    for func_id, message_id in (('f', 'f1'), ('g', 'g1'), ('f', 'f2'), ('g', 'g2')):
+        send_exec(func_id, message_id)
+    assert forwarded_messages() == [('worker-1', 'f1'), ('worker-2', 'g1')]
+    assert [header['message_id'] for _, header, _ in director._queued_requests] == ['f2', 'g2']
+
+    # The request for 'g' does not wait behind the one for 'f', whose Worker is still busy
+    respond('worker-2', 'g1')
+    director._dispatch_queued_requests()
+    assert forwarded_messages() == [('worker-2', 'g2')]
+    assert [header['message_id'] for _, header, _ in director._queued_requests] == ['f2']
+
+    # A new request for 'f' does not take the slot freed for the one already waiting
+    respond('worker-1', 'f1')
+    send_exec('f', 'f3')
+    director._dispatch_queued_requests()
+    assert forwarded_messages() == [('worker-1', 'f2')]
+    assert [header['message_id'] for _, header, _ in director._queued_requests] == ['f3']
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_control_requests_do_not_take_in_flight_window_slots(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    dummy_config['workers']['max_in_flight_per_worker'] = 1
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+
+    def send(operation, message_id):
+        frames = encode_message({'operation': operation, 'message_id': message_id, 'func_id': 'f', 'positional_args': []})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+        destination, _, *frames = director._zmq_socket.send_multipart.call_args.args[0]
+        return destination.decode(), decode_message(frames)['message_id']
+
+    # Unanswered control requests leave the window of the Worker free for execution requests
+    assert send('PING', 'm1') == ('worker-1', 'm1')
+    assert send('list', 'm2') == ('worker-1', 'm2')
+    assert director._in_flight_requests.get('worker-1', 0) == 0
+    assert send('exec', 'm3') == ('worker-1', 'm3')
+    assert director._in_flight_requests['worker-1'] == 1
+    assert len(director._queued_requests) == 0
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_upload_pins_are_released_on_rejected_chunks_and_expiration(mock_zmq_context, mock_file_logger, dummy_config):
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    director = PyfaasDirector(dummy_config)
+    director._workers = {'worker-1': {'wire_version': 2, 'codecs': ['json']}}
+
+    def send_chunk(client_id, upload_id, chunk_offset):
+        frames = encode_message({'operation': 'upload_chunk', 'message_id': upload_id, 'func_id': 'f', 'upload_frame_sizes': [8],
+                                 'chunk_offset': chunk_offset, 'chunk': b'abcd'})
+        director._handle_client_request(client_id, decode_header(frames), frames)
+
+    def respond(client_id, upload_id, status, partial):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'upload_chunk',
+                                 'destination_client': client_id, 'message_id': upload_id, 'status': status, 'partial': partial})
+        director._handle_worker_request('worker-1', decode_header(frames), frames)
+
+    # A chunk rejected by the Worker drops the upload
+    send_chunk('client-1', 'up1', 0)
+    respond('client-1', 'up1', 'ok', True)
+    send_chunk('client-1', 'up1', 2)
+    respond('client-1', 'up1', 'err', None)
+    assert ('client-1', 'up1') not in director._active_uploads
+
+    # An upload abandoned by its client expires, and the client still waiting for it is answered
+    send_chunk('client-2', 'up2', 0)
+    respond('client-2', 'up2', 'ok', True)
+    director._active_uploads[('client-2', 'up2')]['updated_at'] -= 120
+    director._zmq_socket.send_multipart.reset_mock()
+    director._discard_expired_uploads()
+    assert director._active_uploads == {}
+    destination, _, *frames = director._zmq_socket.send_multipart.call_args.args[0]
+    assert (destination, decode_message(frames)['message_id'], decode_message(frames)['status']) == (b'client-2', 'up2', 'err')
+    assert director._currently_connected_clients == []
+
+
+@patch('pyfaas_director.app.pyfaas_director.zmq.Context')
+@patch('pyfaas_director.app.pyfaas_director.FileLogger')
+def test_late_hedged_exec_requests_are_duplicated_to_a_second_holder(mock_zmq_context, mock_file_logger, dummy_config):
+    import collections
+    from pyfaas_director.app.util.wire import encode_message, decode_header, decode_message
+
+    dummy_config['hedging'] = {'percentile': 95, 'min_samples': 3, 'min_delay_ms': 0}
+    dummy_config['workers']['max_in_flight_per_worker'] = 4
+    director = PyfaasDirector(dummy_config)
+    director._workers = {worker_id: {'wire_version': 2, 'codecs': ['json']} for worker_id in ('worker-1', 'worker-2')}
+    director._functions_workers_map = {'f': ['worker-1', 'worker-2']}
+
+    def send_exec(message_id):
+        frames = encode_message({'operation': 'exec', 'message_id': message_id, 'func_id': 'f', 'positional_args': [], 'hedge': True})
+        director._handle_client_request('client-1', decode_header(frames), frames)
+        return director._zmq_socket.send_multipart.call_args.args[0][0].decode()
+
+    def respond(worker_id, message_id):
+        frames = encode_message({'director_operation': 'forward_to_client', 'original_client_operation': 'exec',
+                                 'destination_client': 'client-1', 'message_id': message_id, 'status': 'ok', 'result': worker_id})
+        director._handle_worker_request(worker_id, decode_header(frames), frames)
+
+    def sent_messages():
+        messages = [(call.args[0][0].decode(), decode_message(call.args[0][2:])) for call in director._zmq_socket.send_multipart.call_args_list]
+        director._zmq_socket.send_multipart.reset_mock()
+        return messages
+
+    # The latency of the function is not known well enough yet: no hedge
+    send_exec('m1')
+    assert director._scheduled_hedges == []
+    assert director._forwarded_requests[('client-1', 'm1')]['hedge'] is None
+
+    # Known latency: once the percentile delay has passed, a duplicate goes to the other holder of the function
+    director._exec_latencies['f'] = collections.deque([0.01, 0.02, 0.03])
+    first_worker_id = send_exec('m2')
+    second_worker_id = 'worker-2' if first_worker_id == 'worker-1' else 'worker-1'
+    assert [(client_id, message_id) for _, client_id, message_id in director._scheduled_hedges] == [('client-1', 'm2')]
+    director._send_due_hedges()         # Not due yet
+    sent_messages()
+    director._scheduled_hedges = [(0, 'client-1', 'm2')]
+    director._send_due_hedges()
+    assert [(destination, message['message_id']) for destination, message in sent_messages()] == [(second_worker_id, 'm2')]
+    assert director._forwarded_requests[('client-1', 'm2')]['worker_ids'] == [first_worker_id, second_worker_id]
+
+    # The first response wins: the late one is discarded, and frees the window slot of its Worker
+    in_flight_before = dict(director._in_flight_requests)
+    respond(second_worker_id, 'm2')
+    respond(first_worker_id, 'm2')
+    assert [(destination, message['result']) for destination, message in sent_messages()] == [('client-1', second_worker_id)]
+    assert director._in_flight_requests[first_worker_id] == in_flight_before[first_worker_id] - 1
+    assert director._in_flight_requests[second_worker_id] == in_flight_before[second_worker_id] - 1
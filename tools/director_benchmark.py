@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import socket
+import logging
+import argparse
+import tempfile
+import multiprocessing
+
+# Requests kept in flight by every client process
+DEFAULT_PIPELINE = 32
+
+
+def setup_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Simple tool to measure the throughput (exec requests/s) of a PyFaaS cluster for several numbers of Director shards. '
+                                                 'The Director shards, the Workers and the clients each run in their own process')
+    parser.add_argument('--shards', default='1,2,4', help='Comma-separated numbers of Director shards to measure (default: 1,2,4)')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='Number of Worker processes')
+    parser.add_argument('-c', '--clients', type=int, default=4, help='Number of client processes')
+    parser.add_argument('-d', '--duration', type=float, default=5, help='Measurement duration, in seconds, for every number of shards')
+    parser.add_argument('-p', '--pipeline', type=int, default=DEFAULT_PIPELINE, help='Requests kept in flight by every client')
+    parser.add_argument('-s', '--src', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'),
+                        help='Directory prepended to sys.path, so that PyFaaS is imported from the source tree (default to pyfaas/src)')
+    return parser
+
+
+def noop(x: int) -> int:
+    return x
+
+
+def free_port_range(size: int) -> int:
+    # First port of size consecutive ports free right now, one per shard of the Director
+    while True:
+        with socket.socket() as probe_socket:
+            probe_socket.bind(('127.0.0.1', 0))
+            first_port = probe_socket.getsockname()[1]
+        if first_port + size >= 65535:
+            continue
+        try:
+            for port in range(first_port, first_port + size):
+                with socket.socket() as probe_socket:
+                    probe_socket.bind(('127.0.0.1', port))
+            return first_port
+        except OSError:
+            continue
+
+
+def run_director_shard(src_path: str, config: dict, shard: int) -> None:
+    sys.path.insert(0, src_path)
+    logging.getLogger('pyfaas').setLevel(logging.ERROR)
+    from pyfaas_director.app.pyfaas_director import PyfaasDirector
+    PyfaasDirector(config, shard=shard).run()
+
+
+def run_worker(src_path: str, config: dict) -> None:
+    sys.path.insert(0, src_path)
+    logging.getLogger('pyfaas').setLevel(logging.ERROR)      # e.g.: every Worker warns that the registered function is already held
+    from pyfaas_worker.app.pyfaas_worker import PyfaasWorker
+    PyfaasWorker(config).run()
+
+
+def run_client(src_path: str, port: int, shards: int, start_at: float, duration: float, pipeline: int, results: multiprocessing.Queue) -> None:
+    sys.path.insert(0, src_path)
+    from pyfaas.pyfaas_client.pyfaas_client import PyfaasClient
+
+    client = PyfaasClient('127.0.0.1', port, 10, director_shards=shards, max_retries=0)
+    func_id = client.pyfaas_register(noop)['result']
+    client.pyfaas_exec(func_id, [0], {})        # Warm-up: connections are established
+
+    while time.time() < start_at:       # Every client starts at the same time
+        time.sleep(0.01)
+    completed = 0
+    in_flight = [client.pyfaas_exec_async(func_id, [i], {}) for i in range(pipeline)]
+    end_at = time.monotonic() + duration
+    while time.monotonic() < end_at:
+        in_flight.pop(0).result()
+        completed += 1
+        in_flight.append(client.pyfaas_exec_async(func_id, [completed], {}))
+    for future in in_flight:
+        future.result()
+    client.zmq_close()
+    results.put(completed)
+
+
+def measure(args: argparse.Namespace, shards: int, log_directory: str) -> float:
+    '''
+    Starts a cluster whose Director has the given number of shards, and runs the clients against it.
+
+    Returns:
+        float: The exec requests completed per second by all the clients together.
+    '''
+    port = free_port_range(shards)
+    director_config = {
+        'network': {'director_ip_addr': '127.0.0.1', 'director_port': port, 'shards': shards},
+        'logging': {'log_level': 'warning', 'log_directory': log_directory, 'log_filename': 'director.log'},
+        'statistics': {'enabled': True},
+        'workers': {'heartbeat_check_interval_ms': 2000, 'expected_heartbeat_interval_ms': 2000,
+                    'worker_selection_strategy': 'Round-Robin', 'synchronization_interval_ms': 1000},
+        'misc': {'greeting_msg': 'Benchmark PyFaaS Director'}
+    }
+    worker_config = {
+        'network': {'director_ip_addr': '127.0.0.1', 'director_port': port, 'director_shards': shards, 'heartbeat_interval_ms': 1000},
+        'logging': {'log_level': 'warning', 'log_directory': log_directory, 'log_filename': 'worker.log'},
+        'statistics': {'enabled': True},
+        'behavior': {'dump_file': None, 'shutdown_persistence': False, 'caching': {'policy': 'LRU', 'max_size': 0}, 'dedup_table_size': 0, 'tags': []},
+        'misc': {'greeting_msg': 'Benchmark PyFaaS Worker', 'log_level': 'warning'}
+    }
+
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_director_shard, args=(args.src, director_config, shard), daemon=True) for shard in range(shards)]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)
+    worker_processes = [context.Process(target=run_worker, args=(args.src, worker_config), daemon=True) for _ in range(args.workers)]
+    for process in worker_processes:
+        process.start()
+    processes.extend(worker_processes)
+    time.sleep(1)
+
+    results = context.Queue()
+    start_at = time.time() + 2          # Time for the clients to start, register the function and warm up
+    client_processes = [context.Process(target=run_client, args=(args.src, port, shards, start_at, args.duration, args.pipeline, results), daemon=True)
+                        for _ in range(args.clients)]
+    for process in client_processes:
+        process.start()
+    try:
+        completed = sum(results.get(timeout=start_at - time.time() + args.duration + 30) for _ in client_processes)
+    finally:
+        for process in client_processes + processes:
+            process.terminate()
+            process.join()
+    return completed / args.duration
+
+
+def main():
+    parser = setup_parser()
+    args = parser.parse_args()
+
+    try:
+        shard_counts = [int(shards) for shards in args.shards.split(',')]
+    except ValueError:
+        print(f"Error: invalid numbers of shards '{args.shards}'")
+        return
+    if any(shards < 1 for shards in shard_counts) or args.workers < 1 or args.clients < 1 or args.pipeline < 1:
+        print('Error: the numbers of shards, Workers, clients and pipelined requests must be positive')
+        return
+
+    print(f'{args.workers} Worker(s), {args.clients} client(s) keeping {args.pipeline} exec requests in flight each, {args.duration} s per measurement, {os.cpu_count()} CPU(s)')
+    baseline = None
+    with tempfile.TemporaryDirectory(prefix='pyfaas-benchmark-') as log_directory:
+        for shards in shard_counts:
+            throughput = measure(args, shards, log_directory)
+            baseline = baseline or throughput
+            print(f'  {shards:3d} shard(s): {throughput:10.0f} req/s  (x{throughput / baseline:.2f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+
+# A line of the '-X importtime' report: 'import time: <self us> | <cumulative us> | <indented module name>'
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)$')
+
+
+def setup_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Simple tool to measure the cold import time of a module (default: pyfaas), using python -X importtime')
+    parser.add_argument('-m', '--module', default='pyfaas', help='The module to import')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='How many fresh interpreters import the module. The median is reported')
+    parser.add_argument('-t', '--top', type=int, default=10, help='How many of the slowest imported modules are listed (by cumulative time)')
+    parser.add_argument('-s', '--src', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'),
+                        help='Directory prepended to PYTHONPATH, so that the module is imported from the source tree (default to pyfaas/src)')
+    parser.add_argument('--max-ms', type=float, help='Exit with status 1 if the median import time exceeds this many milliseconds')
+    return parser
+
+
+def measure_import(module: str, src_path: str) -> dict[str, tuple[int, int]]:
+    '''
+    Imports module in a fresh interpreter, without bytecode writing so that every run is equally cold.
+
+    Returns:
+        dict[str, tuple[int, int]]: The self and cumulative import time (microseconds) of every imported module, by module name.
+    '''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(path for path in (src_path, env.get('PYTHONPATH')) if path)
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                               env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Failed to import '{module}':\n{completed.stderr}")
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return timings
+
+
+def main():
+    parser = setup_parser()
+    args = parser.parse_args()
+
+    if args.runs < 1:
+        print(f'Error: at least one run is required (-r)')
+        return
+
+    runs = [measure_import(args.module, args.src) for _ in range(args.runs)]
+    total_ms = statistics.median(run[args.module][1] for run in runs) / 1000
+
+    # Modules imported in every run, ranked by median cumulative time
+    modules = set.intersection(*(set(run) for run in runs))
+    cumulative_ms = {module: statistics.median(run[module][1] for run in runs) / 1000 for module in modules}
+    print(f"Cold 'import {args.module}': {total_ms:.1f} ms (median of {args.runs} runs, {len(modules)} modules imported)")
+    for module, module_ms in sorted(cumulative_ms.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f'  {module_ms:8.1f} ms  {module}')
+
+    heavy_modules = [module for module in ('zmq', 'dill', 'msgpack', 'asyncio') if module in modules]
+    if heavy_modules:
+        print(f"Heavy modules imported: {', '.join(heavy_modules)}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f'Error: import time {total_ms:.1f} ms exceeds {args.max_ms} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()